@@ -1,14 +1,48 @@
 """物流事故ヒートマップ可視化システム - メインアプリケーション"""
+import time
+from pathlib import Path
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
 import altair as alt
-from config import DEFAULT_CENTER_LAT, DEFAULT_CENTER_LON, DEFAULT_ZOOM
-from src.data_loader import load_accident_data, load_predicted_data
-from src.map_components import render_map
-from src.filters import apply_filters, extract_filter_options
-from src.utils import validate_coordinates
-from src.request_handler import submit_request
+from config import (
+    DEFAULT_CENTER_LAT,
+    DEFAULT_CENTER_LON,
+    DEFAULT_ZOOM,
+    ANIMATION_FRAME_INTERVAL_SEC,
+    SUBMISSION_RATE_PER_MINUTE,
+    SUBMISSION_BURST,
+    PREDICTED_DATA_FILE,
+    POPULATION_DATA_FILE,
+    PREDICTION_MODEL_FILE,
+    PREDICTION_MAX_SCENARIOS,
+    BITMAP_ZOOM_RANGE,
+    TILE_SERVER_PORT,
+    TILE_SERVER_URL,
+    ECONOMIC_IMPACT_POPULATION_FILE
+)
+from src.data_loader import (
+    load_predicted_data,
+    get_population_index,
+    prepare_predicted_frame,
+    get_dataset_version,
+    get_file_version
+)
+from src.map_components import render_map, MUNICIPALITY_MODES, RED_RANGE
+from src.raster import tile_range_bounds, viewport_tile_range
+from src.aggregation import get_municipality_aggregate
+from src.tiles import ensure_tile_cache, get_tile_server_url, get_tile_url_template
+from src.animation import ANIMATION_BUCKETS, get_temporal_frames, format_frame_label
+from src.filters import make_filter_key
+from src.query_service import get_query_service
+from src.utils import validate_coordinates, TokenBucket
+from src.request_handler import submit_request, load_requests
+from src.report_clusters import get_request_hotspots
+from src.image_pipeline import get_image_pipeline, thumbnail_data_url
+from src.submission_queue import get_submission_queue
+from src.prediction import get_location_model, make_scenarios
+from src.risk_surface import get_risk_surface, get_risk_surface_frame
+from src.export import EXPORT_FORMATS, export_file, export_filename
 from src.statistics import calculate_filtered_statistics
 from src.styles import get_google_cloud_css
 
@@ -31,10 +65,18 @@ def initialize_session_state():
         st.session_state.zoom = DEFAULT_ZOOM
     if 'show_request_form' not in st.session_state:
         st.session_state.show_request_form = False
-
-
-def render_sidebar(accident_data):
-    """サイドバーのフィルタUIを描画"""
+    if 'animation_frame' not in st.session_state:
+        st.session_state.animation_frame = 0
+    if 'animation_playing' not in st.session_state:
+        st.session_state.animation_playing = False
+    if 'submission_limiter' not in st.session_state:
+        # セッションごとのレート制限（ページの再読み込みで新しいセッションになるとリセットされる。
+        # 再読み込みで回避できない全体の上限は submit_request の get_submission_limiter で掛ける）
+        st.session_state.submission_limiter = TokenBucket(SUBMISSION_RATE_PER_MINUTE / 60, SUBMISSION_BURST)
+
+
+def render_sidebar(query_service):
+    """サイドバーのフィルタUIを描画し、共有クエリサービスでフィルタした結果を返す"""
     # タイトル削除: st.sidebar.title("コントロールパネル") は削除
 
     # --- 位置指定セクション ---
@@ -71,7 +113,7 @@ def render_sidebar(accident_data):
     st.sidebar.divider()
 
     # フィルタオプション抽出
-    filter_options = extract_filter_options(accident_data)
+    filter_options = query_service.filter_options
 
     # --- フィルタセクション ---
     st.sidebar.markdown('<p class="sidebar-header"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" style="display: inline; vertical-align: middle; margin-right: 6px;"><polygon points="22 3 2 3 10 12.46 10 19 14 21 14 12.46 22 3"></polygon></svg>データフィルタ</p>', unsafe_allow_html=True)
@@ -126,8 +168,7 @@ def render_sidebar(accident_data):
     )
 
     # フィルタ適用
-    filtered_data = apply_filters(
-        accident_data,
+    filter_params = dict(
         year=year_filter,
         month=month_filter,
         hour_range=hour_range,
@@ -135,6 +176,8 @@ def render_sidebar(accident_data):
         weather_conditions=weather_filter if weather_filter else None,
         areas=area_filter if area_filter else None
     )
+    query_result = query_service.query(**filter_params)
+    filter_key = query_result.key
 
     # フィルタリセット
     if st.sidebar.button("リセット", use_container_width=True):
@@ -149,6 +192,13 @@ def render_sidebar(accident_data):
             ("all", "実績 + 予測"),
             ("actual", "実績のみ"),
             ("predicted", "予測のみ"),
+            ("tiles", "実績（タイル表示）"),
+            ("bitmap", "実績 + 予測（サーバー描画）"),
+            ("risk", "リスク面（事故種別×天候）"),
+            ("animation", "時間帯・月別アニメーション"),
+            ("municipality", "市区町村別（件数）"),
+            ("municipality_rate", "市区町村別（人口比）"),
+            ("hotspots", "要望の多い地点"),
         ],
         format_func=lambda x: x[1],
         index=0
@@ -157,12 +207,207 @@ def render_sidebar(accident_data):
     # 統計情報
     st.sidebar.markdown(f"""
     <div style="margin-top: 20px; padding: 10px; background-color: #E8F0FE; border-radius: 8px; color: #1967D2; font-size: 0.9rem; text-align: center;">
-        <b>表示中: {len(filtered_data):,} 件</b> <br>
-        <span style="font-size: 0.8rem; color: #5F6368;">(全体: {len(accident_data):,} 件)</span>
+        <b>表示中: {query_result.summary['count']:,} 件</b> <br>
+        <span style="font-size: 0.8rem; color: #5F6368;">(全体: {len(query_service.data):,} 件)</span>
     </div>
     """, unsafe_allow_html=True)
 
-    return filtered_data, data_view_mode
+    return query_result, data_view_mode, filter_key
+
+
+def render_export_section(filtered_data, filter_key):
+    """フィルタ後の事故データと要望データのエクスポートUIを描画
+
+    ファイルはボタン押下時にチャンク単位で書き出し、同じ条件では再利用する
+    """
+    st.markdown("### データのエクスポート")
+    col1, col2, col3 = st.columns([2, 2, 3])
+    with col1:
+        kind = st.radio(
+            "データ",
+            options=["accidents", "requests"],
+            format_func=lambda k: {"accidents": "事故データ（フィルタ適用後）", "requests": "投稿された要望"}[k]
+        )
+    with col2:
+        fmt = st.radio("形式", options=list(EXPORT_FORMATS.keys()), format_func=lambda f: EXPORT_FORMATS[f][0], horizontal=True)
+
+    with col3:
+        if st.button("エクスポートを作成", use_container_width=True):
+            with st.spinner("エクスポートを作成中..."):
+                if kind == "accidents":
+                    path = export_file(kind, filtered_data, fmt, (get_dataset_version(), filter_key))
+                else:
+                    requests_df = load_requests()
+                    version = (len(requests_df), requests_df['request_id'].iloc[-1] if len(requests_df) else None)
+                    path = export_file(kind, requests_df, fmt, version, lat_col='latitude', lon_col='longitude')
+            st.session_state.export_path = (kind, fmt, str(path))
+
+        export_state = st.session_state.get('export_path')
+        if export_state and export_state[:2] == (kind, fmt) and Path(export_state[2]).exists():
+            with open(export_state[2], 'rb') as f:
+                st.download_button(
+                    "ダウンロード",
+                    data=f,
+                    file_name=export_filename(kind, fmt),
+                    mime=EXPORT_FORMATS[fmt][1],
+                    type="primary",
+                    use_container_width=True
+                )
+
+
+def render_hotspot_table(hotspots):
+    """要望の多い地点の上位を表で表示"""
+    if len(hotspots) == 0:
+        st.info("まだ要望が投稿されていません。")
+        return
+    table = hotspots.head(10).copy()
+    table['thumbnail'] = table['latest_image_path'].map(thumbnail_data_url)
+    st.dataframe(
+        table[['report_count', 'accident_count', 'nearest_accident_m', 'latest_description', 'thumbnail', 'lat', 'lon']].rename(columns={
+            'report_count': '要望件数',
+            'accident_count': '周辺の事故件数',
+            'nearest_accident_m': '最寄り事故(m)',
+            'latest_description': '最新の要望',
+            'thumbnail': '写真',
+            'lat': '緯度',
+            'lon': '経度'
+        }),
+        column_config={'写真': st.column_config.ImageColumn('写真')},
+        hide_index=True,
+        use_container_width=True
+    )
+
+
+def render_bitmap_extent_controls():
+    """サーバー描画の範囲（ズーム）の入力と、描画した範囲の表示
+
+    pydeckは地図上での移動・ズームをアプリに返さないため、描画する範囲は
+    地図中心位置（サイドバー）とここで選ぶズームで決まります。
+    """
+    min_zoom, max_zoom = BITMAP_ZOOM_RANGE
+    st.session_state.zoom = st.slider(
+        "描画範囲のズーム",
+        min_value=min_zoom,
+        max_value=max_zoom,
+        value=int(min(max(st.session_state.zoom, min_zoom), max_zoom))
+    )
+    west, south, east, north = tile_range_bounds(
+        viewport_tile_range(st.session_state.center_lat, st.session_state.center_lon, st.session_state.zoom)
+    )
+    st.caption(
+        f"描画範囲: 緯度 {south:.3f}〜{north:.3f} / 経度 {west:.3f}〜{east:.3f}。"
+        "地図を動かしても描き直されないため、範囲は地図中心位置（サイドバー）とズームで変更してください。"
+    )
+
+
+def render_animation_controls(filtered_data, dataset_version, filter_key):
+    """アニメーションの操作UIを描画し、表示するフレームを返す
+
+    フレームはフィルタキー単位で事前計算・キャッシュ済みのため、
+    再生中の各ステップではフレームの参照とキャッシュ済みDeckの取得のみ行う
+    """
+    col1, col2, col3 = st.columns([2, 5, 1])
+    with col1:
+        bucket = st.radio(
+            "単位",
+            options=list(ANIMATION_BUCKETS.keys()),
+            format_func=lambda b: ANIMATION_BUCKETS[b][0],
+            horizontal=True
+        )
+    frames = get_temporal_frames(dataset_version, filter_key, bucket, filtered_data)
+    n_frames = len(frames)
+    st.session_state.animation_frame %= n_frames
+
+    with col3:
+        label = "停止" if st.session_state.animation_playing else "再生"
+        if st.button(label, use_container_width=True):
+            st.session_state.animation_playing = not st.session_state.animation_playing
+            st.rerun()
+    with col2:
+        if st.session_state.animation_playing:
+            st.progress(
+                (st.session_state.animation_frame + 1) / n_frames,
+                text=format_frame_label(bucket, st.session_state.animation_frame)
+            )
+        else:
+            st.session_state.animation_frame = st.select_slider(
+                "フレーム",
+                options=list(range(n_frames)),
+                value=st.session_state.animation_frame,
+                format_func=lambda f: format_frame_label(bucket, f)
+            )
+
+    frame = st.session_state.animation_frame
+    return frames[frame], filter_key + ('animation', bucket, frame)
+
+
+def render_scenario_controls(model):
+    """シナリオ予測の操作UIを描画し、予測結果を地図表示用の形式で返す
+
+    保存済みモデルでその場で予測するため再学習は行わない（同じシナリオはモデル内のメモから返る）
+    """
+    categories = model.categories
+    quantiles = model.metadata.get('population_quantiles') or {'0.5': 50000}
+    with st.expander("シナリオを指定して予測"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            accident_types = st.multiselect("事故種別", categories['ACCIDENT_TYPE_(CATEGORY)'])
+        with col2:
+            weathers = st.multiselect("天候", categories['WEATHER'])
+        with col3:
+            vehicles = st.multiselect("車両", categories['VEHICLE_1:_BODY_TYPE'])
+        with col4:
+            populations = st.multiselect(
+                "人口",
+                options=sorted(set(quantiles.values())),
+                default=[quantiles.get('0.5', min(quantiles.values()))],
+                format_func=lambda p: f"{p:,.0f}人"
+            )
+
+        n_scenarios = len(accident_types) * len(weathers) * len(vehicles) * len(populations)
+        if n_scenarios == 0:
+            st.caption("事故種別・天候・車両・人口をそれぞれ1つ以上選ぶと、すべての組み合わせを予測して表示します。")
+            return None, None
+        if n_scenarios > PREDICTION_MAX_SCENARIOS:
+            st.warning(f"組み合わせが多すぎます（{n_scenarios:,}件）。{PREDICTION_MAX_SCENARIOS:,}件以下になるよう絞り込んでください。")
+            return None, None
+
+        if model.metadata.get('pending_update'):
+            st.caption(
+                f"予測モデルは最新の元データを反映していません（{model.metadata['pending_update']}）。"
+                "`python dataclean/pipeline.py prediction` で反映できます。"
+            )
+        start = time.perf_counter()
+        predictions = model.predict(make_scenarios(accident_types, weathers, vehicles, populations))
+        st.caption(f"{n_scenarios:,}件のシナリオを予測しました（{(time.perf_counter() - start) * 1000:.0f}ms / モデル {model.version}）")
+
+    scenario_key = (model.version, tuple(accident_types), tuple(weathers), tuple(vehicles), tuple(populations))
+    return prepare_predicted_frame(predictions), scenario_key
+
+
+def render_risk_surface_controls(version):
+    """リスク面の条件選択UIを描画し、選択したシナリオのリスク面を地図表示用の形式で返す
+
+    条件の組み合わせごとのラスタは事前計算済みのため、選択を変えても足し合わせと着色だけで表示できる
+    """
+    surface = get_risk_surface(version)
+    labels = {'ACCIDENT_TYPE_(CATEGORY)': "事故種別", 'WEATHER': "天候"}
+    options = surface.options()
+    with st.expander("リスク面の条件", expanded=True):
+        columns = st.columns(len(surface.conditions))
+        selection = []
+        for column, container in zip(surface.conditions, columns):
+            with container:
+                values = st.multiselect(labels.get(column, column), options[column])
+            selection.append((column, tuple(values)))
+
+        selection_key = tuple(selection)
+        risk_frame, summary = get_risk_surface_frame(version, selection_key, RED_RANGE)
+        st.caption(
+            f"{summary['combinations']}通りの条件の組み合わせ（事故 {summary['count']:,}件 / IMPACT合計 {summary['impact']:,.0f}）"
+            "の IMPACT 重み付き密度を表示しています。条件を選ばない項目はすべての値を含みます。"
+        )
+    return risk_frame, ('risk', version, selection_key)
 
 
 def render_request_form():
@@ -222,7 +467,8 @@ def render_request_form():
                     req_lon,
                     description,
                     address,
-                    image_file
+                    image_file,
+                    rate_limiter=st.session_state.submission_limiter
                 )
 
                 if success:
@@ -230,11 +476,19 @@ def render_request_form():
                     st.balloons()
                 else:
                     st.error(message)
+
+        pipeline_metrics = get_image_pipeline().metrics()
+        if pipeline_metrics['queue_depth'] or pipeline_metrics['failed']:
+            st.caption(f"画像処理待ち: {pipeline_metrics['queue_depth']}件（失敗: {pipeline_metrics['failed']}件）")
+        queue_metrics = get_submission_queue().metrics()
+        if queue_metrics['queue_depth'] or queue_metrics['latency_p95'] is not None:
+            latency = f"{queue_metrics['latency_p95']:.1f}秒" if queue_metrics['latency_p95'] is not None else "-"
+            st.caption(f"反映待ちの要望: {queue_metrics['queue_depth']}件（反映までの時間 p95: {latency}）")
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def render_statistics(accident_data, filtered_data):
-    """統計情報セクションを描画"""
+def render_statistics(total_count, summary):
+    """統計情報セクションを描画（集計はクエリサービスの結果を使う）"""
     st.markdown('<h2 class="main-title"><svg xmlns="http://www.w3.org/2000/svg" width="28" height="28" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" style="display: inline; vertical-align: middle; margin-right: 8px;"><line x1="18" y1="20" x2="18" y2="10"></line><line x1="12" y1="20" x2="12" y2="4"></line><line x1="6" y1="20" x2="6" y2="14"></line></svg>事故統計ダッシュボード</h2>', unsafe_allow_html=True)
     
     # Key Metrics Row
@@ -258,20 +512,18 @@ def render_statistics(accident_data, filtered_data):
     alert_icon = '<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="m21.73 18-8-14a2 2 0 0 0-3.48 0l-8 14A2 2 0 0 0 4 21h16a2 2 0 0 0 1.73-3Z"></path><line x1="12" y1="9" x2="12" y2="13"></line><line x1="12" y1="17" x2="12.01" y2="17"></line></svg>'
 
     with col1:
-        render_metric_card("表示件数", f"{len(filtered_data):,}", file_icon)
+        render_metric_card("表示件数", f"{summary['count']:,}", file_icon)
     with col2:
-        ratio = (len(filtered_data) / len(accident_data)) * 100
+        ratio = (summary['count'] / total_count) * 100
         render_metric_card("表示率", f"{ratio:.1f}%", percent_icon)
     with col3:
-        if 'Area' in filtered_data.columns and not filtered_data.empty:
-            top_area = filtered_data['Area'].mode().iloc[0]
-            render_metric_card("最多事故エリア", top_area, map_icon)
+        if summary['top_area'] is not None:
+            render_metric_card("最多事故エリア", summary['top_area'], map_icon)
         else:
             render_metric_card("最多事故エリア", "-", map_icon)
     with col4:
-        if 'ACCIDENT_TYPE_(CATEGORY)' in filtered_data.columns and not filtered_data.empty:
-            top_type = filtered_data['ACCIDENT_TYPE_(CATEGORY)'].mode().iloc[0]
-            render_metric_card("最多事故種別", top_type, alert_icon)
+        if summary['top_type'] is not None:
+            render_metric_card("最多事故種別", summary['top_type'], alert_icon)
         else:
             render_metric_card("最多事故種別", "-", alert_icon)
 
@@ -283,9 +535,8 @@ def render_statistics(accident_data, filtered_data):
     with col1:
         st.markdown('<div class="css-card">', unsafe_allow_html=True)
         st.markdown('<p class="dashboard-card-title">事故の多い市区町村 (TOP 10)</p>', unsafe_allow_html=True)
-        if 'Area' in filtered_data.columns:
-            city_counts = filtered_data['Area'].value_counts().head(10).reset_index()
-            city_counts.columns = ['市区町村', '件数']
+        if summary['area_counts'] is not None:
+            city_counts = summary['area_counts']
             
             tab_chart, tab_data = st.tabs(["グラフ", "データ"])
             with tab_chart:
@@ -305,9 +556,8 @@ def render_statistics(accident_data, filtered_data):
     with col2:
         st.markdown('<div class="css-card">', unsafe_allow_html=True)
         st.markdown('<p class="dashboard-card-title">事故種類別内訳</p>', unsafe_allow_html=True)
-        if 'ACCIDENT_TYPE_(CATEGORY)' in filtered_data.columns:
-            type_counts = filtered_data['ACCIDENT_TYPE_(CATEGORY)'].value_counts().reset_index()
-            type_counts.columns = ['事故類型', '件数']
+        if summary['type_counts'] is not None:
+            type_counts = summary['type_counts']
             
             tab_chart, tab_data = st.tabs(["グラフ", "データ"])
             with tab_chart:
@@ -326,11 +576,8 @@ def render_statistics(accident_data, filtered_data):
     # Charts Row 2
     st.markdown('<div class="css-card">', unsafe_allow_html=True)
     st.markdown('<p class="dashboard-card-title">時間帯別発生件数</p>', unsafe_allow_html=True)
-    if 'OCCURRENCE_DATE_AND_TIME' in filtered_data.columns:
-        # 時間帯集計
-        hours = filtered_data['OCCURRENCE_DATE_AND_TIME'].dt.hour
-        hour_counts = hours.value_counts().sort_index().reset_index()
-        hour_counts.columns = ['時間', '件数']
+    if summary['hour_counts'] is not None:
+        hour_counts = summary['hour_counts']
         
         tab_chart, tab_data = st.tabs(["グラフ", "データ"])
         with tab_chart:
@@ -360,10 +607,12 @@ def main():
     initialize_session_state()
     st.markdown(get_google_cloud_css(), unsafe_allow_html=True)
 
-    # データ読み込み
+    # データ読み込み（データセット・インデックス・フィルタ結果はプロセス内の全セッションで共有する）
     try:
-        accident_data = load_accident_data()
-        predicted_data = load_predicted_data()
+        query_service = get_query_service(get_dataset_version())
+        accident_data = query_service.data
+        predicted_version = get_file_version(PREDICTED_DATA_FILE)
+        predicted_data = load_predicted_data(predicted_version)
     except Exception as e:
         st.error(f"データの読み込みに失敗しました: {str(e)}")
         return
@@ -403,8 +652,10 @@ def main():
     # サイドバー（共通）
     filtered_data = accident_data
     data_view_mode = "all"
+    filter_key = make_filter_key()
     if selected in ["マップ & フィルタ", "ダッシュボード"]:
-        filtered_data, data_view_mode = render_sidebar(accident_data)
+        query_result, data_view_mode, filter_key = render_sidebar(query_service)
+        filtered_data = query_result.data
     else:
         with st.sidebar:
             st.info("危険地点の報告ページです。地図上の位置を指定して報告してください。")
@@ -430,20 +681,80 @@ def main():
         )
         
         try:
+            dataset_version = get_dataset_version()
+            tile_url = None
+            if data_view_mode == "tiles":
+                # タイル表示はフィルタ適用前の全データをバージョン単位で事前生成したもの
+                ensure_tile_cache(accident_data, dataset_version)
+                tile_server_url = get_tile_server_url()
+                if tile_server_url != TILE_SERVER_URL:
+                    st.warning(
+                        f"ポート {TILE_SERVER_PORT} は別のプログラムが使用中のため、"
+                        f"タイルサーバーを {tile_server_url} で起動しました。"
+                    )
+                tile_url = get_tile_url_template(dataset_version, tile_server_url)
+                st.caption("タイル表示ではフィルタ適用前の全事故データを表示しています。")
+
+            map_data = filtered_data
+            map_predicted = predicted_data
+            map_filter_key = filter_key
+            if data_view_mode == "predicted":
+                # 元データがモデルの学習後に更新されていれば metadata['pending_update'] が付く（追加学習はパイプラインで行う）
+                model = get_location_model(
+                    get_file_version(PREDICTION_MODEL_FILE),
+                    get_file_version(ECONOMIC_IMPACT_POPULATION_FILE)
+                )
+                if model is not None:
+                    scenario_data, scenario_key = render_scenario_controls(model)
+                    if scenario_data is not None:
+                        map_predicted = scenario_data
+                        map_filter_key = (filter_key, 'scenario', scenario_key)
+            elif data_view_mode == "risk":
+                # リスク面はフィルタ適用前の全データから条件の組み合わせごとに事前計算したもの
+                map_data, map_filter_key = render_risk_surface_controls(get_file_version(ECONOMIC_IMPACT_POPULATION_FILE))
+            elif data_view_mode == "animation":
+                map_data, map_filter_key = render_animation_controls(filtered_data, dataset_version, filter_key)
+            elif data_view_mode == "bitmap":
+                render_bitmap_extent_controls()
+            elif data_view_mode in MUNICIPALITY_MODES:
+                population_version = get_file_version(POPULATION_DATA_FILE)
+                map_data = get_municipality_aggregate(
+                    f"{dataset_version}-{population_version}",
+                    filter_key,
+                    MUNICIPALITY_MODES[data_view_mode],
+                    filtered_data,
+                    get_population_index(population_version)
+                )
+                map_filter_key = (filter_key, population_version)
+            elif data_view_mode == "hotspots":
+                map_data, report_version = get_request_hotspots(dataset_version, load_requests(), accident_data)
+                map_filter_key = ('hotspots', report_version)
+                render_hotspot_table(map_data)
+
             deck = render_map(
-                filtered_data,
-                predicted_data,
+                map_data,
+                map_predicted,
                 st.session_state.center_lat,
                 st.session_state.center_lon,
                 st.session_state.zoom,
-                data_view_mode
+                data_view_mode,
+                tile_url=tile_url,
+                # 予測データがパイプラインで再生成された場合も地図を作り直す
+                dataset_version=f"{dataset_version}-{predicted_version}",
+                filter_key=map_filter_key
             )
             st.pydeck_chart(deck)
         except Exception as e:
             st.error(f"地図の表示に失敗しました: {str(e)}")
 
+        if data_view_mode == "animation" and st.session_state.animation_playing:
+            time.sleep(ANIMATION_FRAME_INTERVAL_SEC)
+            st.session_state.animation_frame += 1
+            st.rerun()
+
     elif selected == "ダッシュボード":
-        render_statistics(accident_data, filtered_data)
+        render_statistics(len(accident_data), query_result.summary)
+        render_export_section(filtered_data, filter_key)
 
     elif selected == "危険地点の報告":
         render_request_form()
@@ -0,0 +1,100 @@
+"""エクスポートのベンチマーク
+
+事故データと同じ列構成の合成データ（既定100万行）を、全件をメモリ上に組み立てる方法と
+チャンク単位で書き出す方法（src.export）でそれぞれCSV / Parquet / GeoJSONに出力し、
+所要時間とPythonのメモリ使用量のピーク（tracemalloc）を比較します。
+
+実行方法:
+    python benchmarks/bench_export.py --rows 1000000
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.export import EXPORT_FORMATS, write_export  # noqa: E402
+
+
+def make_accidents(rows: int) -> pd.DataFrame:
+    """事故データと同じ列構成の合成データを作成"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'OCCURRENCE_DATE_AND_TIME': pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 60, rows), unit='min'),
+        'WEATHER': rng.choice(['晴れ', '曇', '雨', '雪'], rows),
+        'LOCATION': rng.choice([f'地点{i}' for i in range(5000)], rows),
+        'LATITUDE': rng.uniform(31.0, 43.0, rows).round(5),
+        'LONGITUDE': rng.uniform(130.0, 145.0, rows).round(5),
+        'ACCIDENT_TYPE_(CATEGORY)': rng.choice(['追突', '出会い頭', '車両故障', '健康起因'], rows),
+        'ROAD_TYPE': rng.choice(['道路(一般道)', '道路(高速自動車国道)'], rows),
+        'SPEED_LIMIT_ON_ROAD': rng.choice([40.0, 50.0, 60.0, 80.0, 100.0], rows),
+        'Area': rng.choice([f'市区町村{i}' for i in range(1700)], rows),
+    })
+
+
+def export_in_memory(df: pd.DataFrame, fmt: str, path: Path) -> None:
+    """比較用: 全件をメモリ上に組み立ててから書き出す"""
+    if fmt == 'csv':
+        data = df.to_csv(index=False).encode('utf-8-sig')
+    elif fmt == 'parquet':
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        data = buffer.getvalue()
+    else:
+        properties = json.loads(df.drop(columns=['LATITUDE', 'LONGITUDE']).to_json(orient='records', date_format='iso', force_ascii=False))
+        features = [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]}, 'properties': props}
+            for lon, lat, props in zip(df['LONGITUDE'], df['LATITUDE'], properties)
+        ]
+        data = json.dumps({'type': 'FeatureCollection', 'features': features}, ensure_ascii=False).encode('utf-8')
+    path.write_bytes(data)
+
+
+def measure(func) -> tuple[float, float]:
+    """所要時間（秒）とメモリ使用量のピーク（MB）を計測
+
+    tracemalloc は割り当てのたびに記録するため遅くなるので、時間は別の実行で計測する
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エクスポートのベンチマーク")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_accidents(args.rows)
+    print(f"データ: {len(df):,}行")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in EXPORT_FORMATS:
+            path = Path(tmp) / f"export{EXPORT_FORMATS[fmt][2]}"
+            naive_time, naive_peak = measure(lambda: export_in_memory(df, fmt, path))
+            chunk_time, chunk_peak = measure(lambda: write_export(df, fmt, path, 'LATITUDE', 'LONGITUDE'))
+            size_mb = path.stat().st_size / 1024 / 1024
+            print(f"{EXPORT_FORMATS[fmt][0]:8s} ({size_mb:,.0f}MB): "
+                  f"一括 {naive_time:6.2f}秒 / ピーク {naive_peak:7.1f}MB, "
+                  f"チャンク {chunk_time:6.2f}秒 / ピーク {chunk_peak:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
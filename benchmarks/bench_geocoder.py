@@ -0,0 +1,130 @@
+"""ジオコーダのベンチマーク（ローカルのスタブAPIサーバーを使用）
+
+国土地理院 住所検索APIと同じ形式で応答するスタブサーバーを起動し、
+1件ずつ間隔をあけて問い合わせる従来の方式と、並列・レート制限付きの Geocoder を比較します。
+スタブは一定の割合で503を返すため、再試行が働くことも確認できます。
+最後に途中で中断した場合を想定し、キャッシュから再開して問い合わせが残りの住所だけになることを確認します。
+
+実行方法:
+    python benchmarks/bench_geocoder.py --addresses 200 --latency 0.1
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.geocoder import GeocodeCache, Geocoder, GsiEndpoint  # noqa: E402
+
+
+def start_stub_server(latency: float, error_rate: float) -> tuple[ThreadingHTTPServer, dict]:
+    """住所検索APIのスタブを起動"""
+    counts = {'requests': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get('q', [''])[0]
+            time.sleep(latency)
+            with lock:
+                counts['requests'] += 1
+                fail = random.random() < error_rate
+                if fail:
+                    counts['errors'] += 1
+            if fail:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if query.endswith('不明'):
+                body = []
+            else:
+                seed = sum(map(ord, query))
+                body = [{
+                    'geometry': {'type': 'Point', 'coordinates': [130 + seed % 1000 / 100, 33 + seed % 700 / 100]},
+                    'properties': {'title': query}
+                }]
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def serial_baseline(endpoint: GsiEndpoint, addresses: list[str], sleep_sec: float) -> float:
+    """従来の方式（1件ずつ問い合わせて sleep_sec 待つ）"""
+    start = time.perf_counter()
+    for address in addresses:
+        try:
+            endpoint(address)
+        except OSError:
+            pass
+        time.sleep(sleep_sec)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--addresses', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1, help="スタブの応答時間（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, counts = start_stub_server(args.latency, args.error_rate)
+    endpoint = GsiEndpoint(f"http://127.0.0.1:{server.server_port}/address-search/AddressSearch")
+    # 表記揺れ（全角・空白）と重複、該当なしの住所を含める
+    addresses = [f"東京都 テスト市{i}" for i in range(args.addresses)]
+    addresses += [f"東京都　テスト市{i}" for i in range(0, args.addresses, 10)]
+    addresses += ["東京都 不明"]
+
+    baseline = serial_baseline(endpoint, addresses[:20], 0.3)
+    print(f"従来（逐次 + 0.3秒間隔）: {baseline / 20 * len(addresses):6.1f}秒（20件から推定）")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = Path(tmp) / 'geocode_cache.jsonl'
+
+        # 途中で中断した状態を作る（前半だけ取得）
+        half = Geocoder(endpoint, GeocodeCache(cache_file), workers=args.workers, rate_per_sec=args.rate)
+        half.geocode_many(addresses[:args.addresses // 2])
+
+        counts['requests'] = 0
+        geocoder = Geocoder(endpoint, GeocodeCache(cache_file), workers=args.workers, rate_per_sec=args.rate)
+        start = time.perf_counter()
+        result = geocoder.geocode_many(addresses)
+        elapsed = time.perf_counter() - start
+        metrics = geocoder.metrics()
+        print(f"Geocoder（再開）: {elapsed:6.1f}秒 / スタブへのリクエスト {counts['requests']:,}件")
+        print(f"  {metrics}")
+
+        found = sum(1 for c in result.values() if c)
+        print(f"  座標あり {found:,} / 住所 {len(result):,}（ユニーク {args.addresses + 1:,}）")
+        assert result["東京都 不明"] is None
+        assert result["東京都　テスト市0"] == result["東京都 テスト市0"]
+
+        reloaded = GeocodeCache(cache_file)
+        print(f"  キャッシュ件数: {len(reloaded):,}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
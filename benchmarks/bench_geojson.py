@@ -0,0 +1,88 @@
+"""GeoJSON読み込みのベンチマーク
+
+docs/geo.json のスキーマの合成データ（既定100万Feature）を書き出し、
+json.load で文書全体を読み込んでからDataFrameにする方法と、
+src.geojson_io のストリーミング読み込みを比較します（所要時間とtracemallocのピーク）。
+
+実行方法:
+    python benchmarks/bench_geojson.py --features 1000000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.geojson_io import GEOJSON_PROPERTY_COLUMNS, read_geojson, write_accident_geojson  # noqa: E402
+
+
+def make_accidents(rows: int) -> pd.DataFrame:
+    """docs/geo.json の項目を持つ合成データを作成"""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'ACCIDENT_ID': [f'A{i:07d}' for i in range(rows)],
+        'OCCURRENCE_DATE_AND_TIME': pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 60, rows), unit='min'),
+        'WEATHER': rng.choice(['晴れ', '曇り', '雨', '雪'], rows),
+        'ACCIDENT_TYPE_(CATEGORY)': rng.choice(['追突', '出会い頭', 'スリップ事故', '歩行者事故'], rows),
+        'PREFECTURE': rng.choice(['東京都', '神奈川県', '北海道', '大阪府'], rows),
+        'Area': rng.choice([f'市区町村{i}' for i in range(1700)], rows),
+        'ROAD_TYPE': rng.choice(['国道', '県道', '市道'], rows),
+        'LATITUDE': rng.uniform(31.0, 43.0, rows).round(6),
+        'LONGITUDE': rng.uniform(130.0, 145.0, rows).round(6),
+    })
+
+
+def read_with_json_load(path: Path) -> pd.DataFrame:
+    """比較用: 文書全体をjson.loadしてからDataFrameにする"""
+    with open(path, encoding='utf-8') as f:
+        features = json.load(f)['features']
+    df = pd.DataFrame.from_records([feature['properties'] for feature in features]).rename(columns=GEOJSON_PROPERTY_COLUMNS)
+    df['LONGITUDE'] = [feature['geometry']['coordinates'][0] for feature in features]
+    df['LATITUDE'] = [feature['geometry']['coordinates'][1] for feature in features]
+    return df
+
+
+def measure(func) -> tuple[float, float, int]:
+    """所要時間（秒）・tracemallocのピーク（MB）・件数を計測（時間は計測オーバーヘッドのない別の実行で測る）"""
+    start = time.perf_counter()
+    rows = len(func())
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GeoJSON読み込みのベンチマーク")
+    parser.add_argument('--features', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "accidents.geojson"
+        df = make_accidents(args.features)
+        start = time.perf_counter()
+        with open(path, 'wb') as f:
+            write_accident_geojson(df, f)
+        print(f"書き出し: {args.features:,}件 / {path.stat().st_size / 1024 / 1024:,.0f}MB ({time.perf_counter() - start:.2f}秒)")
+        del df
+
+        for label, func in (("json.load", lambda: read_with_json_load(path)), ("ストリーミング", lambda: read_geojson(path))):
+            elapsed, peak, rows = measure(func)
+            print(f"{label:10s}: {elapsed:6.2f}秒, ピーク {peak:8.1f}MB ({rows:,}件)")
+
+
+if __name__ == "__main__":
+    main()
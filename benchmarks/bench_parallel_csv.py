@@ -0,0 +1,80 @@
+"""大きなCSVの並列変換ベンチマーク
+
+output_population.csv を複製して大きな人口データCSVを作り、市町村抽出を
+（1）従来どおり全体を読み込んで行ごとに apply する場合と、（2）transform_csv で
+チャンクごとに列単位の変換をする場合（プロセス数を変えて）で比較し、出力が一致することを確認します。
+プロセス数を増やしたときの速度向上はCPUコア数が上限です。
+
+実行方法:
+    python benchmarks/bench_parallel_csv.py --copies 50 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'dataclean'))
+
+from config import POPULATION_DATA_FILE  # noqa: E402
+from extract_municipality import add_municipality_column  # noqa: E402
+from src.parallel_csv import transform_csv  # noqa: E402
+
+
+def extract_municipality(region_text):
+    """地域から市町村を抜き出す（従来の行ごとの処理）"""
+    if pd.isna(region_text):
+        return None
+    parts = region_text.split(' ', 1)
+    return parts[1] if len(parts) > 1 else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--copies', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-mb', type=int, default=16)
+    args = parser.parse_args()
+
+    population = pd.read_csv(POPULATION_DATA_FILE, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    population = population.drop(columns=['市町村'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / 'input.csv'
+        pd.concat([population] * args.copies, ignore_index=True).to_csv(source, index=False, encoding='utf-8-sig')
+        size_mb = source.stat().st_size / 1e6
+        print(f"入力: {len(population) * args.copies:,}行 / {size_mb:.1f}MB（CPUコア数 {os.cpu_count()}）")
+
+        start = time.perf_counter()
+        df = pd.read_csv(source, encoding='utf-8-sig')
+        df['市町村'] = df['地域'].apply(extract_municipality)
+        df.to_csv(tmp / 'apply.csv', index=False, encoding='utf-8-sig')
+        elapsed = time.perf_counter() - start
+        print(f"全体読み込み + apply      : {elapsed:6.2f}秒（{size_mb / elapsed:6.1f}MB/秒）")
+        expected = df['市町村'].fillna('').astype(str)
+        del df
+
+        for workers in args.workers:
+            output = tmp / f'parallel_{workers}.csv'
+            metrics = transform_csv(
+                source, output, add_municipality_column,
+                workers=workers, chunk_bytes=args.chunk_mb * 1024 * 1024
+            )
+            result = pd.read_csv(output, encoding='utf-8-sig', dtype=str, keep_default_na=False, usecols=['市町村'])
+            same = (result['市町村'] == expected).all()
+            print(
+                f"transform_csv {workers}プロセス    : {metrics['seconds']:6.2f}秒（{metrics['mb_per_sec']:6.1f}MB/秒, "
+                f"{metrics['rows_per_sec']:,.0f}行/秒, {metrics['chunks']}チャンク） 一致: {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""事故データと人口データの結合ベンチマーク
+
+economic_impact.csv を複製して行数を増やし、join_population（一意なAreaごとに照合して
+コードで展開）と、行ごとに名前を照合する場合の処理時間を比較します。
+行数を10倍にしたときに処理時間がほぼ10倍（線形）になることも確認します。
+
+実行方法:
+    python benchmarks/bench_population_join.py --max-copies 100
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ECONOMIC_IMPACT_FILE, POPULATION_DATA_FILE  # noqa: E402
+from src.population_join import PopulationIndex, join_population, prepare_population  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-copies', type=int, default=100)
+    args = parser.parse_args()
+
+    economic = pd.read_csv(ECONOMIC_IMPACT_FILE, encoding='utf-8-sig')
+    population = prepare_population(pd.read_csv(POPULATION_DATA_FILE, encoding='utf-8-sig'))
+
+    copies = 1
+    while copies <= args.max_copies:
+        df = pd.concat([economic] * copies, ignore_index=True)
+        start = time.perf_counter()
+        joined, report = join_population(df, population)
+        elapsed = time.perf_counter() - start
+
+        line = f"{len(df):>10,}行: join_population {elapsed:6.2f}秒"
+        if copies <= 10:
+            start = time.perf_counter()
+            index = PopulationIndex(population)
+            rowwise = [index.match(area)[1] if isinstance(area, str) else [] for area in df['Area']]
+            line += f" / 行ごとの照合 {time.perf_counter() - start:6.2f}秒"
+            # 候補が1つに決まる行は同じ人口になる
+            unique = np.array([len(candidates) == 1 for candidates in rowwise])
+            expected = [index.populations[candidates[0]] for candidates, ok in zip(rowwise, unique) if ok]
+            assert np.array_equal(np.array(expected), joined['POPULATION'].astype(float).to_numpy()[unique], equal_nan=True)
+        print(f"{line}  （照合率 {report['matched_rows'] / report['rows']:.1%}）")
+        copies *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""事故地点予測モデルの学習モード比較ベンチマーク
+
+economic_impact_population.csv で separate（緯度・経度・IMPACTを別々のモデル）と
+multi_output（1つのモデル）を学習し、学習時間・最大メモリ使用量・保存サイズ・評価データでのMAEを比較します。
+最大メモリ使用量を正しく測るため、学習モードごとに別プロセスで実行します。
+
+実行方法:
+    python benchmarks/bench_prediction_training.py --n-jobs -1
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ECONOMIC_IMPACT_POPULATION_FILE  # noqa: E402
+from src.prediction import TRAINING_MODES, train_location_model  # noqa: E402
+
+
+def run_mode(mode: str, n_jobs: int) -> dict:
+    """1つの学習モードを実行して結果を返す（子プロセスで呼ばれる）"""
+    df = pd.read_csv(ECONOMIC_IMPACT_POPULATION_FILE)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    model, metrics = train_location_model(df, mode=mode, n_jobs=n_jobs)
+    elapsed = time.perf_counter() - start
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=3)
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'train_peak_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024,
+        'model_mb': buffer.tell() / 1e6,
+        'mae': metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--run-mode', choices=TRAINING_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        print(json.dumps(run_mode(args.run_mode, args.n_jobs)))
+        return
+
+    print(f"{'モード':<14}{'学習時間':>10}{'最大メモリ':>12}{'(学習分)':>10}{'保存サイズ':>12}"
+          f"{'緯度MAE(km)':>14}{'経度MAE(km)':>14}{'IMPACT MAE':>12}")
+    for mode in TRAINING_MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--run-mode', mode, '--n-jobs', str(args.n_jobs)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        mae = result['mae']
+        print(
+            f"{mode:<14}{result['seconds']:>9.2f}秒{result['peak_mb']:>10.0f}MB{result['train_peak_mb']:>8.0f}MB"
+            f"{result['model_mb']:>10.1f}MB{mae['LATITUDE'] * 111:>14.2f}{mae['LONGITUDE'] * 111:>14.2f}"
+            f"{mae['IMPACT']:>12.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
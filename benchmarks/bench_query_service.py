@@ -0,0 +1,97 @@
+"""共有クエリサービスのベンチマーク
+
+複数のセッション（スレッド）が同時にフィルタ条件を送る状況を再現し、従来の方式
+（再実行ごとに load_accident_data のキャッシュからデータを受け取り、apply_filters と集計を実行）と
+共有クエリサービス（get_query_service）の応答時間・スループットを比較します。
+フィルタ条件はセッション間で重なるよう、一定数の候補から選びます。
+
+実行方法:
+    python benchmarks/bench_query_service.py --sessions 8 --queries 50 --distinct 40
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.data_loader import get_dataset_version, load_accident_data  # noqa: E402
+from src.filters import apply_filters  # noqa: E402
+from src.query_service import QueryService, summarize  # noqa: E402
+
+
+def make_filter_params(options: dict, n: int, seed: int = 0) -> list[dict]:
+    """フィルタ条件の候補を作成"""
+    rng = random.Random(seed)
+    params = []
+    for _ in range(n):
+        params.append(dict(
+            year=rng.choice([None] + options['years']),
+            month=rng.choice([None, None] + options['months']),
+            hour_range=rng.choice([None, (0, 6), (6, 12), (12, 18), (18, 24)]),
+            accident_types=rng.sample(options['accident_types'], rng.choice([0, 1, 2])) or None,
+            weather_conditions=rng.sample(options['weather'], rng.choice([0, 1])) or None,
+            areas=rng.sample(options['areas'], rng.choice([0, 0, 3])) or None
+        ))
+    return params
+
+
+def run_sessions(handler, candidates: list[dict], sessions: int, queries: int) -> tuple[np.ndarray, float]:
+    """sessions 個のスレッドからそれぞれ queries 件のクエリを送り、(応答時間の配列, 全体の秒数) を返す"""
+    def session(index: int) -> list[float]:
+        rng = random.Random(index)
+        latencies = []
+        for _ in range(queries):
+            params = rng.choice(candidates)
+            start = time.perf_counter()
+            handler(params)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        latencies = [latency for result in executor.map(session, range(sessions)) for latency in result]
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=50, help="セッションごとのクエリ数")
+    parser.add_argument('--distinct', type=int, default=40, help="フィルタ条件の候補数")
+    args = parser.parse_args()
+
+    version = get_dataset_version()
+    load_accident_data(version)
+    start = time.perf_counter()
+    service = QueryService(load_accident_data(version), version)
+    print(f"サービスの起動（データ読み込み・インデックス作成）: {time.perf_counter() - start:.2f}秒")
+    candidates = make_filter_params(service.filter_options, args.distinct)
+
+    def per_session(params: dict) -> None:
+        # 従来の方式: 再実行ごとにキャッシュからデータのコピーを受け取り、フィルタ・集計する
+        summarize(apply_filters(load_accident_data(version), **params))
+
+    def shared(params: dict) -> None:
+        service.query(**params)
+
+    print(f"\n{args.sessions}セッション × {args.queries}クエリ（条件の候補 {args.distinct}件）")
+    print(f"{'方式':<22}{'p50':>10}{'p95':>10}{'スループット':>16}")
+    for name, handler in [('セッションごと', per_session), ('共有クエリサービス', shared)]:
+        latencies, elapsed = run_sessions(handler, candidates, args.sessions, args.queries)
+        print(
+            f"{name:<22}{np.percentile(latencies, 50) * 1000:>8.1f}ms{np.percentile(latencies, 95) * 1000:>8.1f}ms"
+            f"{len(latencies) / elapsed:>12.0f}件/秒"
+        )
+    print(f"\nサービスの統計: {service.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""要望ストアの同時追記ベンチマーク
+
+複数プロセス・複数スレッドから要望を同時に追記し、所要時間と欠損がないことを確認します。
+コンパクションも途中で発生するよう、しきい値を小さくして実行します。
+
+実行方法:
+    python benchmarks/bench_request_log.py --submissions 10000 --processes 8
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.request_store import JsonlRequestStore  # noqa: E402
+
+
+def make_store(work_dir: Path, compact_bytes: int, fsync: bool) -> JsonlRequestStore:
+    return JsonlRequestStore(
+        log_file=work_dir / "requests.jsonl",
+        snapshot_file=work_dir / "requests.parquet",
+        legacy_csv_file=work_dir / "requests.csv",
+        compact_bytes=compact_bytes,
+        fsync=fsync
+    )
+
+
+def submit_batch(work_dir: str, count: int, threads: int, compact_bytes: int, fsync: bool) -> list[str]:
+    """1プロセス分の投稿をスレッドから並行に追記"""
+    store = make_store(Path(work_dir), compact_bytes, fsync)
+
+    def submit(_):
+        request_id = f"req_{uuid.uuid4().hex}"
+        store.append({
+            'request_id': request_id,
+            'timestamp': datetime.now().isoformat(),
+            'latitude': 35.68,
+            'longitude': 139.76,
+            'description': '見通しの悪い交差点です',
+            'address': '',
+            'image_path': ''
+        })
+        return request_id
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(submit, range(count)))
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="要望ストア同時追記ベンチマーク")
+    parser.add_argument('--submissions', type=int, default=10_000)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--compact-bytes', type=int, default=256 * 1024)
+    parser.add_argument('--no-fsync', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        per_process = [args.submissions // args.processes] * args.processes
+        per_process[0] += args.submissions - sum(per_process)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            futures = [
+                pool.submit(submit_batch, work_dir, n, args.threads, args.compact_bytes, not args.no_fsync)
+                for n in per_process
+            ]
+            submitted = {rid for f in futures for rid in f.result()}
+        elapsed = time.perf_counter() - start
+
+        store = make_store(Path(work_dir), args.compact_bytes, not args.no_fsync)
+        start = time.perf_counter()
+        loaded = store.load()
+        read_elapsed = time.perf_counter() - start
+
+        missing = submitted - set(loaded['request_id'])
+        print(f"投稿数: {len(submitted):,}件 ({args.processes}プロセス × {args.threads}スレッド)")
+        print(f"追記: {elapsed:.2f}秒 ({len(submitted) / elapsed:,.0f}件/秒)")
+        print(f"読み込み: {read_elapsed * 1000:.0f}ms ({len(loaded):,}件)")
+        print(f"欠損: {len(missing)}件")
+        if missing:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
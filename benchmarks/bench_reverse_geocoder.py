@@ -0,0 +1,64 @@
+"""逆ジオコーディング（最寄りの市区町村代表点）のベンチマーク
+
+市区町村代表点の周辺に散らばる点を生成し、MunicipalityLocator の問い合わせ速度（初回は候補表の
+作成を含む）と、全代表点との総当たりの結果が一致することを確認します。
+
+実行方法:
+    python benchmarks/bench_reverse_geocoder.py --points 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import POPULATION_DATA_FILE, POPULATION_COLUMN  # noqa: E402
+from src.reverse_geocoder import MunicipalityLocator  # noqa: E402
+from src.spatial import lonlat_to_xyz  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--check', type=int, default=20000, help="総当たりと照合する点数")
+    args = parser.parse_args()
+
+    centroids = pd.read_csv(POPULATION_DATA_FILE, encoding='utf-8-sig', usecols=['市町村', 'lat', 'lon', POPULATION_COLUMN])
+    centroids = centroids.dropna(subset=['市町村', 'lat', 'lon']).drop_duplicates(subset=['市町村'])
+    lat0, lon0 = centroids['lat'].to_numpy(), centroids['lon'].to_numpy()
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, len(centroids), args.points)
+    lat = lat0[base] + rng.normal(0, 0.1, args.points)
+    lon = lon0[base] + rng.normal(0, 0.1, args.points)
+
+    start = time.perf_counter()
+    locator = MunicipalityLocator(lat0, lon0)
+    print(f"代表点 {len(locator):,}件 / 初期化 {time.perf_counter() - start:.3f}秒")
+
+    for label in ("初回（候補表の作成を含む）", "2回目"):
+        start = time.perf_counter()
+        indices, distances = locator.query(lat, lon)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {args.points:,}点 {elapsed:.2f}秒（{args.points / elapsed / 1e6:.2f}百万点/秒）")
+
+    sample = rng.choice(args.points, min(args.check, args.points), replace=False)
+    xyz = lonlat_to_xyz(lat[sample], lon[sample])
+    start = time.perf_counter()
+    brute = np.linalg.norm(xyz[:, None, :] - locator._xyz[None, :, :], axis=2)
+    elapsed = time.perf_counter() - start
+    nearest = brute.argmin(axis=1)
+    # 同じ座標の代表点が複数ある場合は番号が異なっても距離は同じ
+    same = (nearest == indices[sample]) | np.isclose(brute[np.arange(len(sample)), indices[sample]], brute.min(axis=1))
+    print(f"総当たり: {len(sample):,}点 {elapsed:.2f}秒 / 一致率 {same.mean():.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""事故リスク面のベンチマーク
+
+economic_impact_population.csv で条件の組み合わせごとのラスタの計算・保存・読み込みの時間と保存サイズ、
+シナリオ（条件の選び方）ごとの重ね合わせ・PNG化の時間を計測します。
+量子化による誤差として、全組み合わせの密度の合計と IMPACT 合計の差も表示します。
+
+実行方法:
+    python benchmarks/bench_risk_surface.py --repeat 20
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ECONOMIC_IMPACT_POPULATION_FILE  # noqa: E402
+from src.map_components import RED_RANGE  # noqa: E402
+from src.risk_surface import build_risk_surface, load_risk_surface, save_risk_surface  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    df = pd.read_csv(ECONOMIC_IMPACT_POPULATION_FILE)
+    start = time.perf_counter()
+    surface = build_risk_surface(df)
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'risk_surface.npz'
+        start = time.perf_counter()
+        save_risk_surface(surface, path)
+        save_seconds = time.perf_counter() - start
+        size_mb = path.stat().st_size / 1e6
+        start = time.perf_counter()
+        surface = load_risk_surface(path)
+        load_seconds = time.perf_counter() - start
+
+    height, width = surface.shape
+    print(f"組み合わせ: {len(surface.keys)}通り × {width}×{height}セル（非圧縮 {surface.rasters.nbytes / 1e6:.1f}MB）")
+    print(f"計算 {build_seconds:.2f}秒 / 保存 {save_seconds:.2f}秒（{size_mb:.2f}MB） / 読み込み {load_seconds:.3f}秒")
+    total = float(surface.density().sum())
+    impact = float(surface.keys['impact'].sum())
+    print(f"密度の合計 {total:,.1f} / IMPACT合計 {impact:,.1f}（相対誤差 {abs(total - impact) / impact:.2e}）")
+
+    options = surface.options()
+    type_column, weather_column = surface.conditions[:2]
+    scenarios = {
+        'すべて': {},
+        '天候1つ': {weather_column: options[weather_column][:1]},
+        '種別3つ×天候2つ': {type_column: options[type_column][:3], weather_column: options[weather_column][:2]},
+    }
+    print(f"\n{'シナリオ':<16}{'組み合わせ':>10}{'重ね合わせ':>12}{'PNG込み':>12}{'PNGサイズ':>12}")
+    for name, selection in scenarios.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            surface.density(selection)
+        density_ms = (time.perf_counter() - start) / args.repeat * 1000
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            image, _ = surface.render(selection, RED_RANGE)
+        render_ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{name:<16}{len(surface.select(selection)):>10}{density_ms:>10.1f}ms{render_ms:>10.1f}ms{len(image) / 1e3:>10.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""投稿キューのバーストベンチマーク
+
+多数のスレッドから同時に投稿し、投稿1件あたりの応答時間（キューへの書き込み）と
+要望ストアへ直接追記した場合を比較します。あわせて、すべての投稿がストアに
+反映されたこと（欠損・重複がないこと）と、投稿から反映までの待ち時間を確認します。
+
+実行方法:
+    python benchmarks/bench_submission_queue.py --submissions 5000 --threads 32
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.request_store import JsonlRequestStore  # noqa: E402
+from src.submission_queue import SubmissionQueue  # noqa: E402
+
+
+def make_record() -> dict:
+    return {
+        'request_id': f"req_{uuid.uuid4().hex}",
+        'timestamp': datetime.now().isoformat(),
+        'latitude': 35.68,
+        'longitude': 139.76,
+        'description': '見通しの悪い交差点です',
+        'address': '',
+        'image_path': ''
+    }
+
+
+def burst(submit, submissions: int, threads: int) -> np.ndarray:
+    """submitを同時に呼び出し、1件ごとの応答時間（秒）を返す"""
+    def timed(_):
+        start = time.perf_counter()
+        submit(make_record())
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return np.array(list(executor.map(timed, range(submissions))))
+
+
+def report(label: str, latencies: np.ndarray, elapsed: float) -> None:
+    print(f"{label}: 合計 {elapsed:.2f}秒, 応答時間 p50 {np.percentile(latencies, 50) * 1000:.2f}ms, "
+          f"p95 {np.percentile(latencies, 95) * 1000:.2f}ms, max {latencies.max() * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="投稿キューのバーストベンチマーク")
+    parser.add_argument('--submissions', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+
+        direct_store = JsonlRequestStore(work_dir / "direct.jsonl", work_dir / "direct.parquet", work_dir / "none.csv")
+        start = time.perf_counter()
+        latencies = burst(direct_store.append, args.submissions, args.threads)
+        report("ストアへ直接追記", latencies, time.perf_counter() - start)
+
+        store = JsonlRequestStore(work_dir / "queued.jsonl", work_dir / "queued.parquet", work_dir / "none.csv")
+        queue = SubmissionQueue(work_dir / "spool", store=store, max_pending=args.submissions + 1)
+        queue.start()
+        start = time.perf_counter()
+        latencies = burst(queue.enqueue, args.submissions, args.threads)
+        report("投稿キュー", latencies, time.perf_counter() - start)
+
+        while queue.pending():
+            time.sleep(0.1)
+        queue.drain()
+        metrics = queue.metrics()
+        stored = store.load()
+        print(f"反映件数: {len(stored):,} / {args.submissions:,}（重複なし: {stored['request_id'].is_unique}）")
+        print(f"バッチ数: {metrics['batches']:,}, 反映までの時間 p50 {metrics['latency_p50']:.2f}秒, p95 {metrics['latency_p95']:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""時系列アニメーションのフレーム計算ベンチマーク
+
+合成した事故データ（デフォルト100万件）で build_temporal_frames の所要時間を計測します。
+
+実行方法:
+    python benchmarks/bench_temporal_frames.py --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.animation import ANIMATION_BUCKETS, build_temporal_frames  # noqa: E402
+
+
+def make_synthetic_accidents(rows: int, seed: int = 42) -> pd.DataFrame:
+    """日本付近に分布する合成事故データを作成"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2019-01-01T00:00')
+    minutes = rng.integers(0, 5 * 365 * 24 * 60, rows)
+    return pd.DataFrame({
+        'OCCURRENCE_DATE_AND_TIME': pd.to_datetime(start + minutes.astype('timedelta64[m]')),
+        'LATITUDE': rng.uniform(31.0, 45.0, rows),
+        'LONGITUDE': rng.uniform(129.0, 146.0, rows)
+    })
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="フレーム計算ベンチマーク")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_synthetic_accidents(args.rows)
+    print(f"データ件数: {len(df):,}件")
+
+    for bucket in ANIMATION_BUCKETS:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            frames = build_temporal_frames(df, bucket)
+            timings.append(time.perf_counter() - start)
+        cells = sum(len(f) for f in frames.values())
+        print(f"{bucket:>6}: {len(frames)}フレーム / {cells:,}セル  "
+              f"最短 {min(timings) * 1000:.0f}ms  平均 {np.mean(timings) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Area / LOCATION 正規化のベンチマーク
+
+data.csv を複製して行数を増やし、normalize_places（一意な文字列ごとに解析してコードで展開）と、
+行ごとに解析する場合の処理時間を比較します。異なる値の数は変わらないため、
+normalize_places の処理時間は行数を増やしてもほとんど増えないことを確認します。
+
+実行方法:
+    python benchmarks/bench_text_normalize.py --max-copies 100
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ACCIDENT_DATA_FILE  # noqa: E402
+from src.text_normalize import normalize_places, parse_area, parse_location  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-copies', type=int, default=100)
+    args = parser.parse_args()
+
+    accidents = pd.read_csv(ACCIDENT_DATA_FILE, usecols=['Area', 'LOCATION'])
+    print(f"異なる値: Area {accidents['Area'].nunique():,} / LOCATION {accidents['LOCATION'].nunique():,}")
+
+    copies = 1
+    while copies <= args.max_copies:
+        df = pd.concat([accidents] * copies, ignore_index=True)
+        # 初回の解析結果が残らないよう、メモを空にしてから測る
+        parse_area.cache_clear()
+        parse_location.cache_clear()
+        start = time.perf_counter()
+        places = normalize_places(df)
+        elapsed = time.perf_counter() - start
+
+        line = f"{len(df):>10,}行: normalize_places {elapsed:6.2f}秒"
+        if copies <= 10:
+            start = time.perf_counter()
+            rowwise = [
+                parse_area.__wrapped__(value)[0] if isinstance(value, str) else None
+                for value in df['Area']
+            ]
+            for value in df['LOCATION']:
+                if isinstance(value, str):
+                    parse_location.__wrapped__(value)
+            line += f" / 行ごとの解析 {time.perf_counter() - start:6.2f}秒"
+            assert pd.Series(rowwise).equals(pd.Series(places['Area'].to_numpy()))
+        print(line)
+        copies *= 10
+
+
+if __name__ == "__main__":
+    main()
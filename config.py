@@ -9,25 +9,92 @@ DATA_DIR = PROJECT_ROOT / "data"
 ACCIDENT_DATA_DIR = DATA_DIR / "accidents"
 REQUESTS_DATA_DIR = DATA_DIR / "requests"
 REQUESTS_IMAGES_DIR = REQUESTS_DATA_DIR / "images"
+REQUESTS_THUMBNAILS_DIR = REQUESTS_IMAGES_DIR / "thumbnails"
 
 # データファイル
 ACCIDENT_DATA_FILE = ACCIDENT_DATA_DIR / "data.csv"
 PREDICTED_DATA_FILE = ACCIDENT_DATA_DIR / "predicted_locations_score.csv"
-REQUESTS_CSV_FILE = REQUESTS_DATA_DIR / "requests.csv"
+POPULATION_DATA_FILE = ACCIDENT_DATA_DIR / "output_population.csv"
+ECONOMIC_IMPACT_FILE = ACCIDENT_DATA_DIR / "economic_impact.csv"
+ECONOMIC_IMPACT_POPULATION_FILE = ACCIDENT_DATA_DIR / "economic_impact_population.csv"
+POPULATION_COLUMN = "A6103_流出人口（県内他市区町村で従業・通学している人口）【人】"
+REQUESTS_CSV_FILE = REQUESTS_DATA_DIR / "requests.csv"  # 旧形式（読み込みのみ）
+REQUESTS_LOG_FILE = REQUESTS_DATA_DIR / "requests.jsonl"  # 追記専用ログ
+REQUESTS_SNAPSHOT_FILE = REQUESTS_DATA_DIR / "requests.parquet"  # コンパクション済みスナップショット
+REQUESTS_DB_FILE = REQUESTS_DATA_DIR / "requests.sqlite3"  # SQLiteバックエンド
+REQUESTS_SPOOL_DIR = REQUESTS_DATA_DIR / "spool"  # 投稿キュー（反映待ちの要望）
 
 # アプリケーション設定
 DEFAULT_CENTER_LAT = 35.68  # 東京
 DEFAULT_CENTER_LON = 139.76
 DEFAULT_ZOOM = 5
 
+# 要望ストア設定
+REQUEST_STORE_BACKEND = "jsonl"  # "jsonl"（追記ログ）または "sqlite"（WAL + R*Tree空間インデックス）
+REQUESTS_COMPACT_BYTES = 1024 * 1024  # ログがこのサイズを超えたらスナップショットへ統合
+
+# 投稿キュー設定
+SUBMISSION_QUEUE_MAX = 1000  # 反映待ちがこの件数に達したら新規投稿を受け付けない
+SUBMISSION_BATCH_SIZE = 200  # 1回にまとめて要望ストアへ反映する件数
+SUBMISSION_FLUSH_INTERVAL_SEC = 0.5  # キューを確認する間隔
+SUBMISSION_RATE_PER_MINUTE = 5  # 1セッションあたりの投稿レート（ページの再読み込みでリセットされる）
+SUBMISSION_BURST = 3  # 1セッションが連続で投稿できる件数
+SUBMISSION_PROCESS_RATE_PER_MINUTE = 120  # プロセス全体の投稿レート（再読み込みではリセットされない）
+SUBMISSION_PROCESS_BURST = 30  # プロセス全体で連続して受け付ける件数
+
 # 画像アップロード設定
 MAX_IMAGE_SIZE_MB = 5
 ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png']
+IMAGE_MAX_DIMENSION = 1600  # 保存画像の長辺の上限（ピクセル）
+IMAGE_TARGET_BYTES = 400 * 1024  # 再エンコード後のサイズ目標
+IMAGE_MIN_QUALITY = 40  # サイズ目標に収めるために下げるJPEG品質の下限
+IMAGE_THUMBNAIL_SIZE = 256  # 地図表示用サムネイルの長辺（ピクセル）
+IMAGE_WORKER_THREADS = 2  # 画像処理ワーカー数
+IMAGE_QUEUE_MAX = 32  # 処理待ちの上限（超えた場合は投稿リクエスト内で同期処理）
+IMAGE_MAX_RETRIES = 3
+IMAGE_RETRY_BACKOFF_SEC = 0.5  # リトライ間隔（試行ごとに倍）
+IMAGE_GC_GRACE_SEC = 24 * 60 * 60  # 参照されていない画像を削除するまでの猶予
 
 # 地図設定
 HEATMAP_RADIUS_PIXELS = 60
 HEATMAP_INTENSITY = 1
 HEATMAP_THRESHOLD = 0.05
+DECK_CACHE_MAX_ENTRIES = 32  # (データバージョン, フィルタキー, モード) ごとのDeckキャッシュ上限
+
+# サーバー側ラスタ描画（BitmapLayer）設定
+BITMAP_TILE_SIZE = 256
+BITMAP_SIGMA_PIXELS = HEATMAP_RADIUS_PIXELS / 3  # ガウシアンぼかしの標準偏差（画面ピクセル）
+BITMAP_VIEWPORT_WIDTH = 1200  # ラスタ化する想定表示領域（ピクセル）
+BITMAP_VIEWPORT_HEIGHT = 700
+BITMAP_MAX_TILES = 48  # 1回の描画で合成するタイル数の上限
+BITMAP_ZOOM_RANGE = (3, 15)  # 描画範囲のズームの選択範囲
+BITMAP_TILE_CACHE_MAX_ENTRIES = 512
+BITMAP_TILE_INDEX_CACHE_MAX_ENTRIES = 8  # (データ・フィルタ, ズーム) ごとのタイル順に並べた点の索引の上限
+
+# 時系列アニメーション設定
+ANIMATION_CELL_DEGREES = 0.02  # 集計セルの大きさ（度）
+ANIMATION_FRAME_INTERVAL_SEC = 1.0  # 再生時のフレーム間隔
+ANIMATION_CACHE_MAX_ENTRIES = 16  # (データバージョン, フィルタキー, バケット種別) ごとのフレームキャッシュ上限
+
+# 市区町村別3Dカラム設定
+COLUMN_RADIUS_METERS = 3000
+COLUMN_MAX_ELEVATION_METERS = 150000  # 最大値の市区町村のカラム高さ
+COLUMN_RATE_PER = 100000  # 人口比は人口10万人あたりの件数
+MUNICIPALITY_AGGREGATE_CACHE_MAX_ENTRIES = 32  # (データバージョン, フィルタキー, 指標) ごとの集計キャッシュ上限
+
+# エクスポート設定
+EXPORT_DIR = DATA_DIR / "exports"
+EXPORT_CHUNK_ROWS = 50000  # 1回に変換・書き出しする行数
+EXPORT_MAX_FILES = 20  # 保持するエクスポートファイル数（古いものから削除）
+
+# GeoJSON読み書き設定
+GEOJSON_CHUNK_FEATURES = 10000  # 1回にDataFrameへ変換するFeature数（デコード済みの辞書を保持する上限）
+GEOJSON_READ_BLOCK_CHARS = 1024 * 1024  # 1回に読み込む文字数
+
+# 要望の集約設定
+REPORT_CLUSTER_RADIUS_M = 100  # この距離以内の要望を同じ地点として集約
+REPORT_ACCIDENT_LINK_RADIUS_M = 300  # 地点の周辺事故として数える半径
+HOTSPOT_MIN_RADIUS_M = 80  # 地図上の円の最小半径
 
 # 統計設定
 TOP_N_STATISTICS = 5
@@ -40,3 +107,84 @@ TIME_PERIODS = {
 
 # 統計データファイル
 STATISTICS_DATA_FILE = ACCIDENT_DATA_DIR / "statistics.csv"
+
+# タイルキャッシュ設定
+TILE_CACHE_DIR = DATA_DIR / "tiles"
+TILE_MIN_ZOOM = 0
+TILE_MAX_ZOOM = 14
+TILE_POINT_ZOOM = 11  # このズーム以上は集約せず個別ポイントとして出力
+TILE_EXTENT = 4096
+TILE_GRID_SIZE = 64  # 集約ズームでのタイル内グリッド分割数
+TILE_SERVER_HOST = "127.0.0.1"
+TILE_SERVER_PORT = 8765
+TILE_SERVER_URL = f"http://localhost:{TILE_SERVER_PORT}"
+
+# ジオコーディング設定（dataclean/データクレンジング.py）
+POPULATION_RAW_DATA_FILE = ACCIDENT_DATA_DIR / "人口データ.csv"  # ジオコーディング前の元データ
+GEOCODER_ENDPOINT = "https://msearch.gsi.go.jp/address-search/AddressSearch"  # 国土地理院 住所検索API
+GEOCODER_CACHE_FILE = DATA_DIR / "geocode_cache.jsonl"  # 正規化した住所 -> 座標（追記専用、再開に使用）
+GEOCODER_WORKERS = 4  # 同時に送るリクエスト数の上限
+GEOCODER_RATE_PER_SEC = 3.0  # 1秒あたりのリクエスト数
+GEOCODER_BURST = 3
+GEOCODER_TIMEOUT_SEC = 5
+GEOCODER_MAX_RETRIES = 3
+GEOCODER_RETRY_BACKOFF_SEC = 1.0  # 再試行までの待ち時間（試行ごとに倍）
+
+# データクレンジングパイプライン設定（dataclean/pipeline.py）
+PIPELINE_WORK_DIR = DATA_DIR / "pipeline"  # 中間ファイル・ログの置き場所
+PIPELINE_STATE_FILE = PIPELINE_WORK_DIR / "state.json"  # ステージごとの入力ハッシュと実行時間
+PIPELINE_JOBS = 2  # 同時に実行するステージ数
+GEOCODED_POPULATION_FILE = PIPELINE_WORK_DIR / "output_with_latlon.csv"  # ジオコーディング済みの人口データ（市町村抽出の入力）
+
+# 大きなCSVの並列変換設定（src/parallel_csv.py）
+CSV_TRANSFORM_WORKERS = 0  # プロセス数（0ならCPUコア数）
+CSV_TRANSFORM_CHUNK_BYTES = 16 * 1024 * 1024  # 1チャンクのおおよそのバイト数
+
+# 逆ジオコーディング設定（座標 -> 最寄りの市区町村代表点）
+REBUILD_AREA_FROM_COORDINATES = True  # 市町村名でないAreaを座標から作り直す
+REVERSE_GEOCODER_CELL_DEGREES = 0.1  # 候補表のグリッドの大きさ（度）
+REVERSE_GEOCODER_MAX_CANDIDATES = 48  # セルごとの候補数の上限（超えるセルは総当たり）
+REVERSE_GEOCODER_MAX_DISTANCE_M = 30000  # これより遠い代表点には割り当てない
+
+# 事故地点予測モデル設定（dataclean/predict_accident_locations.py / src/prediction.py）
+MODEL_DIR = DATA_DIR / "models"
+PREDICTION_MODEL_FILE = MODEL_DIR / "accident_location.joblib"  # 学習済みモデルとラベルエンコーダー
+PREDICTION_MEMO_SIZE = 100000  # シナリオごとの予測結果を保持する件数
+PREDICTION_MAX_SCENARIOS = 5000  # 画面から一度に予測するシナリオ数の上限
+PREDICTION_TRAINING_MODE = "separate"  # "separate"（緯度・経度・IMPACTを別々のモデル）または "multi_output"（1つのモデル）
+# multi_output モードで標準化した予測対象ごとの重み（IMPACTは事故種別でほぼ決まり、同じ重みでは
+# 木の分割がIMPACTに偏って緯度経度の精度が落ちるため小さくする）
+PREDICTION_MULTI_OUTPUT_WEIGHTS = {"LATITUDE": 1.0, "LONGITUDE": 1.0, "IMPACT": 0.1}
+PREDICTION_N_JOBS = -1  # 学習・予測に使うスレッド数（-1ならCPUコア数）
+# 追加学習（新しく加わった行だけで木を追加する）の設定
+PREDICTION_PIPELINE_MODE = "incremental"  # pipeline.py の prediction ステージ: incremental（追加学習）/ full（全件で再学習）
+PREDICTION_INCREMENTAL_MIN_TREES = 5  # 1回の追加学習でモデルごとに追加する木の最小数
+PREDICTION_INCREMENTAL_REPLAY_FRACTION = 1.0  # 追加する木の学習に混ぜる学習済みの行の割合（0なら新しい行だけで学習）
+PREDICTION_INCREMENTAL_MAX_TREES_RATIO = 3.0  # 木の数が最初の学習時のこの倍率を超える場合は全件で再学習する
+PREDICTION_INCREMENTAL_MAX_REMOVED_RATIO = 0.01  # 学習済みの行がこの割合より多く消えた（修正された）場合は全件で再学習する
+PREDICTION_INCREMENTAL_MAX_DEGRADATION = 1.02  # 検証データでの位置のMAEが追加学習前のこの倍率を超えたら追加学習を採用しない
+
+# 予測モデルのハイパーパラメータ探索設定（dataclean/tune_prediction_model.py / src/model_tuning.py）
+TUNING_DIR = MODEL_DIR / "tuning"  # 特徴量行列・分割のキャッシュとリーダーボード
+TUNING_FOLDS = 3  # 交差検証の分割数
+TUNING_WORKERS = 0  # 並列に評価する候補数（0ならCPUコア数）
+TUNING_MAX_CANDIDATES = 12  # モデル（位置・IMPACT）ごとに評価する候補数の上限
+TUNING_EARLY_STOP_RATIO = 1.2  # 途中までの平均MAEが最良値のこの倍率を超えた候補は残りの分割を評価しない
+TUNING_PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [10, 20, None],
+    "min_samples_leaf": [1, 3, 10],
+    "max_features": [1.0, 0.5],
+}
+
+# 事故リスク面（条件ごとのカーネル密度）設定（src/risk_surface.py）
+RISK_SURFACE_DIR = DATA_DIR / "risk_surface"  # 事前計算したラスタ（学習データのバージョンごと）
+RISK_SURFACE_CONDITIONS = ["ACCIDENT_TYPE_(CATEGORY)", "WEATHER"]  # ラスタを分ける条件の列
+RISK_SURFACE_BOUNDS = (122.0, 24.0, 146.0, 46.0)  # 西・南・東・北（度）
+RISK_SURFACE_WIDTH = 384  # 東西方向のセル数（南北方向はWebメルカトルの縦横比から決める）
+RISK_SURFACE_SIGMA_KM = 8.0  # カーネルの標準偏差（北緯35度での距離）
+
+# 共有クエリサービス設定（src/query_service.py）
+QUERY_WORKER_THREADS = 4  # フィルタ・集計を実行するスレッド数（全セッション共通）
+QUERY_CACHE_SIZE = 128  # フィルタ条件ごとの結果を保持する件数
+QUERY_TIMEOUT_SEC = 30  # セッションが結果を待つ時間の上限
@@ -0,0 +1,76 @@
+"""事故リスク面の事前計算スクリプト
+
+economic_impact_population.csv から条件（事故種別 × 天候）の組み合わせごとの IMPACT 重み付き
+カーネル密度ラスタを計算し、データのバージョン（内容ハッシュ）ごとに data/risk_surface/<version>.npz へ
+保存します。アプリは保存済みのラスタを読み込むだけで、任意のシナリオを重ねて表示できます。
+
+実行方法:
+    python dataclean/build_risk_surface.py
+    python dataclean/build_risk_surface.py --sigma-km 5 --width 512 --force
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import (  # noqa: E402
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    RISK_SURFACE_CONDITIONS,
+    RISK_SURFACE_SIGMA_KM,
+    RISK_SURFACE_WIDTH
+)
+from src.data_loader import get_file_version  # noqa: E402
+from src.risk_surface import (  # noqa: E402
+    build_risk_surface,
+    is_risk_surface_ready,
+    risk_surface_path,
+    save_risk_surface
+)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="条件ごとの事故リスク面（カーネル密度）を事前計算")
+    parser.add_argument('--width', type=int, default=RISK_SURFACE_WIDTH, help="東西方向のセル数")
+    parser.add_argument('--sigma-km', type=float, default=RISK_SURFACE_SIGMA_KM, help="カーネルの標準偏差（km）")
+    parser.add_argument('--force', action='store_true', help="計算済みでも再計算する")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("事故リスク面の事前計算")
+    print("=" * 60)
+
+    version = get_file_version(ECONOMIC_IMPACT_POPULATION_FILE)
+    print(f"データバージョン: {version}")
+
+    if is_risk_surface_ready(version) and not args.force:
+        print("✓ 計算済みのリスク面があります（--forceで再計算）")
+        return
+
+    df = pd.read_csv(ECONOMIC_IMPACT_POPULATION_FILE)
+    print(f"✓ データ読み込み完了: {len(df):,}件")
+    start = time.perf_counter()
+    surface = build_risk_surface(
+        df,
+        conditions=RISK_SURFACE_CONDITIONS,
+        width=args.width,
+        sigma_km=args.sigma_km,
+        version=version
+    )
+    elapsed = time.perf_counter() - start
+    path = risk_surface_path(version)
+    save_risk_surface(surface, path)
+    height, width = surface.shape
+    print(f"✓ 計算完了: {len(surface.keys)}通りの組み合わせ × {width}×{height}セル（{elapsed:.1f}秒）")
+    print(f"✓ 保存: {path}（{path.stat().st_size / 1e6:.2f}MB）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""タイルキャッシュ生成スクリプト
+
+事故データ（data/accidents/data.csv）からズームレベルごとのベクタータイルを生成し、
+データセットのバージョン（内容ハッシュ）ごとに data/tiles/<version>/ へ保存します。
+--serve を指定すると、生成後にローカルタイルサーバーを起動します。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import TILE_MIN_ZOOM, TILE_MAX_ZOOM, TILE_SERVER_URL  # noqa: E402
+from src.data_loader import load_accident_data, get_dataset_version  # noqa: E402
+from src.tiles import build_tile_cache, is_tile_cache_ready, start_tile_server  # noqa: E402
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="事故データのタイルキャッシュを生成")
+    parser.add_argument('--min-zoom', type=int, default=TILE_MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=TILE_MAX_ZOOM)
+    parser.add_argument('--force', action='store_true', help="生成済みでも再生成する")
+    parser.add_argument('--serve', action='store_true', help="生成後にタイルサーバーを起動する")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("タイルキャッシュ生成スクリプト")
+    print("=" * 60)
+
+    version = get_dataset_version()
+    print(f"データセットバージョン: {version}")
+
+    if is_tile_cache_ready(version) and not args.force:
+        print("✓ 生成済みのタイルキャッシュがあります（--forceで再生成）")
+    else:
+        df = load_accident_data(version)
+        print(f"✓ データ読み込み完了: {len(df):,}件")
+        start = time.perf_counter()
+        version_dir = build_tile_cache(df, version, min_zoom=args.min_zoom, max_zoom=args.max_zoom)
+        print(f"✓ 生成完了: {version_dir} ({time.perf_counter() - start:.1f}秒)")
+
+    if args.serve:
+        server = start_tile_server()
+        print(f"タイルサーバー起動: {TILE_SERVER_URL}/{version}/{{z}}/{{x}}/{{y}}.pbf")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
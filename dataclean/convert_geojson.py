@@ -0,0 +1,45 @@
+"""事故データのGeoJSON変換スクリプト
+
+CSV形式の事故データ（data/accidents/data.csv）を docs/geo.json のスキーマの
+GeoJSON（FeatureCollection）にチャンク単位で変換します。
+config.py の ACCIDENT_DATA_FILE を変換後のファイルに向けると、アプリはGeoJSONから読み込みます。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ACCIDENT_DATA_FILE  # noqa: E402
+from src.data_loader import read_accident_file  # noqa: E402
+from src.geojson_io import write_accident_geojson  # noqa: E402
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="事故データをGeoJSONに変換")
+    parser.add_argument('--input', type=Path, default=ACCIDENT_DATA_FILE)
+    parser.add_argument('--output', type=Path, default=ACCIDENT_DATA_FILE.with_suffix('.geojson'))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("事故データ GeoJSON変換スクリプト")
+    print("=" * 60)
+
+    df = read_accident_file(args.input)
+    print(f"✓ 読み込み完了: {len(df):,}件 ({args.input})")
+
+    start = time.perf_counter()
+    tmp_path = args.output.with_suffix(args.output.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write_accident_geojson(df, f)
+    tmp_path.replace(args.output)
+    print(f"✓ 変換完了: {args.output} ({time.perf_counter() - start:.1f}秒)")
+
+
+if __name__ == "__main__":
+    main()
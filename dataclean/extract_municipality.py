@@ -1,39 +1,71 @@
+"""市町村抽出スクリプト
+
+ジオコーディング済みの人口データ（データクレンジング.py の出力）の「地域」列から
+都道府県を除いた市町村名を抜き出し、「市町村」列を追加して出力します。
+大きなファイルでも扱えるよう、src/parallel_csv.py でチャンクごとに並列処理します。
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
 import pandas as pd
-import re
 
-# CSVファイルを読み込み
-df = pd.read_csv('output_with_latlon.csv')
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
 
-# 地域カラムから市町村を抜き出す関数
-def extract_municipality(region_text):
-    """
-    地域カラムから市町村を抜き出す
-    例: '北海道 札幌市' -> '札幌市'
-        '北海道 札幌市 中央区' -> '札幌市 中央区'
+from config import CSV_TRANSFORM_WORKERS, GEOCODED_POPULATION_FILE, POPULATION_DATA_FILE  # noqa: E402
+from src.parallel_csv import transform_csv  # noqa: E402
+
+
+def add_municipality_column(df: pd.DataFrame) -> pd.DataFrame:
+    """チャンクの「地域」列から「市町村」列を作成
+
+    最初の空白より後ろ（都道府県以降）を市町村とします。
+    例: '北海道 札幌市' -> '札幌市'、'北海道 札幌市 中央区' -> '札幌市 中央区'
     """
-    if pd.isna(region_text):
-        return None
-
-    # 最初のスペースで分割して、都道府県以降を取得
-    parts = region_text.split(' ', 1)
-    if len(parts) > 1:
-        return parts[1]
-    else:
-        return None
-
-# 市町村カラムを新規作成
-df['市町村'] = df['地域'].apply(extract_municipality)
-
-# 結果を表示（最初の20行）
-print("抽出結果のサンプル:")
-print(df[['地域', '市町村']].head(20))
-
-# 結果をCSVファイルに保存
-output_file = 'output_with_municipality.csv'
-df.to_csv(output_file, index=False, encoding='utf-8-sig')
-print(f"\n結果を {output_file} に保存しました。")
-
-# 統計情報を表示
-print(f"\n総データ数: {len(df)}")
-print(f"市町村抽出成功: {df['市町村'].notna().sum()}")
-print(f"市町村抽出失敗: {df['市町村'].isna().sum()}")
+    df['市町村'] = df['地域'].str.split(' ', n=1).str[1].replace('', None)
+    return df
+
+
+def print_progress(metrics: dict) -> None:
+    """処理済みのバイト数と処理速度を表示"""
+    print(
+        f"\r  {metrics['bytes'] / max(metrics['total_bytes'], 1):6.1%}  "
+        f"{metrics['rows']:,}行  {metrics['rows_per_sec']:,.0f}行/秒  {metrics['mb_per_sec']:.1f}MB/秒",
+        end='', flush=True
+    )
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="人口データの地域から市町村を抽出")
+    parser.add_argument('--input', type=Path, default=GEOCODED_POPULATION_FILE)
+    parser.add_argument('--output', type=Path, default=POPULATION_DATA_FILE)
+    parser.add_argument('--workers', type=int, default=CSV_TRANSFORM_WORKERS, help="プロセス数（0ならCPUコア数）")
+    args = parser.parse_args()
+
+    # 市町村カラムを追加して保存（値は文字列のまま読み書きする）
+    metrics = transform_csv(
+        args.input, args.output, add_municipality_column,
+        workers=args.workers, encoding='utf-8-sig', progress=print_progress
+    )
+    print()
+    print(f"結果を {args.output} に保存しました。")
+    print(f"処理時間: {metrics['seconds']:.2f}秒（{metrics['workers']}プロセス, {metrics['chunks']}チャンク）")
+
+    df = pd.read_csv(args.output, encoding='utf-8-sig', usecols=['地域', '市町村'])
+
+    # 結果を表示（最初の20行）
+    print("\n抽出結果のサンプル:")
+    print(df.head(20))
+
+    # 統計情報を表示
+    print(f"\n総データ数: {len(df)}")
+    print(f"市町村抽出成功: {df['市町村'].notna().sum()}")
+    print(f"市町村抽出失敗: {df['市町村'].isna().sum()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""要望画像のガベージコレクションスクリプト
+
+どの要望からも参照されていない画像（とサムネイル）を data/requests/images/ から削除します。
+要望ストアの要望に加えて、投稿キューで反映待ち・退避済み（failed/）の要望が参照する画像も残します。
+投稿直後の画像を消さないよう、最終更新から一定時間（IMAGE_GC_GRACE_SEC）経過したものだけが対象です。
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import IMAGE_GC_GRACE_SEC  # noqa: E402
+from src.image_pipeline import collect_garbage  # noqa: E402
+from src.request_store import get_request_store  # noqa: E402
+from src.submission_queue import SubmissionQueue  # noqa: E402
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="参照されていない要望画像を削除")
+    parser.add_argument('--grace-hours', type=float, default=IMAGE_GC_GRACE_SEC / 3600,
+                        help="最終更新からこの時間以上経過した画像のみ削除する")
+    parser.add_argument('--dry-run', action='store_true', help="削除せずに対象を表示する")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("要望画像 ガベージコレクション")
+    print("=" * 60)
+
+    store = get_request_store()
+    requests_df = store.load()
+    spooled = list(SubmissionQueue(store=store).spooled_records())
+    referenced = requests_df['image_path'].dropna().tolist() + [r.get('image_path') for r in spooled]
+    referenced = [path for path in referenced if path]
+    print(f"✓ 要望: {len(requests_df):,}件 + 投稿キュー {len(spooled):,}件（画像参照: {len(set(referenced)):,}件）")
+
+    removed, leftovers = collect_garbage(referenced, grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run)
+    prefix = '[dry-run] ' if args.dry_run else ''
+    for path in removed:
+        print(f"  {prefix}削除: {path.relative_to(project_root)}")
+    for path in leftovers:
+        print(f"  {prefix}削除（処理途中の残り）: {path.relative_to(project_root)}")
+    label = '削除対象' if args.dry_run else '削除'
+    print(f"✓ {label}: 画像 {len(removed):,}件、処理途中の残り {len(leftovers):,}件")
+
+
+if __name__ == "__main__":
+    main()
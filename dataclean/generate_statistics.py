@@ -10,6 +10,7 @@
 ユニークな事故のみをカウントします。
 """
 
+import argparse
 import os
 import sys
 import pandas as pd
@@ -192,13 +193,18 @@ def save_statistics(stats_df: pd.DataFrame, output_file: str):
 
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description="事故データから統計用CSVを生成")
+    parser.add_argument('--input', type=Path, default=project_root / "data" / "accidents" / "data.csv")
+    parser.add_argument('--output', type=Path, default=project_root / "data" / "accidents" / "statistics.csv")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("統計用CSV生成スクリプト")
     print("=" * 60)
 
     # ファイルパス設定
-    data_file = project_root / "data" / "accidents" / "data.csv"
-    output_file = project_root / "data" / "accidents" / "statistics.csv"
+    data_file = args.input
+    output_file = args.output
 
     try:
         # 1. データ読み込み
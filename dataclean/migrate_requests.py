@@ -0,0 +1,34 @@
+"""要望データのSQLite移行スクリプト
+
+旧形式の data/requests/requests.csv と追記ログ（requests.jsonl / requests.parquet）の要望を
+SQLiteバックエンド（data/requests/requests.sqlite3）へ移行します。
+移行後、config.py の REQUEST_STORE_BACKEND を "sqlite" に変更してください。
+"""
+
+import sys
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import REQUESTS_DB_FILE  # noqa: E402
+from src.request_store import JsonlRequestStore, SqliteRequestStore, migrate_to_sqlite  # noqa: E402
+
+
+def main():
+    """メイン処理"""
+    print("=" * 60)
+    print("要望データ SQLite移行スクリプト")
+    print("=" * 60)
+
+    source = JsonlRequestStore()
+    target = SqliteRequestStore()
+    migrated = migrate_to_sqlite(source, target)
+
+    print(f"✓ 移行件数: {migrated:,}件")
+    print(f"✓ SQLite総件数: {len(target.load()):,}件 ({REQUESTS_DB_FILE})")
+
+
+if __name__ == "__main__":
+    main()
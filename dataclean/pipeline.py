@@ -0,0 +1,374 @@
+"""データクレンジングパイプライン
+
+dataclean/ の各スクリプトをステージとして入力・出力ファイルを宣言し、依存関係の順に実行します。
+
+- 入力ファイルとスクリプトの内容ハッシュが前回の実行時と同じで、出力が前回の実行時から変わっていない
+  ステージはスキップします（出力を別のスクリプトが上書きした場合は再実行します）。
+- 人口データのジオコーディング（外部APIへの問い合わせ）とその下流の市町村抽出は --with-geocode を付けたときだけ
+  実行します。付けない場合はリポジトリの output_population.csv をそのまま入力として使います。
+- 依存関係のないステージ（例: 統計生成と人口データのジオコーディング）は並列に実行します。
+- 出力はアプリが読み込むパス（config.py）に書き出し、ステージごとの実行時間を表示・記録します。
+- 失敗したステージの下流は実行しません（他の系統は続行します）。
+
+実行方法:
+    python dataclean/pipeline.py                 # すべてのステージ
+    python dataclean/pipeline.py statistics      # 指定ステージとその上流のみ
+    python dataclean/pipeline.py --with-geocode  # 人口データのジオコーディングから実行
+    python dataclean/pipeline.py --dry-run       # 実行せずに計画を表示
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import (  # noqa: E402
+    ACCIDENT_DATA_FILE,
+    PREDICTED_DATA_FILE,
+    PREDICTION_MODEL_FILE,
+    PREDICTION_PIPELINE_MODE,
+    POPULATION_DATA_FILE,
+    POPULATION_RAW_DATA_FILE,
+    ECONOMIC_IMPACT_FILE,
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    STATISTICS_DATA_FILE,
+    PIPELINE_WORK_DIR,
+    PIPELINE_STATE_FILE,
+    PIPELINE_JOBS,
+    GEOCODED_POPULATION_FILE
+)
+
+DATACLEAN_DIR = Path(__file__).parent
+
+
+class Stage:
+    """パイプラインの1ステージ（スクリプトを引数付きで実行する）"""
+
+    def __init__(
+        self,
+        name: str,
+        script: str,
+        inputs: list[Path],
+        outputs: list[Path],
+        args: list,
+        code: Optional[list[Path]] = None,
+        opt_in: bool = False
+    ):
+        self.name = name
+        self.script = DATACLEAN_DIR / script
+        self.inputs = inputs
+        self.outputs = outputs
+        self.args = [str(arg) for arg in args]
+        # 内容が変わったら再実行するコード（スクリプト本体と、スクリプトが使うsrc/のモジュール）
+        self.code = [self.script] + (code or [])
+        # Trueのステージは --with-geocode またはステージ名の指定があるときだけ実行する
+        self.opt_in = opt_in
+
+    def command(self) -> list[str]:
+        return [sys.executable, str(self.script)] + self.args
+
+
+STAGES = [
+    Stage(
+        'geocode', 'データクレンジング.py',
+        inputs=[POPULATION_RAW_DATA_FILE],
+        outputs=[GEOCODED_POPULATION_FILE],
+        args=['--input', POPULATION_RAW_DATA_FILE, '--output', GEOCODED_POPULATION_FILE],
+        code=[project_root / 'src' / 'geocoder.py'],
+        # 国土地理院APIに問い合わせるため、既定では実行しない
+        opt_in=True
+    ),
+    Stage(
+        'municipality', 'extract_municipality.py',
+        inputs=[GEOCODED_POPULATION_FILE],
+        outputs=[POPULATION_DATA_FILE],
+        args=['--input', GEOCODED_POPULATION_FILE, '--output', POPULATION_DATA_FILE],
+        code=[project_root / 'src' / 'parallel_csv.py'],
+        # リポジトリの output_population.csv を上書きするため、ジオコーディングと一緒にだけ実行する
+        opt_in=True
+    ),
+    Stage(
+        'join', '結合.py',
+        inputs=[ECONOMIC_IMPACT_FILE, POPULATION_DATA_FILE],
+        outputs=[ECONOMIC_IMPACT_POPULATION_FILE],
+        args=[
+            '--economic', ECONOMIC_IMPACT_FILE,
+            '--population', POPULATION_DATA_FILE,
+            '--output', ECONOMIC_IMPACT_POPULATION_FILE
+        ],
+        code=[project_root / 'src' / 'population_join.py', project_root / 'src' / 'text_normalize.py']
+    ),
+    Stage(
+        'statistics', 'generate_statistics.py',
+        inputs=[ACCIDENT_DATA_FILE],
+        outputs=[STATISTICS_DATA_FILE],
+        args=['--input', ACCIDENT_DATA_FILE, '--output', STATISTICS_DATA_FILE]
+    ),
+    Stage(
+        'prediction', 'predict_accident_locations.py',
+        inputs=[ECONOMIC_IMPACT_POPULATION_FILE],
+        outputs=[PREDICTED_DATA_FILE, PREDICTION_MODEL_FILE],
+        args=[
+            '--input', ECONOMIC_IMPACT_POPULATION_FILE,
+            '--output', PREDICTED_DATA_FILE,
+            '--model', PREDICTION_MODEL_FILE,
+            # incremental: 既存のモデルがあれば新しい行だけで追加学習する（できない場合は全件で再学習）
+            *(['--incremental'] if PREDICTION_PIPELINE_MODE == 'incremental' else [])
+        ],
+        code=[project_root / 'src' / 'prediction.py']
+    ),
+]
+
+
+class PipelineState:
+    """ステージごとの指紋・実行時間と、ファイルハッシュのキャッシュ（JSONで保存）"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        data = json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+        self.stages: dict = data.get('stages', {})
+        self.files: dict = data.get('files', {})
+
+    def hash_file(self, path: Path) -> str:
+        """ファイル内容のハッシュ（mtime・サイズが変わらない限り前回の値を使う）"""
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            cached = self.files.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        with self._lock:
+            self.files[key] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def fingerprint(self, stage: Stage) -> str:
+        """入力・コードの内容と引数から決まるステージの指紋"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(stage.command()[1:], ensure_ascii=False).encode('utf-8'))
+        for path in stage.inputs + stage.code:
+            digest.update(f"{path}:{self.hash_file(path)}".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def output_hashes(self, stage: Stage) -> dict[str, str]:
+        """ステージの出力ファイルのハッシュ（存在しない出力は含めない）"""
+        return {str(path): self.hash_file(path) for path in stage.outputs if path.exists()}
+
+    def is_fresh(self, stage: Stage, fingerprint: str) -> bool:
+        """指紋が前回の実行時と同じで、出力が揃っていて前回の実行時から変わっていないか"""
+        previous = self.stages.get(stage.name, {})
+        return (
+            previous.get('fingerprint') == fingerprint
+            and all(path.exists() for path in stage.outputs)
+            and previous.get('outputs') == self.output_hashes(stage)
+        )
+
+    def record(self, stage: Stage, fingerprint: str, seconds: float) -> None:
+        outputs = self.output_hashes(stage)
+        with self._lock:
+            self.stages[stage.name] = {
+                'fingerprint': fingerprint,
+                'outputs': outputs,
+                'seconds': round(seconds, 3),
+                'finished_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps({'stages': self.stages, 'files': self.files}, ensure_ascii=False, indent=2),
+            encoding='utf-8'
+        )
+        os.replace(tmp_path, self.path)
+
+
+def select_stages(stages: list[Stage], targets: list[str], with_opt_in: bool = False) -> list[Stage]:
+    """指定ステージとその上流を宣言順に取得（指定なしは全ステージ）
+
+    opt_in のステージは、with_opt_in が True か targets で名前を指定した場合だけ含めます。
+    含めない場合、その出力は既存のファイルを入力として使います。
+
+    Args:
+        stages: 全ステージ
+        targets: 実行するステージ名
+        with_opt_in: opt_in のステージも含める
+    """
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [name for name in targets if name not in by_name]
+    if unknown:
+        raise ValueError(f"未知のステージです: {', '.join(unknown)}")
+    enabled = [stage for stage in stages if with_opt_in or not stage.opt_in or stage.name in targets]
+    if not targets:
+        return enabled
+
+    producers = {path: stage for stage in enabled for path in stage.outputs}
+    selected = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        todo.extend(producers[path].name for path in by_name[name].inputs if path in producers)
+    return [stage for stage in stages if stage.name in selected]
+
+
+def run_stage(stage: Stage, state: PipelineState, force: bool, log_dir: Path) -> tuple[str, float, str]:
+    """1ステージを実行（入力・コードが変わっていなければスキップ）
+
+    Returns:
+        tuple[str, float, str]: (状態 'skipped'/'done'/'failed', 秒数, 補足)
+    """
+    start = time.perf_counter()
+    missing = [str(path) for path in stage.inputs if not path.exists()]
+    if missing:
+        return 'failed', 0.0, f"入力がありません: {', '.join(missing)}"
+
+    fingerprint = state.fingerprint(stage)
+    if not force and state.is_fresh(stage, fingerprint):
+        previous = state.stages[stage.name]
+        return 'skipped', time.perf_counter() - start, f"前回 {previous.get('seconds', 0):.1f}秒"
+
+    for path in stage.outputs:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    log_file = log_dir / f"{stage.name}.log"
+    with open(log_file, 'w', encoding='utf-8') as log:
+        result = subprocess.run(
+            stage.command(), cwd=project_root, stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8'}
+        )
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        return 'failed', seconds, f"終了コード {result.returncode}（ログ: {log_file}）"
+    missing = [str(path) for path in stage.outputs if not path.exists()]
+    if missing:
+        return 'failed', seconds, f"出力がありません: {', '.join(missing)}"
+
+    state.record(stage, fingerprint, seconds)
+    return 'done', seconds, ''
+
+
+def run_pipeline(
+    stages: list[Stage],
+    state: PipelineState,
+    jobs: int = PIPELINE_JOBS,
+    force: bool = False,
+    log_dir: Path = PIPELINE_WORK_DIR / "logs"
+) -> dict[str, tuple[str, float, str]]:
+    """依存関係の順にステージを実行（依存のないステージは並列）
+
+    Args:
+        stages: 実行するステージ（select_stagesの戻り値）
+        state: パイプラインの状態
+        jobs: 同時に実行するステージ数
+        force: 入力が変わっていなくても実行する
+        log_dir: ステージごとの標準出力を保存するディレクトリ
+
+    Returns:
+        dict[str, tuple[str, float, str]]: ステージ名 -> (状態, 秒数, 補足)（状態は run_stage と 'blocked'）
+    """
+    log_dir.mkdir(parents=True, exist_ok=True)
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    upstream = {
+        stage.name: {producers[path] for path in stage.inputs if path in producers}
+        for stage in stages
+    }
+
+    results: dict[str, tuple[str, float, str]] = {}
+    waiting = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while waiting or running:
+            for stage in list(waiting):
+                statuses = [results.get(name, ('pending',))[0] for name in upstream[stage.name]]
+                if any(status in ('failed', 'blocked') for status in statuses):
+                    results[stage.name] = ('blocked', 0.0, "上流のステージが失敗しました")
+                    waiting.remove(stage)
+                elif all(status in ('skipped', 'done') for status in statuses):
+                    print(f"▶ {stage.name}")
+                    running[executor.submit(run_stage, stage, state, force, log_dir)] = stage
+                    waiting.remove(stage)
+            if not running:
+                if waiting:
+                    raise ValueError(f"ステージの依存関係が循環しています: {[s.name for s in waiting]}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+                status, seconds, note = results[stage.name]
+                print(f"{'✗' if status == 'failed' else '✓'} {stage.name}: {status} ({seconds:.1f}秒) {note}")
+    return results
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="データクレンジングパイプラインを実行")
+    parser.add_argument('stages', nargs='*', help="実行するステージ（上流も含む。省略時は全ステージ）")
+    parser.add_argument('--jobs', type=int, default=PIPELINE_JOBS)
+    parser.add_argument('--force', action='store_true', help="入力が変わっていなくても実行する")
+    parser.add_argument('--dry-run', action='store_true', help="実行せずにステージの状態を表示")
+    parser.add_argument(
+        '--with-geocode', action='store_true',
+        help="人口データのジオコーディング（国土地理院APIへの問い合わせ）と市町村抽出も実行する"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("データクレンジングパイプライン")
+    print("=" * 60)
+
+    try:
+        stages = select_stages(STAGES, args.stages, args.with_geocode)
+    except ValueError as e:
+        parser.error(str(e))
+    state = PipelineState(PIPELINE_STATE_FILE)
+
+    if args.dry_run:
+        for stage in stages:
+            if all(path.exists() for path in stage.inputs):
+                status = "最新" if state.is_fresh(stage, state.fingerprint(stage)) else "要実行"
+            else:
+                status = "入力待ち"
+            print(f"  {stage.name:<14} {status}  {' + '.join(p.name for p in stage.inputs)} -> "
+                  f"{' + '.join(p.name for p in stage.outputs)}")
+        print("※ 上流を実行すると、その下流も入力が変わった場合は再実行されます")
+        return
+
+    start = time.perf_counter()
+    results = run_pipeline(stages, state, args.jobs, args.force)
+
+    print("\n" + "=" * 60)
+    print(f"{'ステージ':<14} {'状態':<8} {'秒数':>8}")
+    for stage in stages:
+        status, seconds, _ = results[stage.name]
+        print(f"{stage.name:<14} {status:<8} {seconds:8.1f}")
+    print(f"合計: {time.perf_counter() - start:.1f}秒")
+    print("=" * 60)
+
+    if any(status in ('failed', 'blocked') for status, _, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,135 +1,178 @@
 """
 Accident Location Prediction using Machine Learning
 Predicts 30 most likely accident locations based on accident type, weather, vehicle type, and population.
+
+With --incremental, an existing model is updated by adding trees trained only on rows that are new
+since it was trained; it falls back to a full retrain when that is not possible.
+A full retrain without --params reuses the settings found by tune_prediction_model.py for the existing model.
 """
 
+import argparse
+import json
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import mean_absolute_error
 import warnings
 warnings.filterwarnings('ignore')
 
-# Load data
-print("Loading data...")
-df = pd.read_csv('data/accidents/economic_impact_population.csv')
-
-# Remove rows with missing LAT/LON
-df = df.dropna(subset=['LATITUDE', 'LONGITUDE'])
-
-# Remove rows with missing features
-df = df.dropna(subset=['ACCIDENT_TYPE_(CATEGORY)', 'WEATHER', 'VEHICLE_1:_BODY_TYPE', 'POPULATION', 'IMPACT'])
-
-print(f"Total records: {len(df)}")
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
 
-# Encode categorical variables
-print("\nEncoding categorical features...")
-le_accident = LabelEncoder()
-le_weather = LabelEncoder()
-le_vehicle = LabelEncoder()
-
-df['accident_encoded'] = le_accident.fit_transform(df['ACCIDENT_TYPE_(CATEGORY)'])
-df['weather_encoded'] = le_weather.fit_transform(df['WEATHER'])
-df['vehicle_encoded'] = le_vehicle.fit_transform(df['VEHICLE_1:_BODY_TYPE'])
-
-# Prepare features and targets
-X = df[['accident_encoded', 'weather_encoded', 'vehicle_encoded', 'POPULATION']]
-y_lat = df['LATITUDE']
-y_lon = df['LONGITUDE']
-y_impact = df['IMPACT']
-
-# Split data
-X_train, X_test, y_lat_train, y_lat_test, y_lon_train, y_lon_test, y_imp_train, y_imp_test = train_test_split(
-    X, y_lat, y_lon, y_impact, test_size=0.2, random_state=42
+from config import (  # noqa: E402
+    ACCIDENT_DATA_DIR,
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    PREDICTION_MODEL_FILE,
+    PREDICTION_N_JOBS,
+    PREDICTION_TRAINING_MODE
 )
+from src.data_loader import get_file_version  # noqa: E402
+from src.prediction import (  # noqa: E402
+    TRAINING_MODES,
+    load_model,
+    prepare_training_data,
+    save_model,
+    train_location_model,
+    update_location_model
+)
+
 
-# Train models
-print("\nTraining Random Forest models...")
-print("Training Latitude predictor...")
-model_lat = RandomForestRegressor(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1)
-model_lat.fit(X_train, y_lat_train)
-
-print("Training Longitude predictor...")
-model_lon = RandomForestRegressor(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1)
-model_lon.fit(X_train, y_lon_train)
-
-print("Training Impact predictor...")
-model_impact = RandomForestRegressor(n_estimators=200, max_depth=20, random_state=42, n_jobs=-1)
-model_impact.fit(X_train, y_imp_train)
-
-# Evaluate
-lat_pred = model_lat.predict(X_test)
-lon_pred = model_lon.predict(X_test)
-impact_pred = model_impact.predict(X_test)
-
-lat_mae = mean_absolute_error(y_lat_test, lat_pred)
-lon_mae = mean_absolute_error(y_lon_test, lon_pred)
-impact_mae = mean_absolute_error(y_imp_test, impact_pred)
-
-print(f"\nModel Performance:")
-print(f"Latitude MAE: {lat_mae:.6f} degrees (~{lat_mae * 111:.2f} km)")
-print(f"Longitude MAE: {lon_mae:.6f} degrees (~{lon_mae * 111:.2f} km)")
-print(f"Impact MAE: {impact_mae:.3f} (impact units)")
-
-# Create mock scenarios
-print("\nCreating mock scenarios...")
-
-# Get unique values
-accident_types = df['ACCIDENT_TYPE_(CATEGORY)'].unique()
-weather_conditions = df['WEATHER'].unique()
-vehicle_types = df['VEHICLE_1:_BODY_TYPE'].unique()
-
-# Population range (reasonable values from the data)
-pop_min = df['POPULATION'].quantile(0.25)
-pop_max = df['POPULATION'].quantile(0.75)
-
-# Generate 30 diverse scenarios
-np.random.seed(42)
-scenarios = []
-
-for i in range(30):
-    scenario = {
-        'ACCIDENT_TYPE_(CATEGORY)': np.random.choice(accident_types),
-        'WEATHER': np.random.choice(weather_conditions),
-        'VEHICLE_1:_BODY_TYPE': np.random.choice(vehicle_types),
-        'POPULATION': np.random.randint(int(pop_min), int(pop_max))
-    }
-    scenarios.append(scenario)
-
-scenarios_df = pd.DataFrame(scenarios)
-
-# Encode scenarios
-scenarios_df['accident_encoded'] = le_accident.transform(scenarios_df['ACCIDENT_TYPE_(CATEGORY)'])
-scenarios_df['weather_encoded'] = le_weather.transform(scenarios_df['WEATHER'])
-scenarios_df['vehicle_encoded'] = le_vehicle.transform(scenarios_df['VEHICLE_1:_BODY_TYPE'])
-
-# Prepare features for prediction
-X_scenarios = scenarios_df[['accident_encoded', 'weather_encoded', 'vehicle_encoded', 'POPULATION']]
-
-# Predict locations
-print("\nPredicting accident locations...")
-predicted_lat = model_lat.predict(X_scenarios)
-predicted_lon = model_lon.predict(X_scenarios)
-predicted_impact = model_impact.predict(X_scenarios)
-
-# Create results dataframe
-results = scenarios_df[['ACCIDENT_TYPE_(CATEGORY)', 'WEATHER', 'VEHICLE_1:_BODY_TYPE', 'POPULATION']].copy()
-results['PREDICTED_LATITUDE'] = predicted_lat
-results['PREDICTED_LONGITUDE'] = predicted_lon
-results['PREDICTED_IMPACT'] = predicted_impact
-
-# Save results
-output_file = 'data/accidents/predicted_locations.csv'
-results.to_csv(output_file, index=False)
-
-print(f"\n✅ Prediction complete!")
-print(f"📁 Results saved to: {output_file}")
-print(f"\n📊 Sample predictions:")
-print(results.head(10).to_string(index=False))
-
-print(f"\n🎯 Total predictions: {len(results)}")
-print(f"\n📍 Latitude range: {predicted_lat.min():.4f} to {predicted_lat.max():.4f}")
-print(f"📍 Longitude range: {predicted_lon.min():.4f} to {predicted_lon.max():.4f}")
-print(f"💥 Impact range: {predicted_impact.min():.2f} to {predicted_impact.max():.2f}")
+def tuned_settings(previous, mode: str):
+    """Tuning metadata (leaderboard and params from tune_prediction_model.py) of the existing model
+
+    Without this, a full retrain (including the fallback of --incremental) would silently drop the
+    tuned settings and go back to MODEL_PARAMS. Returns None if the model was not tuned for this mode.
+    """
+    if previous is None or previous.metadata.get('mode', 'separate') != mode:
+        return None
+    tuning = previous.metadata.get('tuning')
+    return tuning if tuning and tuning.get('params') else None
+
+
+def main():
+    """Train the models and predict locations for mock scenarios"""
+    parser = argparse.ArgumentParser(description="Predict accident locations for mock scenarios")
+    parser.add_argument('--input', type=Path, default=ECONOMIC_IMPACT_POPULATION_FILE)
+    parser.add_argument('--output', type=Path, default=ACCIDENT_DATA_DIR / 'predicted_locations.csv')
+    parser.add_argument('--model', type=Path, default=PREDICTION_MODEL_FILE, help="Where to save the trained model")
+    parser.add_argument('--mode', choices=TRAINING_MODES, default=PREDICTION_TRAINING_MODE,
+                        help="separate: one model per target / multi_output: one model for lat, lon and impact")
+    parser.add_argument('--params', type=Path,
+                        help="JSON with RandomForest settings per target (e.g. best_params.json from tune_prediction_model.py). "
+                             "Defaults to the tuned settings of the existing model, if any")
+    parser.add_argument('--n-jobs', type=int, default=PREDICTION_N_JOBS, help="Threads for training (-1 = all cores)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Add trees for new rows to the existing model instead of retraining on everything")
+    args = parser.parse_args()
+
+    # Load data
+    print("Loading data...")
+    df = prepare_training_data(pd.read_csv(args.input))
+
+    print(f"Total records: {len(df)}")
+
+    source_version = get_file_version(args.input)
+    previous = None
+    if args.model.exists() and (args.incremental or not args.params):
+        try:
+            previous = load_model(args.model)
+        except Exception as e:
+            print(f"Could not load the existing model ({e}); training from scratch")
+
+    model = None
+    if args.incremental and previous is not None:
+        print("\nUpdating the existing model with new rows...")
+        try:
+            model, summary = update_location_model(previous, df, source_version=source_version)
+        except ValueError as e:
+            print(f"Incremental update not possible ({e}); retraining on all rows")
+        else:
+            metrics = summary['mae_after'] or model.metadata['mae']
+            print(f"Added {summary['rows_added']} training rows and {summary['holdout_added']} holdout rows, "
+                  f"trees added: {summary['trees_added']}")
+            before = summary['mae_before']
+            if before:
+                print(f"Holdout location MAE: {(before['LATITUDE'] + before['LONGITUDE']) / 2:.6f}"
+                      f" -> {(metrics['LATITUDE'] + metrics['LONGITUDE']) / 2:.6f} degrees")
+
+    if model is None:
+        # Train models (categorical features are label-encoded inside the model)
+        print(f"\nTraining Random Forest models ({args.mode})...")
+        tuning = None if args.params else tuned_settings(previous, args.mode)
+        if args.params:
+            params = json.loads(args.params.read_text(encoding='utf-8'))
+        elif tuning:
+            print("Reusing the tuned settings of the existing model")
+            params = tuning['params']
+        else:
+            params = None
+        model, metrics = train_location_model(
+            df, params=params, mode=args.mode, n_jobs=args.n_jobs, source_version=source_version
+        )
+        if tuning:
+            # Keep the tuning record so that the next retrain reuses the settings again
+            model.metadata['tuning'] = tuning
+    lat_mae, lon_mae, impact_mae = metrics['LATITUDE'], metrics['LONGITUDE'], metrics['IMPACT']
+
+    print(f"\nModel Performance:")
+    print(f"Latitude MAE: {lat_mae:.6f} degrees (~{lat_mae * 111:.2f} km)")
+    print(f"Longitude MAE: {lon_mae:.6f} degrees (~{lon_mae * 111:.2f} km)")
+    print(f"Impact MAE: {impact_mae:.3f} (impact units)")
+
+    # Save the models and label encoders so the app can predict arbitrary scenarios
+    save_model(model, args.model)
+    print(f"\n💾 Model saved to: {args.model} (version {model.version})")
+
+    # Create mock scenarios
+    print("\nCreating mock scenarios...")
+
+    # Get unique values
+    accident_types = df['ACCIDENT_TYPE_(CATEGORY)'].unique()
+    weather_conditions = df['WEATHER'].unique()
+    vehicle_types = df['VEHICLE_1:_BODY_TYPE'].unique()
+
+    # Population range (reasonable values from the data)
+    pop_min = df['POPULATION'].quantile(0.25)
+    pop_max = df['POPULATION'].quantile(0.75)
+
+    # Generate 30 diverse scenarios
+    np.random.seed(42)
+    scenarios = []
+
+    for i in range(30):
+        scenario = {
+            'ACCIDENT_TYPE_(CATEGORY)': np.random.choice(accident_types),
+            'WEATHER': np.random.choice(weather_conditions),
+            'VEHICLE_1:_BODY_TYPE': np.random.choice(vehicle_types),
+            'POPULATION': np.random.randint(int(pop_min), int(pop_max))
+        }
+        scenarios.append(scenario)
+
+    scenarios_df = pd.DataFrame(scenarios)
+
+    # Predict locations
+    print("\nPredicting accident locations...")
+    results = model.predict(scenarios_df)
+    predicted_lat = results['PREDICTED_LATITUDE']
+    predicted_lon = results['PREDICTED_LONGITUDE']
+    predicted_impact = results['PREDICTED_IMPACT']
+
+    # Save results
+    output_file = args.output
+    results.to_csv(output_file, index=False)
+
+    print(f"\n✅ Prediction complete!")
+    print(f"📁 Results saved to: {output_file}")
+    print(f"\n📊 Sample predictions:")
+    print(results.head(10).to_string(index=False))
+
+    print(f"\n🎯 Total predictions: {len(results)}")
+    print(f"\n📍 Latitude range: {predicted_lat.min():.4f} to {predicted_lat.max():.4f}")
+    print(f"📍 Longitude range: {predicted_lon.min():.4f} to {predicted_lon.max():.4f}")
+    print(f"💥 Impact range: {predicted_impact.min():.2f} to {predicted_impact.max():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""事故地点予測モデルのハイパーパラメータ探索スクリプト
+
+位置（緯度・経度）と IMPACT のモデルの RandomForest の設定を交差検証で並列に探索し、
+リーダーボード（CSV）と最良の設定（JSON）を保存したうえで、最良の設定で学習したモデルを保存します。
+ネットワークは使わず、CPUだけで実行できます。
+
+実行方法:
+    python dataclean/tune_prediction_model.py --workers 4 --max-candidates 12
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import (  # noqa: E402
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    PREDICTION_MODEL_FILE,
+    TUNING_DIR,
+    TUNING_EARLY_STOP_RATIO,
+    TUNING_FOLDS,
+    TUNING_MAX_CANDIDATES,
+    TUNING_WORKERS
+)
+from src.model_tuning import (  # noqa: E402
+    SEARCH_GROUPS,
+    best_params,
+    make_candidates,
+    prepare_search_data,
+    run_search
+)
+from src.data_loader import get_file_version  # noqa: E402
+from src.prediction import MODEL_PARAMS, save_model, train_location_model  # noqa: E402
+
+
+def print_result(result: dict) -> None:
+    """候補の評価結果を1行で表示"""
+    mark = '✓' if result['status'] == 'completed' else '-'
+    print(
+        f"  {mark} {result['group']:<9} MAE {result['mae']:.4f}（{result['folds']}分割, {result['seconds']:5.1f}秒） "
+        f"{json.dumps(result['params'], sort_keys=True)}",
+        flush=True
+    )
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="予測モデルのハイパーパラメータを探索")
+    parser.add_argument('--input', type=Path, default=ECONOMIC_IMPACT_POPULATION_FILE)
+    parser.add_argument('--model', type=Path, default=PREDICTION_MODEL_FILE, help="最良の設定で学習したモデルの保存先")
+    parser.add_argument('--output-dir', type=Path, default=TUNING_DIR, help="キャッシュ・リーダーボードの保存先")
+    parser.add_argument('--groups', nargs='+', choices=list(SEARCH_GROUPS), default=list(SEARCH_GROUPS))
+    parser.add_argument('--folds', type=int, default=TUNING_FOLDS)
+    parser.add_argument('--workers', type=int, default=TUNING_WORKERS, help="並列に評価する候補数（0ならCPUコア数）")
+    parser.add_argument('--max-candidates', type=int, default=TUNING_MAX_CANDIDATES)
+    parser.add_argument('--early-stop-ratio', type=float, default=TUNING_EARLY_STOP_RATIO,
+                        help="途中までのMAEが最良値のこの倍率を超えた候補を打ち切る（0なら打ち切らない）")
+    parser.add_argument('--no-model', action='store_true', help="リーダーボードだけ作成してモデルは学習しない")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("予測モデルのハイパーパラメータ探索")
+    print("=" * 60)
+
+    df = pd.read_csv(args.input)
+    start = time.perf_counter()
+    path = prepare_search_data(df, args.output_dir, args.folds)
+    print(f"特徴量キャッシュ: {path.name}（{time.perf_counter() - start:.2f}秒）")
+
+    candidates = {
+        group: make_candidates(max_candidates=args.max_candidates, baseline=MODEL_PARAMS[SEARCH_GROUPS[group][0]])
+        for group in args.groups
+    }
+    print(f"候補数: {', '.join(f'{group} {len(c)}件' for group, c in candidates.items())}")
+
+    start = time.perf_counter()
+    leaderboard = run_search(
+        path, candidates,
+        workers=args.workers,
+        early_stop_ratio=args.early_stop_ratio or None,
+        progress=print_result
+    )
+    elapsed = time.perf_counter() - start
+    stopped = (leaderboard['status'] == 'stopped').sum()
+    print(f"\n探索時間: {elapsed:.1f}秒（打ち切り {stopped}件）")
+
+    leaderboard_path = args.output_dir / 'leaderboard.csv'
+    leaderboard.to_csv(leaderboard_path, index=False, encoding='utf-8-sig')
+    params = best_params(leaderboard)
+    params_path = args.output_dir / 'best_params.json'
+    params_path.write_text(json.dumps(params, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"リーダーボードを {leaderboard_path} に保存しました。")
+    print(f"最良の設定を {params_path} に保存しました。")
+    print("\n上位の候補:")
+    print(leaderboard.groupby('group').head(3).to_string(index=False))
+
+    if args.no_model:
+        return
+
+    print("\n最良の設定でモデルを学習中...")
+    model, metrics = train_location_model(df, params=params, mode='separate', source_version=get_file_version(args.input))
+    model.metadata['tuning'] = {'leaderboard': str(leaderboard_path), 'params': params}
+    save_model(model, args.model)
+    print(f"モデルを {args.model} に保存しました（バージョン {model.version}）")
+    print("評価データのMAE: " + ", ".join(f"{target} {mae:.4f}" for target, mae in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
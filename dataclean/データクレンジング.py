@@ -1,58 +1,85 @@
+"""人口データへの緯度経度付与スクリプト
+
+人口データ（data/accidents/人口データ.csv）の「地域」列を国土地理院の住所検索APIで
+ジオコーディングし、lat/lon列を追加して出力します。
+取得結果は data/geocode_cache.jsonl に1件ずつ保存されるため、中断しても再実行すれば
+未取得の地域から再開します（--endpoint で問い合わせ先を差し替えられます）。
+"""
+
+import argparse
+import sys
 import time
-import requests
+from pathlib import Path
+
 import pandas as pd
 
-# ===== 設定 =====
-INPUT_CSV = "/Users/tomoyakato/開発/AccVis/data/accidents/人口データ.csv"   # 元のCSVファイル
-OUTPUT_CSV = "output_with_latlon.csv"  # 出力ファイル
-ADDRESS_COL = "地域"       # 市町村名が入っている列名
-SLEEP_SEC = 0.3          # API呼び出し間隔（優しめに）
-
-GSI_API_URL = "https://msearch.gsi.go.jp/address-search/AddressSearch"
-
-# ===== 1. CSV読み込み =====
-df = pd.read_csv(INPUT_CSV)
-
-# 確認（任意）
-# print(df.head())
-
-# ===== 2. 一意な市町村名を取得 =====
-unique_cities = df[ADDRESS_COL].dropna().unique()
-
-# 市町村名 -> (lon, lat) を入れる辞書
-city_to_coord = {}
-
-# ===== 3. 国土地理院APIで緯度経度を取得する関数 =====
-def fetch_latlon_from_gsi(address: str):
-    """国土地理院ジオコーディングAPIから (lat, lon) を返す。見つからなければ (None, None)。"""
-    try:
-        params = {"q": address}
-        resp = requests.get(GSI_API_URL, params=params, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
-        if not data:
-            return None, None
-
-        # 最初の候補を採用
-        feature = data[0]
-        lon, lat = feature["geometry"]["coordinates"]  # [lon, lat]
-        return lat, lon
-    except Exception as e:
-        print(f"[WARN] '{address}' でエラー: {e}")
-        return None, None
-
-# ===== 4. 一意な市町村ごとにAPIを叩いて辞書に保存 =====
-for city in unique_cities:
-    print(f"市町村 '{city}' の座標を取得中...")
-    lat, lon = fetch_latlon_from_gsi(city)
-    city_to_coord[city] = {"lat": lat, "lon": lon}
-    time.sleep(SLEEP_SEC)
-
-# ===== 5. 元データに緯度経度を結合 =====
-df["lat"] = df[ADDRESS_COL].map(lambda x: city_to_coord.get(x, {}).get("lat"))
-df["lon"] = df[ADDRESS_COL].map(lambda x: city_to_coord.get(x, {}).get("lon"))
-
-# ===== 6. CSVとして出力 =====
-df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
-
-print("完了しました ✅ 出力ファイル:", OUTPUT_CSV)
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import (  # noqa: E402
+    POPULATION_RAW_DATA_FILE,
+    GEOCODER_ENDPOINT,
+    GEOCODER_CACHE_FILE,
+    GEOCODER_WORKERS,
+    GEOCODER_RATE_PER_SEC,
+    GEOCODED_POPULATION_FILE
+)
+from src.geocoder import GeocodeCache, Geocoder, GsiEndpoint  # noqa: E402
+
+ADDRESS_COL = "地域"  # 市町村名が入っている列名
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="人口データの地域をジオコーディング")
+    parser.add_argument('--input', type=Path, default=POPULATION_RAW_DATA_FILE)
+    parser.add_argument('--output', type=Path, default=GEOCODED_POPULATION_FILE)
+    parser.add_argument('--column', default=ADDRESS_COL)
+    parser.add_argument('--endpoint', default=GEOCODER_ENDPOINT)
+    parser.add_argument('--cache', type=Path, default=GEOCODER_CACHE_FILE)
+    parser.add_argument('--workers', type=int, default=GEOCODER_WORKERS)
+    parser.add_argument('--rate', type=float, default=GEOCODER_RATE_PER_SEC, help="1秒あたりのリクエスト数")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("人口データ ジオコーディングスクリプト")
+    print("=" * 60)
+
+    df = pd.read_csv(args.input)
+    unique_cities = df[args.column].dropna().unique()
+    cache = GeocodeCache(args.cache)
+    print(f"✓ 読み込み完了: {len(df):,}行 / 地域 {len(unique_cities):,}件（キャッシュ済み {len(cache):,}件）")
+
+    def report(address, coordinate, error):
+        if error is not None:
+            print(f"[WARN] '{address}' でエラー: {error}")
+
+    geocoder = Geocoder(
+        endpoint=GsiEndpoint(args.endpoint),
+        cache=cache,
+        workers=args.workers,
+        rate_per_sec=args.rate
+    )
+    start = time.perf_counter()
+    city_to_coord = geocoder.geocode_many(unique_cities, on_result=report)
+    metrics = geocoder.metrics()
+    print(
+        f"✓ ジオコーディング完了 ({time.perf_counter() - start:.1f}秒): "
+        f"キャッシュ {metrics['cached']:,}件 / 取得 {metrics['found']:,}件 / "
+        f"該当なし {metrics['not_found']:,}件 / 失敗 {metrics['failed']:,}件 / 再試行 {metrics['retries']:,}回"
+    )
+    if metrics['failed']:
+        print("  失敗した地域はキャッシュされていません。再実行すると再取得します。")
+
+    coordinates = df[args.column].map(city_to_coord)
+    df["lat"] = coordinates.map(lambda c: c[0] if c else None)
+    df["lon"] = coordinates.map(lambda c: c[1] if c else None)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.output, index=False, encoding="utf-8-sig")
+    print(f"✓ 出力完了: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
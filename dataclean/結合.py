@@ -1,42 +1,61 @@
+"""経済影響データと人口データの結合スクリプト
+
+経済影響データ（economic_impact.csv）の全行に、Area と一致する市町村の人口（最新の調査年）を
+POPULATION として付与し、economic_impact_population.csv に出力します。
+市町村名は全角・空白・都道府県名・郡名の違いを正規化して照合し、照合できた割合を表示します。
+伊達市・府中市のような同名の市町村は事故地点に最も近い候補に決め、名前で照合できない行は
+最寄りの市区町村代表点に割り当てます。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
 import pandas as pd
 
-# CSVファイルを読み込む
-economic_df = pd.read_csv('/Users/tomoyakato/開発/AccVis/data/accidents/economic_impact.csv')
-population_df = pd.read_csv('/Users/tomoyakato/開発/AccVis/data/accidents/output_population.csv')
-
-# それぞれのデータフレームでAreaと市町村を重複削除
-economic_distinct = economic_df.drop_duplicates(subset=['Area'])
-population_distinct = population_df.drop_duplicates(subset=['市町村'])
-
-# 重複削除後のデータで結合
-merged_df = pd.merge(
-    economic_distinct,
-    population_distinct,
-    left_on='Area',
-    right_on='市町村',
-    how='inner'
-)
-
-# 結果を確認
-print(f"economic_df: {len(economic_df)}行 → distinct後: {len(economic_distinct)}行")
-print(f"population_df: {len(population_df)}行 → distinct後: {len(population_distinct)}行")
-print(f"merged_df: {len(merged_df)}行")
-print("\n結合後のカラム:")
-print(merged_df.columns.tolist())
-print("\n結合後の最初の5行:")
-print(merged_df.head())
-
-# 必要なカラムのみを選択
-required_columns = [
-    'LATITUDE',
-    'LONGITUDE',
-    'ACCIDENT_TYPE_(CATEGORY)',
-    'ROAD_TYPE',
-    'WEATHER',
-    'IMPACT',
-    'A6103_流出人口（県内他市区町村で従業・通学している人口）【人】'
-]
-merged_df = merged_df[required_columns]
-
-# 必要に応じて結果を保存
-merged_df.to_csv('/Users/tomoyakato/開発/AccVis/data/accidents/merged_data.csv', index=False)
\ No newline at end of file
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import ECONOMIC_IMPACT_FILE, ECONOMIC_IMPACT_POPULATION_FILE, POPULATION_DATA_FILE  # noqa: E402
+from src.population_join import join_population, prepare_population  # noqa: E402
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="経済影響データと人口データを結合")
+    parser.add_argument('--economic', type=Path, default=ECONOMIC_IMPACT_FILE)
+    parser.add_argument('--population', type=Path, default=POPULATION_DATA_FILE)
+    parser.add_argument('--output', type=Path, default=ECONOMIC_IMPACT_POPULATION_FILE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("経済影響データ × 人口データ 結合スクリプト")
+    print("=" * 60)
+
+    # CSVファイルを読み込む
+    economic_df = pd.read_csv(args.economic, encoding='utf-8-sig')
+    population_df = prepare_population(pd.read_csv(args.population, encoding='utf-8-sig'))
+    print(f"✓ 読み込み完了: 経済影響 {len(economic_df):,}行 / 人口 {len(population_df):,}市町村")
+
+    start = time.perf_counter()
+    merged_df, report = join_population(economic_df, population_df)
+    print(f"✓ 結合完了 ({time.perf_counter() - start:.2f}秒)")
+
+    print(f"\n照合できた行: {report['matched_rows']:,} / {report['rows']:,} "
+          f"({report['matched_rows'] / max(report['rows'], 1):.1%})")
+    print(f"照合できたArea: {report['matched_distinct']:,} / {report['distinct']:,}")
+    print("規則別の行数:")
+    for rule, count in report['rows_by_rule'].items():
+        print(f"  {rule:<12} {count:,}")
+    print("照合できなかった主なArea:")
+    for area, count in report['unmatched_top'].items():
+        print(f"  {area}: {count:,}")
+
+    merged_df.to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"\n✓ 保存完了: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
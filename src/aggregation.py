@@ -0,0 +1,88 @@
+"""市区町村単位の集計
+
+フィルタ後の事故データの Area を人口データの地域（都道府県付きの市町村名）に照合して件数を集計し、
+地域の代表点に結合して、地図のカラム表示用の行（市区町村数ぶん）に縮約します。
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import COLUMN_RATE_PER, MUNICIPALITY_AGGREGATE_CACHE_MAX_ENTRIES
+from src.population_join import PopulationIndex
+
+# 集計指標 -> 表示ラベル
+MUNICIPALITY_METRICS = {
+    'count': '事故件数',
+    'rate': f'人口{COLUMN_RATE_PER // 10000}万人あたり件数',
+}
+
+
+def aggregate_by_municipality(df: pd.DataFrame, index: PopulationIndex, metric: str = 'count') -> pd.DataFrame:
+    """事故データを市区町村ごとに集計して代表点に結合
+
+    Areaは都道府県（PREFECTURE）と合わせて地域に照合し、伊達市・府中市のような同名の市町村は
+    事故地点に最も近い候補にするため、別の都道府県の市町村が1つにまとまりません。
+
+    Args:
+        df: 事故データ（Area/LATITUDE/LONGITUDEカラムを含む。PREFECTUREがあれば照合に使う）
+        index: get_population_indexの戻り値
+        metric: 'count'（件数）または 'rate'（人口比）
+
+    Returns:
+        pd.DataFrame: 市区町村（都道府県付きの地域名）/lon/lat/count/POPULATION/value/tooltip_htmlを持つデータ
+            （地域に照合できなかった行・代表点の座標がない地域は含まない。valueの降順）
+    """
+    if metric not in MUNICIPALITY_METRICS:
+        raise ValueError(f"未対応の集計指標です: {metric}")
+
+    columns = ['市区町村', 'lon', 'lat', 'count', 'POPULATION', 'value', 'tooltip_html']
+    if len(df) == 0 or 'Area' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    # 地域の行番号（-1は未照合）ごとに件数を数える
+    positions, _ = index.resolve(
+        df['Area'],
+        df['PREFECTURE'] if 'PREFECTURE' in df.columns else None,
+        df['LATITUDE'].to_numpy(dtype=float),
+        df['LONGITUDE'].to_numpy(dtype=float)
+    )
+    counts = np.bincount(positions[positions >= 0], minlength=len(index.regions))
+    rows = index.table.iloc[np.flatnonzero(counts)].dropna(subset=['lat', 'lon'])
+
+    result = pd.DataFrame({
+        '市区町村': rows['地域'].to_numpy(),
+        'lon': rows['lon'].to_numpy(),
+        'lat': rows['lat'].to_numpy(),
+        'count': counts[rows.index.to_numpy()],
+        'POPULATION': rows['POPULATION'].to_numpy()
+    })
+
+    if metric == 'rate':
+        population = result['POPULATION'].where(result['POPULATION'] > 0)
+        result['value'] = (result['count'] / population * COLUMN_RATE_PER).round(2)
+        result = result.dropna(subset=['value'])
+    else:
+        result['value'] = result['count']
+
+    # 人口がない市区町村の人口比は「-」と表示する
+    rate = (result['count'] / result['POPULATION'].replace(0, np.nan) * COLUMN_RATE_PER).round(2)
+    result['tooltip_html'] = (
+        '<b>市区町村:</b> ' + result['市区町村'].astype(str)
+        + '<br/><b>事故件数:</b> ' + result['count'].astype(str)
+        + '<br/><b>' + MUNICIPALITY_METRICS['rate'] + ':</b> '
+        + rate.astype(str).where(rate.notna(), '-')
+    )
+
+    return result.sort_values('value', ascending=False).reset_index(drop=True)[columns]
+
+
+@st.cache_data(max_entries=MUNICIPALITY_AGGREGATE_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_municipality_aggregate(
+    dataset_version: str,
+    filter_key: tuple,
+    metric: str,
+    _df: pd.DataFrame,
+    _index: PopulationIndex
+) -> pd.DataFrame:
+    """(データバージョン, フィルタキー, 指標) 単位でキャッシュした市区町村集計を取得"""
+    return aggregate_by_municipality(_df, _index, metric)
@@ -0,0 +1,107 @@
+"""時系列アニメーション用フレームの事前計算
+
+事故データを (時間バケット × 空間セル) のキューブに1回で集計し、
+時間バケットごとのフレーム（セル中心座標と件数）に分割します。
+フレームはフィルタキー単位でキャッシュし、再生中はキャッシュを参照するだけにします。
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import ANIMATION_CACHE_MAX_ENTRIES, ANIMATION_CELL_DEGREES
+
+# バケット種別 -> (表示ラベル, フレーム数, フレーム名の書式)
+ANIMATION_BUCKETS = {
+    'hour': ('時間帯', 24, '{}時'),
+    'month': ('月', 12, '{}月'),
+}
+
+
+def _bucket_index(times: pd.Series, bucket: str) -> np.ndarray:
+    """日時から0始まりのバケット番号を計算"""
+    if bucket == 'hour':
+        return times.dt.hour.to_numpy()
+    if bucket == 'month':
+        return times.dt.month.to_numpy() - 1
+    raise ValueError(f"未対応のバケット種別です: {bucket}")
+
+
+def build_temporal_frames(
+    df: pd.DataFrame,
+    bucket: str,
+    cell_degrees: float = ANIMATION_CELL_DEGREES
+) -> Dict[int, pd.DataFrame]:
+    """時間バケットごとの密度フレームを作成
+
+    Args:
+        df: 事故データ（OCCURRENCE_DATE_AND_TIME/LATITUDE/LONGITUDEを含む）
+        bucket: 'hour'（0-23時）または 'month'（1-12月）
+        cell_degrees: 空間セルの大きさ（度）
+
+    Returns:
+        Dict[int, pd.DataFrame]: フレーム番号 -> LONGITUDE/LATITUDE/countのDataFrame
+            （事故のないフレームも空のDataFrameとして含む）
+    """
+    n_frames = ANIMATION_BUCKETS[bucket][1]
+    empty = pd.DataFrame({'LONGITUDE': [], 'LATITUDE': [], 'count': []})
+
+    valid = df.dropna(subset=['OCCURRENCE_DATE_AND_TIME', 'LATITUDE', 'LONGITUDE'])
+    if len(valid) == 0:
+        return {frame: empty for frame in range(n_frames)}
+
+    frame_idx = _bucket_index(valid['OCCURRENCE_DATE_AND_TIME'], bucket).astype(np.int64)
+    cell_x = np.floor(valid['LONGITUDE'].to_numpy(dtype=float) / cell_degrees).astype(np.int64)
+    cell_y = np.floor(valid['LATITUDE'].to_numpy(dtype=float) / cell_degrees).astype(np.int64)
+
+    # キューブの各軸を0始まりに詰めて1次元キーにまとめ、1回のソートで集計する
+    x0, y0 = cell_x.min(), cell_y.min()
+    nx = int(cell_x.max() - x0 + 1)
+    ny = int(cell_y.max() - y0 + 1)
+    keys = (frame_idx * ny + (cell_y - y0)) * nx + (cell_x - x0)
+    unique_keys, counts = np.unique(keys, return_counts=True)
+
+    frames_of_keys = unique_keys // (nx * ny)
+    cells = unique_keys % (nx * ny)
+    lon = (cells % nx + x0 + 0.5) * cell_degrees
+    lat = (cells // nx + y0 + 0.5) * cell_degrees
+
+    # unique_keysはフレーム番号順に並ぶので、境界で分割する
+    bounds = np.searchsorted(frames_of_keys, np.arange(n_frames + 1))
+    frames = {}
+    for frame in range(n_frames):
+        start, end = bounds[frame], bounds[frame + 1]
+        frames[frame] = pd.DataFrame({
+            'LONGITUDE': lon[start:end],
+            'LATITUDE': lat[start:end],
+            'count': counts[start:end]
+        })
+    return frames
+
+
+@st.cache_data(max_entries=ANIMATION_CACHE_MAX_ENTRIES, show_spinner="フレームを計算中...")
+def get_temporal_frames(
+    dataset_version: str,
+    filter_key: tuple,
+    bucket: str,
+    _df: pd.DataFrame
+) -> Dict[int, pd.DataFrame]:
+    """フィルタキー単位でキャッシュしたフレームを取得
+
+    Args:
+        dataset_version: データセットのバージョン
+        filter_key: フィルタキー
+        bucket: バケット種別
+        _df: フィルタ済みの事故データ（キャッシュキーには含めない）
+
+    Returns:
+        Dict[int, pd.DataFrame]: フレーム番号 -> フレームデータ
+    """
+    return build_temporal_frames(_df, bucket)
+
+
+def format_frame_label(bucket: str, frame: int) -> str:
+    """フレーム番号を表示用ラベルに変換（月は1始まり）"""
+    label_format = ANIMATION_BUCKETS[bucket][2]
+    return label_format.format(frame + 1 if bucket == 'month' else frame)
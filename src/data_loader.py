@@ -1,18 +1,72 @@
 """データ読み込み・キャッシング"""
+import hashlib
+from pathlib import Path
 import pandas as pd
 import streamlit as st
-from config import ACCIDENT_DATA_FILE, PREDICTED_DATA_FILE
+from config import (
+    ACCIDENT_DATA_FILE,
+    PREDICTED_DATA_FILE,
+    POPULATION_DATA_FILE,
+    REBUILD_AREA_FROM_COORDINATES
+)
+from src.geojson_io import read_geojson
+from src.population_join import PopulationIndex, prepare_population, rebuild_area
+from src.text_normalize import normalize_places
 
 
 @st.cache_data
-def load_accident_data() -> pd.DataFrame:
-    """CSV形式の事故データを読み込み
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """ファイル内容のハッシュを計算（mtime・サイズが変わらない限りキャッシュ）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def get_file_version(path: Path) -> str:
+    """ファイルのバージョン文字列を取得
+
+    Args:
+        path: 対象ファイルのパス
 
     Returns:
-        pd.DataFrame: 事故データ（日時はdatetime型に変換済み）
+        str: 内容ハッシュ先頭12桁（ファイルが存在しない場合は'missing'）
     """
+    if not path.exists():
+        return 'missing'
+    stat = path.stat()
+    return _hash_file(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def get_dataset_version() -> str:
+    """事故データセットのバージョン文字列を取得
+
+    Returns:
+        str: 事故データファイルの内容ハッシュ
+    """
+    return get_file_version(ACCIDENT_DATA_FILE)
+
+
+def read_accident_file(path: Path) -> pd.DataFrame:
+    """拡張子に応じて事故データファイルを読み込み（.geojson/.json はGeoJSON、それ以外はCSV）"""
+    if path.suffix.lower() in ('.geojson', '.json'):
+        return read_geojson(path)
     # CSVファイルを読み込み（エラー行はスキップ）
-    df = pd.read_csv(ACCIDENT_DATA_FILE, on_bad_lines='skip', encoding='utf-8')
+    return pd.read_csv(path, on_bad_lines='skip', encoding='utf-8')
+
+
+@st.cache_data(max_entries=2)
+def load_accident_data(dataset_version: str = '') -> pd.DataFrame:
+    """事故データ（CSVまたはGeoJSON）を読み込み
+
+    Args:
+        dataset_version: キャッシュキー（get_dataset_versionの値。data.csvが更新されると読み直す）
+
+    Returns:
+        pd.DataFrame: 事故データ（日時はdatetime型に変換済み）
+    """
+    df = read_accident_file(ACCIDENT_DATA_FILE)
 
     # 日時をdatetime型に変換（エラーは強制的に無視）
     df['OCCURRENCE_DATE_AND_TIME'] = pd.to_datetime(
@@ -27,18 +81,42 @@ def load_accident_data() -> pd.DataFrame:
     # 緯度経度が欠損している行も除外
     df = df.dropna(subset=['LATITUDE', 'LONGITUDE'])
 
+    # 全角・半角や都道府県名・【】の有無で同じ場所が別々に集計されないよう Area / LOCATION を揃え、
+    # 都道府県・路線・キロポストの列を追加する
+    places = normalize_places(df)
+    df[places.columns] = places
+
+    if REBUILD_AREA_FROM_COORDINATES and POPULATION_DATA_FILE.exists():
+        # Areaを都道府県付きの地域名に揃え（同名の市町村は座標で判別）、
+        # 高速道路のキロポストなど市町村名でないAreaは座標の最寄りの市区町村にする
+        df['Area'] = rebuild_area(df, get_population_index(get_file_version(POPULATION_DATA_FILE)))
+
     return df
 
 
-@st.cache_data
-def load_predicted_data() -> pd.DataFrame:
+@st.cache_data(max_entries=2)
+def load_predicted_data(file_version: str = '') -> pd.DataFrame:
     """予測された事故位置データを読み込み
 
+    Args:
+        file_version: キャッシュキー（get_file_versionの値。パイプラインで再生成されると読み直す）
+
     Returns:
         pd.DataFrame: 予測データ（PREDICTED_LATITUDE/LONGITUDE/IMPACTを含む）
     """
     df = pd.read_csv(PREDICTED_DATA_FILE, on_bad_lines='skip', encoding='utf-8')
+    return prepare_predicted_frame(df)
 
+
+def prepare_predicted_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """予測結果（PREDICTED_LATITUDE/LONGITUDE/IMPACT）を地図表示用の形式に変換
+
+    Args:
+        df: 予測結果（predicted_locations_score.csv、または LocationModel.predict の戻り値）
+
+    Returns:
+        pd.DataFrame: LATITUDE/LONGITUDE とツールチップ用の補助カラムを持つデータ
+    """
     # 位置カラムを統一
     df = df.rename(columns={
         'PREDICTED_LATITUDE': 'LATITUDE',
@@ -53,3 +131,9 @@ def load_predicted_data() -> pd.DataFrame:
     df['source_label'] = '予測'
 
     return df
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_population_index(file_version: str = '') -> PopulationIndex:
+    """人口データのバージョン単位でキャッシュした地域の索引（名前の照合と代表点の最寄り検索）を取得"""
+    return PopulationIndex(prepare_population(pd.read_csv(POPULATION_DATA_FILE, encoding='utf-8-sig')))
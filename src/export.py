@@ -0,0 +1,186 @@
+"""データのエクスポート
+
+フィルタ後の事故データや要望データを EXPORT_CHUNK_ROWS 行ずつ CSV / Parquet / GeoJSON に
+書き出します。全件の文字列やバイト列をメモリ上に組み立てないため、使用メモリは
+チャンクの大きさで頭打ちになります。書き出したファイルは (種類, バージョン, フィルタキー, 形式)
+ごとに data/exports/ に保存し、同じ条件の再ダウンロードでは再生成しません。
+"""
+import codecs
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import EXPORT_DIR, EXPORT_CHUNK_ROWS, EXPORT_MAX_FILES
+
+# 形式 -> (表示名, MIMEタイプ, 拡張子)
+EXPORT_FORMATS = {
+    'csv': ('CSV', 'text/csv', '.csv'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet', '.parquet'),
+    'geojson': ('GeoJSON', 'application/geo+json', '.geojson'),
+}
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """DataFrameを行方向のチャンクに分割（コピーせずにスライスを返す）"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df: pd.DataFrame, f: BinaryIO, chunk_rows: int = EXPORT_CHUNK_ROWS) -> None:
+    """CSV（Excelで開けるようBOM付きUTF-8）をチャンク単位で書き出し"""
+    f.write(codecs.BOM_UTF8)
+    header = True
+    for chunk in iter_chunks(df, chunk_rows):
+        f.write(chunk.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+    if header:
+        f.write(df.iloc[:0].to_csv(index=False).encode('utf-8'))
+
+
+def write_parquet(df: pd.DataFrame, f: BinaryIO, chunk_rows: int = EXPORT_CHUNK_ROWS) -> None:
+    """Parquetをチャンクごとの行グループとして書き出し
+
+    チャンクごとに型が揺れないよう、object型のカラムは文字列として全チャンク共通のスキーマを使います。
+    """
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    schema = pa.schema([
+        pa.field(field.name, pa.string()) if df[field.name].dtype == object else field
+        for field in schema
+    ])
+    with pq.ParquetWriter(f, schema) as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_geojson(
+    df: pd.DataFrame,
+    f: BinaryIO,
+    lat_col: str,
+    lon_col: str,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+) -> None:
+    """ポイントのFeatureCollectionとしてGeoJSONをチャンク単位で書き出し
+
+    座標のない行は出力しません。その他のカラムはpropertiesに入れます（日時はISO形式）。
+    transformを指定すると、各チャンクをプロパティに変換する前に適用します。
+    """
+    f.write(b'{"type":"FeatureCollection","features":[')
+    first = True
+    for chunk in iter_chunks(df, chunk_rows):
+        if transform is not None:
+            chunk = transform(chunk)
+        chunk = chunk.dropna(subset=[lat_col, lon_col])
+        if len(chunk) == 0:
+            continue
+        properties = chunk.drop(columns=[lat_col, lon_col]).to_json(
+            orient='records', lines=True, date_format='iso', force_ascii=False
+        ).splitlines()
+        coordinates = np.char.add(
+            np.char.add(chunk[lon_col].to_numpy().astype(str), ','),
+            chunk[lat_col].to_numpy().astype(str)
+        )
+        features = ','.join(
+            f'{{"type":"Feature","geometry":{{"type":"Point","coordinates":[{coords}]}},"properties":{props}}}'
+            for coords, props in zip(coordinates, properties)
+        )
+        if not first:
+            f.write(b',')
+        f.write(features.encode('utf-8'))
+        first = False
+    f.write(b']}')
+
+
+def write_export(
+    df: pd.DataFrame,
+    fmt: str,
+    path: Path,
+    lat_col: str,
+    lon_col: str,
+    chunk_rows: int = EXPORT_CHUNK_ROWS
+) -> Path:
+    """指定形式でファイルに書き出し（一時ファイルに書いてから置き換える）
+
+    Args:
+        df: 書き出すデータ
+        fmt: EXPORT_FORMATSのキー
+        path: 出力先
+        lat_col: 緯度カラム（GeoJSONで使用）
+        lon_col: 経度カラム（GeoJSONで使用）
+        chunk_rows: 1回に変換する行数
+
+    Returns:
+        Path: 出力先
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"未対応のエクスポート形式です: {fmt}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            if fmt == 'csv':
+                write_csv(df, f, chunk_rows)
+            elif fmt == 'parquet':
+                write_parquet(df, f, chunk_rows)
+            else:
+                write_geojson(df, f, lat_col, lon_col, chunk_rows)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return path
+
+
+def _prune_exports(keep: int = EXPORT_MAX_FILES) -> None:
+    """古いエクスポートファイルを削除"""
+    files = sorted(
+        (p for p in EXPORT_DIR.iterdir() if p.suffix in {ext for _, _, ext in EXPORT_FORMATS.values()}),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for path in files[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def export_file(
+    kind: str,
+    df: pd.DataFrame,
+    fmt: str,
+    cache_key: tuple,
+    lat_col: str = 'LATITUDE',
+    lon_col: str = 'LONGITUDE'
+) -> Path:
+    """エクスポートファイルを取得（同じ条件のファイルがあれば再利用）
+
+    Args:
+        kind: データの種類（'accidents' / 'requests'。ファイル名に使用）
+        df: 書き出すデータ
+        fmt: EXPORT_FORMATSのキー
+        cache_key: データのバージョンとフィルタを識別するキー
+        lat_col: 緯度カラム
+        lon_col: 経度カラム
+
+    Returns:
+        Path: エクスポートファイルのパス
+    """
+    digest = hashlib.sha256(repr((kind, fmt, cache_key)).encode('utf-8')).hexdigest()[:16]
+    path = EXPORT_DIR / f"{kind}_{digest}{EXPORT_FORMATS[fmt][2]}"
+    if path.exists():
+        path.touch()
+        return path
+
+    write_export(df, fmt, path, lat_col, lon_col)
+    _prune_exports()
+    return path
+
+
+def export_filename(kind: str, fmt: str) -> str:
+    """ダウンロード時のファイル名"""
+    return f"{kind}{EXPORT_FORMATS[fmt][2]}"
@@ -59,6 +59,32 @@ def apply_filters(
     return filtered_df
 
 
+def make_filter_key(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    hour_range: Optional[Tuple[int, int]] = None,
+    accident_types: Optional[List[str]] = None,
+    weather_conditions: Optional[List[str]] = None,
+    areas: Optional[List[str]] = None
+) -> Tuple:
+    """フィルタ条件からハッシュ可能なキーを生成
+
+    apply_filtersと同じ引数を受け取り、選択順に依存しない正規化済みのタプルを返します。
+    地図レイヤー等のキャッシュキーとして使用します。
+
+    Returns:
+        Tuple: フィルタキー
+    """
+    return (
+        year,
+        month,
+        tuple(hour_range) if hour_range is not None else None,
+        tuple(sorted(accident_types)) if accident_types else (),
+        tuple(sorted(weather_conditions)) if weather_conditions else (),
+        tuple(sorted(areas)) if areas else ()
+    )
+
+
 def extract_filter_options(df: pd.DataFrame) -> Dict[str, List]:
     """データから利用可能なフィルタオプションを抽出
 
@@ -0,0 +1,194 @@
+"""住所のジオコーディング
+
+住所を正規化してから重複を除き、未取得のものだけを GEOCODER_WORKERS 本のスレッドで
+問い合わせます。リクエストはトークンバケットで GEOCODER_RATE_PER_SEC 件/秒 に抑え、
+一時的なエラー（タイムアウト・429・5xx）は間隔を倍にしながら再試行します。
+
+結果は1件取得するごとにキャッシュ（JSONL）へ追記するため、途中で止まっても
+次回はキャッシュにない住所から再開します。問い合わせ先はendpointとして差し替えられます
+（住所を受け取り (緯度, 経度) または該当なしのNoneを返す関数）。
+"""
+import json
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+from config import (
+    GEOCODER_ENDPOINT,
+    GEOCODER_CACHE_FILE,
+    GEOCODER_WORKERS,
+    GEOCODER_RATE_PER_SEC,
+    GEOCODER_BURST,
+    GEOCODER_TIMEOUT_SEC,
+    GEOCODER_MAX_RETRIES,
+    GEOCODER_RETRY_BACKOFF_SEC
+)
+from src.utils import TokenBucket
+
+Coordinate = Tuple[float, float]
+Endpoint = Callable[[str], Optional[Coordinate]]
+
+# 再試行するHTTPステータス
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def normalize_address(address: str) -> str:
+    """住所を正規化（全角英数・空白の統一、連続する空白の除去）"""
+    return ' '.join(unicodedata.normalize('NFKC', str(address)).split())
+
+
+class GeocodeError(Exception):
+    """再試行しても座標を取得できなかった"""
+
+
+class GsiEndpoint:
+    """国土地理院 住所検索APIへの問い合わせ"""
+
+    def __init__(self, url: str = GEOCODER_ENDPOINT, timeout: float = GEOCODER_TIMEOUT_SEC):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, address: str) -> Optional[Coordinate]:
+        query = urllib.parse.urlencode({'q': address})
+        with urllib.request.urlopen(f"{self.url}?{query}", timeout=self.timeout) as resp:
+            data = json.load(resp)
+        if not data:
+            return None
+        # 最初の候補を採用（coordinatesは [経度, 緯度]）
+        lon, lat = data[0]['geometry']['coordinates']
+        return float(lat), float(lon)
+
+
+class GeocodeCache:
+    """正規化した住所 -> 座標 の追記専用キャッシュ
+
+    該当なしの住所もNoneとして記録し、再実行時に問い合わせ直しません。
+    """
+
+    def __init__(self, path: Path = GEOCODER_CACHE_FILE):
+        self.path = path
+        self._entries: dict[str, Optional[Coordinate]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 書き込み途中で止まった最終行は読み飛ばす
+                        continue
+                    coordinate = entry.get('coordinate')
+                    self._entries[entry['address']] = tuple(coordinate) if coordinate else None
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, address: str) -> Optional[Coordinate]:
+        return self._entries.get(address)
+
+    def put(self, address: str, coordinate: Optional[Coordinate]) -> None:
+        """結果を記録してファイルに追記"""
+        line = json.dumps({'address': address, 'coordinate': coordinate}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._entries[address] = coordinate
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+class Geocoder:
+    """キャッシュ・レート制限付きの並列ジオコーダ"""
+
+    def __init__(
+        self,
+        endpoint: Optional[Endpoint] = None,
+        cache: Optional[GeocodeCache] = None,
+        workers: int = GEOCODER_WORKERS,
+        rate_per_sec: float = GEOCODER_RATE_PER_SEC,
+        burst: int = GEOCODER_BURST,
+        max_retries: int = GEOCODER_MAX_RETRIES,
+        retry_backoff: float = GEOCODER_RETRY_BACKOFF_SEC
+    ):
+        self.endpoint = endpoint if endpoint is not None else GsiEndpoint()
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._lock = threading.Lock()
+        self._stats = {'cached': 0, 'requested': 0, 'found': 0, 'not_found': 0, 'failed': 0, 'retries': 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _lookup(self, address: str) -> Optional[Coordinate]:
+        """1件問い合わせ（一時的なエラーは再試行）"""
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+            try:
+                return self.endpoint(address)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise GeocodeError(f"{address}: HTTP {e.code}") from e
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise GeocodeError(f"{address}: {e}") from e
+            self._count('retries')
+            time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _geocode_one(self, address: str, on_result: Optional[Callable]) -> None:
+        self._count('requested')
+        try:
+            coordinate = self._lookup(address)
+        except (GeocodeError, ValueError, KeyError, IndexError) as e:
+            # 失敗した住所はキャッシュせず、次回の実行で再度問い合わせる
+            self._count('failed')
+            if on_result:
+                on_result(address, None, e)
+            return
+        self.cache.put(address, coordinate)
+        self._count('found' if coordinate else 'not_found')
+        if on_result:
+            on_result(address, coordinate, None)
+
+    def geocode_many(
+        self,
+        addresses: Iterable[str],
+        on_result: Optional[Callable[[str, Optional[Coordinate], Optional[Exception]], None]] = None
+    ) -> dict[str, Optional[Coordinate]]:
+        """住所をまとめてジオコーディング
+
+        Args:
+            addresses: 住所（重複・表記揺れを含んでよい）
+            on_result: 1件問い合わせるごとに (正規化した住所, 座標, 例外) で呼ばれる関数
+
+        Returns:
+            dict[str, Optional[Coordinate]]: 元の住所 -> (緯度, 経度)（該当なし・失敗はNone）
+        """
+        originals = [address for address in dict.fromkeys(addresses) if isinstance(address, str)]
+        normalized = {address: normalize_address(address) for address in originals}
+        pending = [key for key in dict.fromkeys(normalized.values()) if key not in self.cache]
+        with self._lock:
+            self._stats['cached'] += len(set(normalized.values())) - len(pending)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='geocoder') as executor:
+                # 例外は_geocode_one内で処理するため、結果を待つだけでよい
+                list(executor.map(lambda key: self._geocode_one(key, on_result), pending))
+
+        return {address: self.cache.get(key) for address, key in normalized.items()}
+
+    def metrics(self) -> dict:
+        """キャッシュヒット・問い合わせ・再試行などの件数を取得"""
+        with self._lock:
+            return dict(self._stats)
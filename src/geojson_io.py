@@ -0,0 +1,186 @@
+"""事故データのGeoJSON読み書き
+
+読み込みはファイルをブロック単位で読み進め、features配列の要素を1件ずつ
+json.JSONDecoder.raw_decode でデコードします。デコード済みのFeatureは
+GEOJSON_CHUNK_FEATURES 件ごとにDataFrameへ変換して手放すため、文書全体を
+Pythonの辞書として保持することはありません。プロパティは docs/geo.json の
+スキーマから load_accident_data のカラムへ対応付けます。
+書き出しは逆の対応付けでチャンク単位に行います。
+"""
+import json
+import re
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import pandas as pd
+
+from config import GEOJSON_CHUNK_FEATURES, GEOJSON_READ_BLOCK_CHARS
+from src.export import write_geojson
+
+# docs/geo.json のプロパティ -> 事故データのカラム
+GEOJSON_PROPERTY_COLUMNS = {
+    'accident_id': 'ACCIDENT_ID',
+    'timestamp': 'OCCURRENCE_DATE_AND_TIME',
+    'weather': 'WEATHER',
+    'accident_type': 'ACCIDENT_TYPE_(CATEGORY)',
+    'prefecture': 'PREFECTURE',
+    'city': 'Area',
+    'road_type': 'ROAD_TYPE',
+}
+COLUMN_GEOJSON_PROPERTIES = {column: prop for prop, column in GEOJSON_PROPERTY_COLUMNS.items()}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 要素間の空白と区切りのカンマ
+_DELIMITER = re.compile(r'[ \t\n\r]*(?:,[ \t\n\r]*)?')
+
+
+class _FeatureScanner:
+    """features配列の要素を先頭から1件ずつ取り出す"""
+
+    def __init__(self, f, block_chars: int):
+        self._f = f
+        self._block_chars = block_chars
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """バッファを読み進める（読み込み済みの部分は捨てる）"""
+        if self._eof:
+            return False
+        block = self._f.read(self._block_chars)
+        if not block:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + block
+        self._pos = 0
+        return True
+
+    def _peek(self, skip=_WHITESPACE) -> str:
+        """空白（skipに一致する部分）を読み飛ばして次の1文字を返す（終端では空文字）"""
+        while True:
+            self._pos = skip.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _decode(self):
+        """現在位置のJSON値を1つデコードして読み進める"""
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # 値がバッファの末尾で切れている場合は読み足して再試行する
+                if not self._fill():
+                    raise
+                continue
+            # 数値はバッファの末尾で切れていてもデコードできてしまうため、末尾まで使った場合は読み足して確かめる
+            if end < len(self._buffer) or not self._fill():
+                break
+        self._pos = end
+        return value
+
+    def _expect(self, char: str, message: str) -> None:
+        if self._peek() != char:
+            raise ValueError(message)
+        self._pos += 1
+
+    def seek_features(self) -> None:
+        """トップレベルのオブジェクトのキーを順に読み、"features": [ の直後まで読み進める
+
+        features以外のキーの値（properties・bbox・crsなど）は読み飛ばします。
+        """
+        self._expect('{', "GeoJSONのトップレベルがオブジェクトではありません")
+        while True:
+            head = self._peek(_DELIMITER)
+            if head == '}' or head == '':
+                raise ValueError("GeoJSONにfeaturesがありません")
+            if head != '"':
+                raise ValueError("GeoJSONのトップレベルのキーが不正です")
+            key = self._decode()
+            self._expect(':', "GeoJSONのトップレベルのキーの後に':'がありません")
+            if key == 'features':
+                self._expect('[', "GeoJSONのfeaturesが配列ではありません")
+                return
+            self._peek()
+            self._decode()
+
+    def __iter__(self) -> Iterator[dict]:
+        while True:
+            head = self._peek(_DELIMITER)
+            if head == ']':
+                return
+            if head == '':
+                raise ValueError("GeoJSONのfeatures配列が途中で終わっています")
+            yield self._decode()
+
+
+def _features_to_frame(features: list[dict]) -> pd.DataFrame:
+    """Featureのリストを事故データのカラムを持つDataFrameに変換"""
+    df = pd.DataFrame.from_records([feature.get('properties') or {} for feature in features])
+    df = df.rename(columns=GEOJSON_PROPERTY_COLUMNS)
+    coordinates = [
+        (feature.get('geometry') or {}).get('coordinates') or (None, None)
+        for feature in features
+    ]
+    df['LONGITUDE'] = pd.to_numeric([c[0] for c in coordinates], errors='coerce')
+    df['LATITUDE'] = pd.to_numeric([c[1] for c in coordinates], errors='coerce')
+    if 'Area' in df.columns and 'LOCATION' not in df.columns:
+        # CSVのLOCATION（発生場所の説明）に相当する項目がないため、都道府県と市区町村から組み立てる
+        prefecture = df['PREFECTURE'].fillna('') if 'PREFECTURE' in df.columns else ''
+        df['LOCATION'] = prefecture + df['Area'].fillna('')
+    return df
+
+
+def iter_geojson_chunks(
+    path: Path,
+    chunk_features: int = GEOJSON_CHUNK_FEATURES,
+    block_chars: int = GEOJSON_READ_BLOCK_CHARS
+) -> Iterator[pd.DataFrame]:
+    """GeoJSONのFeatureCollectionをチャンクごとのDataFrameとして読み込み
+
+    Args:
+        path: GeoJSONファイルのパス
+        chunk_features: 1チャンクのFeature数
+        block_chars: 1回に読み込む文字数
+
+    Yields:
+        pd.DataFrame: LATITUDE/LONGITUDEとプロパティ（事故データのカラム名に変換済み）
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        scanner = _FeatureScanner(f, block_chars)
+        scanner.seek_features()
+        batch = []
+        for feature in scanner:
+            batch.append(feature)
+            if len(batch) >= chunk_features:
+                yield _features_to_frame(batch)
+                batch = []
+        if batch:
+            yield _features_to_frame(batch)
+
+
+def read_geojson(path: Path, chunk_features: int = GEOJSON_CHUNK_FEATURES) -> pd.DataFrame:
+    """GeoJSONのFeatureCollectionを事故データのDataFrameとして読み込み"""
+    chunks = list(iter_geojson_chunks(path, chunk_features))
+    if not chunks:
+        return pd.DataFrame(columns=['LATITUDE', 'LONGITUDE'] + list(GEOJSON_PROPERTY_COLUMNS.values()))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _to_geojson_properties(chunk: pd.DataFrame) -> pd.DataFrame:
+    """事故データのカラムを docs/geo.json のプロパティ名・形式に変換"""
+    out = chunk.rename(columns=COLUMN_GEOJSON_PROPERTIES)
+    if 'timestamp' in out.columns and pd.api.types.is_datetime64_any_dtype(out['timestamp']):
+        out['timestamp'] = out['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    return out
+
+
+def write_accident_geojson(df: pd.DataFrame, f: BinaryIO) -> None:
+    """事故データを docs/geo.json のスキーマでGeoJSONにチャンク単位で書き出し
+
+    スキーマにないカラムはカラム名のままプロパティに含めます（read_geojsonで元のカラムに戻ります）。
+    """
+    write_geojson(df, f, 'LATITUDE', 'LONGITUDE', transform=_to_geojson_properties)
@@ -0,0 +1,291 @@
+"""投稿画像のバックグラウンド処理と内容アドレス方式の保存
+
+アップロードはチャンク単位でステージング領域へ書き出しながらSHA-256を計算し、
+そのハッシュを画像のキーにします。保存先は images/<先頭2桁>/<次の2桁>/<ハッシュ>.jpg の
+ようにハッシュの先頭でシャーディングし、同じ画像は1つのファイルを複数の要望から参照します。
+未処理の画像は上限付きのスレッドプールに渡し、リサイズ・EXIF除去・サイズ目標付きの
+再エンコード・サムネイル生成をStreamlitのリクエスト外で行います。保存先のパスは
+ハッシュから決まるため、投稿処理は画像の処理完了を待たずにメタデータを保存できます。
+サムネイルは「要望の多い地点」の表に表示します（thumbnail_data_url）。
+どの要望からも参照されなくなった画像は collect_garbage で削除します。
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Tuple
+
+import streamlit as st
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from config import (
+    PROJECT_ROOT,
+    REQUESTS_IMAGES_DIR,
+    REQUESTS_THUMBNAILS_DIR,
+    IMAGE_MAX_DIMENSION,
+    IMAGE_TARGET_BYTES,
+    IMAGE_MIN_QUALITY,
+    IMAGE_THUMBNAIL_SIZE,
+    IMAGE_WORKER_THREADS,
+    IMAGE_QUEUE_MAX,
+    IMAGE_MAX_RETRIES,
+    IMAGE_RETRY_BACKOFF_SEC,
+    IMAGE_GC_GRACE_SEC
+)
+
+# 品質を下げながら試すJPEG品質の段階
+JPEG_QUALITY_STEPS = (85, 75, 65, 55, 45)
+STAGING_DIR = REQUESTS_IMAGES_DIR / ".staging"
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _shard(digest: str) -> Path:
+    return Path(digest[:2]) / digest[2:4] / f"{digest}.jpg"
+
+
+def image_paths(digest: str) -> Tuple[Path, Path]:
+    """画像のハッシュから画像とサムネイルの保存先を決定
+
+    Returns:
+        Tuple[Path, Path]: (画像のパス, サムネイルのパス)
+    """
+    return REQUESTS_IMAGES_DIR / _shard(digest), REQUESTS_THUMBNAILS_DIR / _shard(digest)
+
+
+def is_stored(digest: str) -> bool:
+    """同じ内容の画像が保存済みか"""
+    return all(path.exists() for path in image_paths(digest))
+
+
+def stage_upload(fileobj: BinaryIO) -> Tuple[str, Path]:
+    """アップロードをチャンク単位でステージング領域へ書き出しながらハッシュを計算
+
+    Args:
+        fileobj: アップロードファイル（読み込み可能なバイナリストリーム）
+
+    Returns:
+        Tuple[str, Path]: (SHA-256の16進文字列, ステージングしたファイルのパス)
+    """
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    staged_path = STAGING_DIR / f"{uuid.uuid4().hex}.upload"
+    hasher = hashlib.sha256()
+    fileobj.seek(0)
+    with open(staged_path, 'wb') as f:
+        while chunk := fileobj.read(HASH_CHUNK_BYTES):
+            hasher.update(chunk)
+            f.write(chunk)
+    return hasher.hexdigest(), staged_path
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _jpeg_data_url(path: Path) -> str:
+    # 保存先は内容のハッシュで決まり、同じパスの内容は変わらないため、パス単位でキャッシュする
+    return 'data:image/jpeg;base64,' + base64.b64encode(path.read_bytes()).decode('ascii')
+
+
+def thumbnail_data_url(image_path: Optional[str]) -> Optional[str]:
+    """要望のimage_pathに対応するサムネイルをdata URLで取得（表への表示用）
+
+    Args:
+        image_path: 要望データのimage_path（相対パス）
+
+    Returns:
+        Optional[str]: JPEGのdata URL。サムネイルがない場合（旧形式の画像・処理中・処理失敗）はNone
+    """
+    if not isinstance(image_path, str) or not image_path:
+        return None
+    try:
+        thumbnail_path = REQUESTS_THUMBNAILS_DIR / (PROJECT_ROOT / image_path).relative_to(REQUESTS_IMAGES_DIR)
+    except ValueError:
+        return None
+    if not thumbnail_path.exists():
+        return None
+    return _jpeg_data_url(thumbnail_path)
+
+
+def to_relative_path(path: Path) -> str:
+    """プロジェクトルートからの相対パス（要望データに保存する形式）に変換"""
+    return path.relative_to(PROJECT_ROOT).as_posix()
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """透過を白背景で合成してRGBに変換"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode_jpeg(image: Image.Image, target_bytes: int = IMAGE_TARGET_BYTES) -> bytes:
+    """サイズ目標に収まる最も高い品質でJPEGエンコード
+
+    EXIFなどのメタデータは書き出しません。品質を下限まで下げても収まらない場合は
+    下限品質の結果を返します。
+    """
+    data = b''
+    for quality in JPEG_QUALITY_STEPS:
+        if quality < IMAGE_MIN_QUALITY:
+            break
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+        data = buffer.getvalue()
+        if len(data) <= target_bytes:
+            break
+    return data
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 同じ画像が同時に処理されても一時ファイルが衝突しないよう一意な名前にする
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def process_image(source_path: Path, digest: str) -> Tuple[str, str]:
+    """画像を縮小・EXIF除去・再エンコードし、サムネイルとともにハッシュの保存先へ保存
+
+    Args:
+        source_path: ステージングしたアップロード画像のパス
+        digest: アップロード内容のハッシュ
+
+    Returns:
+        Tuple[str, str]: (画像の相対パス, サムネイルの相対パス)
+    """
+    image_path, thumbnail_path = image_paths(digest)
+    if is_stored(digest):
+        return to_relative_path(image_path), to_relative_path(thumbnail_path)
+
+    with Image.open(source_path) as source:
+        # 縮小デコード（JPEGはdraftで1/2^nのサイズから読み込む）
+        source.draft('RGB', (IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION))
+        # EXIFの回転情報を画素に反映してからメタデータを捨てる
+        image = _to_rgb(ImageOps.exif_transpose(source))
+
+    image.thumbnail((IMAGE_MAX_DIMENSION, IMAGE_MAX_DIMENSION), Image.Resampling.LANCZOS)
+    thumbnail = image.copy()
+    thumbnail.thumbnail((IMAGE_THUMBNAIL_SIZE, IMAGE_THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+
+    _write_atomic(thumbnail_path, encode_jpeg(thumbnail))
+    _write_atomic(image_path, encode_jpeg(image))
+    return to_relative_path(image_path), to_relative_path(thumbnail_path)
+
+
+class ImagePipeline:
+    """上限付きのスレッドプールで画像処理を行うワーカー"""
+
+    def __init__(self, max_workers: int = IMAGE_WORKER_THREADS, max_queue: int = IMAGE_QUEUE_MAX):
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-pipeline')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {'submitted': 0, 'processed': 0, 'failed': 0, 'retried': 0, 'rejected': 0}
+
+    def _run(self, source_path: Path, digest: str) -> Tuple[str, str]:
+        try:
+            for attempt in range(IMAGE_MAX_RETRIES + 1):
+                try:
+                    result = process_image(source_path, digest)
+                    self._count('processed')
+                    return result
+                except UnidentifiedImageError:
+                    # 画像として読めないデータは再試行しても失敗する
+                    raise
+                except (OSError, MemoryError):
+                    # 書き込み失敗などの一時的なエラーは間隔を空けて再試行する
+                    if attempt == IMAGE_MAX_RETRIES:
+                        raise
+                    self._count('retried')
+                    time.sleep(IMAGE_RETRY_BACKOFF_SEC * 2 ** attempt)
+        except Exception:
+            self._count('failed')
+            raise
+        finally:
+            source_path.unlink(missing_ok=True)
+            with self._lock:
+                self._pending -= 1
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def submit(self, source_path: Path, digest: str) -> Optional[Future]:
+        """画像処理をキューに投入（処理後にステージングしたファイルは削除する）
+
+        Returns:
+            Optional[Future]: 処理結果のFuture。キューが上限に達している場合はNone
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._stats['rejected'] += 1
+                return None
+            self._pending += 1
+            self._stats['submitted'] += 1
+        return self._executor.submit(self._run, source_path, digest)
+
+    def metrics(self) -> dict:
+        """キューの深さと処理件数を取得"""
+        with self._lock:
+            return {'queue_depth': self._pending, **self._stats}
+
+
+@st.cache_resource
+def get_image_pipeline() -> ImagePipeline:
+    """プロセス内で共有する画像処理ワーカーを取得"""
+    return ImagePipeline()
+
+
+def collect_garbage(
+    referenced_paths: Iterable[str],
+    grace_seconds: float = IMAGE_GC_GRACE_SEC,
+    dry_run: bool = False
+) -> Tuple[list[Path], list[Path]]:
+    """どの要望からも参照されていない画像とサムネイルを削除
+
+    投稿直後（メタデータ保存前）の画像を消さないよう、更新から grace_seconds 以上
+    経過したファイルだけを対象にします。シャーディング前の旧形式の画像は対象外です。
+
+    Args:
+        referenced_paths: 要望のimage_path（相対パス）の列。要望ストアに加えて、
+            投稿キューの反映待ち・退避済みの要望の分も含める
+        grace_seconds: 削除対象とする最終更新からの経過秒数
+        dry_run: Trueの場合は削除せず対象のみ返す
+
+    Returns:
+        Tuple[list[Path], list[Path]]: 削除した（dry_runでは削除対象の）画像のパスと、
+            処理途中で残ったステージングファイル・一時ファイルのパス
+    """
+    referenced = {PROJECT_ROOT / path for path in referenced_paths if path}
+    cutoff = time.time() - grace_seconds
+    removed = []
+
+    for image_path in REQUESTS_IMAGES_DIR.glob('??/??/*.jpg'):
+        if image_path in referenced or image_path.stat().st_mtime > cutoff:
+            continue
+        thumbnail_path = REQUESTS_THUMBNAILS_DIR / image_path.relative_to(REQUESTS_IMAGES_DIR)
+        if not dry_run:
+            image_path.unlink(missing_ok=True)
+            thumbnail_path.unlink(missing_ok=True)
+        removed.append(image_path)
+
+    # 処理途中で中断したステージングファイル・一時ファイルも掃除する
+    leftovers = [
+        path for path in list(STAGING_DIR.glob('*.upload')) + list(REQUESTS_IMAGES_DIR.rglob('*.tmp'))
+        if path.stat().st_mtime <= cutoff
+    ]
+    if not dry_run:
+        for path in leftovers:
+            path.unlink(missing_ok=True)
+
+    if not dry_run:
+        for directory in sorted(REQUESTS_IMAGES_DIR.rglob('*'), reverse=True):
+            if directory.is_dir() and directory != STAGING_DIR and not any(directory.iterdir()):
+                os.rmdir(directory)
+    return removed, leftovers
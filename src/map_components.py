@@ -1,7 +1,22 @@
 """地図・ヒートマップ描画"""
+import json
+import numpy as np
 import pydeck as pdk
 import pandas as pd
-from config import HEATMAP_RADIUS_PIXELS, HEATMAP_INTENSITY, HEATMAP_THRESHOLD
+import streamlit as st
+from config import (
+    HEATMAP_RADIUS_PIXELS,
+    HEATMAP_INTENSITY,
+    HEATMAP_THRESHOLD,
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+    DECK_CACHE_MAX_ENTRIES,
+    COLUMN_RADIUS_METERS,
+    COLUMN_MAX_ELEVATION_METERS,
+    REPORT_CLUSTER_RADIUS_M,
+    HOTSPOT_MIN_RADIUS_M
+)
+from src.raster import render_density_bitmap, viewport_tile_range
 
 
 RED_RANGE = [
@@ -22,6 +37,24 @@ BLUE_RANGE = [
     [33, 113, 181, 255]
 ]
 
+# 市区町村集計カラムを表示するモード -> 集計指標
+MUNICIPALITY_MODES = {
+    'municipality': 'count',
+    'municipality_rate': 'rate',
+}
+
+MAP_STYLE = 'https://basemaps.cartocdn.com/gl/voyager-gl-style/style.json'
+
+DECK_TOOLTIP = {
+    'html': '{tooltip_html}',
+    'style': {
+        'backgroundColor': 'rgba(33, 33, 33, 0.85)',
+        'color': 'white',
+        'padding': '10px',
+        'borderRadius': '6px'
+    }
+}
+
 
 def create_heatmap_layer(df: pd.DataFrame, weight_col: str | None, color_range, opacity: float = 0.8) -> pdk.Layer:
     """HeatmapLayerを作成"""
@@ -95,21 +128,165 @@ def create_scatterplot_layer(df: pd.DataFrame, color, tooltip_label: str, impact
     )
 
 
-def create_initial_view_state(center_lat: float, center_lon: float, zoom: int) -> pdk.ViewState:
+def create_tile_layer(tile_url: str) -> pdk.Layer:
+    """ローカルタイルサーバーのベクタータイルを表示するMVTLayerを作成
+
+    色・半径はタイル生成時に各ポイントのプロパティとして埋め込み済み
+    """
+    return pdk.Layer(
+        'MVTLayer',
+        data=tile_url,
+        min_zoom=TILE_MIN_ZOOM,
+        max_zoom=TILE_MAX_ZOOM,
+        binary=False,
+        point_type="'circle'",
+        point_radius_units="'pixels'",
+        get_point_radius='properties.radius',
+        get_fill_color='[properties.r, properties.g, properties.b, properties.a]',
+        stroked=False,
+        pickable=False
+    )
+
+
+def create_bitmap_layer(df: pd.DataFrame, weight_col: str | None, color_range, cache_key: tuple | None, tile_range: tuple, opacity: float = 0.8) -> pdk.Layer:
+    """サーバー側でラスタ化した密度画像を1枚のBitmapLayerとして作成"""
+    image, bounds = render_density_bitmap(df, weight_col, color_range, cache_key, tile_range)
+    return pdk.Layer(
+        'BitmapLayer',
+        image=f"'{image}'",
+        bounds=bounds,
+        opacity=opacity
+    )
+
+
+def create_risk_surface_layer(df: pd.DataFrame, opacity: float = 0.7) -> pdk.Layer:
+    """事前計算したリスク面の画像をBitmapLayerとして作成
+
+    Args:
+        df: image（PNGのdata URL）と bounds（[west, south, east, north]）を持つ1行のDataFrame
+    """
+    row = df.iloc[0]
+    return pdk.Layer(
+        'BitmapLayer',
+        image=f"'{row['image']}'",
+        bounds=list(row['bounds']),
+        opacity=opacity
+    )
+
+
+def create_column_layer(df: pd.DataFrame) -> pdk.Layer:
+    """市区町村ごとの集計値を3DのColumnLayerとして作成
+
+    Args:
+        df: aggregate_by_municipalityの戻り値（lon/lat/value/tooltip_htmlを含む）
+    """
+    data = df[['lon', 'lat', 'value', 'tooltip_html']].copy()
+    max_value = data['value'].max() if len(data) else 0
+    ratio = data['value'] / max_value if max_value > 0 else data['value'] * 0
+    data['elevation'] = ratio * COLUMN_MAX_ELEVATION_METERS
+
+    levels = (ratio * (len(RED_RANGE) - 1)).round().astype(int)
+    data['color'] = [RED_RANGE[level] for level in levels]
+
+    return pdk.Layer(
+        'ColumnLayer',
+        data=data,
+        get_position=['lon', 'lat'],
+        get_elevation='elevation',
+        get_fill_color='color',
+        radius=COLUMN_RADIUS_METERS,
+        extruded=True,
+        pickable=True,
+        auto_highlight=True
+    )
+
+
+def create_hotspot_layer(df: pd.DataFrame) -> pdk.Layer:
+    """要望の多い地点をScatterplotLayerとして作成
+
+    円の面積は要望件数、色はスコア（要望件数と周辺事故件数）に比例させる
+
+    Args:
+        df: link_accidentsの戻り値（lon/lat/report_count/accident_count/score等を含む）
+    """
+    data = df[['lon', 'lat', 'report_count', 'accident_count', 'score', 'latest_description']].copy()
+    data['radius'] = np.maximum(REPORT_CLUSTER_RADIUS_M * np.sqrt(data['report_count'].astype(float)), HOTSPOT_MIN_RADIUS_M)
+
+    max_score = data['score'].max() if len(data) else 0
+    ratio = data['score'] / max_score if max_score > 0 else data['score'] * 0
+    levels = (ratio * (len(RED_RANGE) - 1)).round().astype(int)
+    data['color'] = [RED_RANGE[level][:3] + [200] for level in levels]
+
+    data['tooltip_html'] = (
+        '<b>要望件数:</b> ' + data['report_count'].astype(str)
+        + '<br/><b>周辺の事故件数:</b> ' + data['accident_count'].astype(str)
+        + '<br/><b>最新の要望:</b> ' + data['latest_description'].fillna('').astype(str).str.slice(0, 60)
+    )
+    data = data.drop(columns=['latest_description'])
+
+    return pdk.Layer(
+        'ScatterplotLayer',
+        data=data,
+        get_position=['lon', 'lat'],
+        get_radius='radius',
+        get_fill_color='color',
+        stroked=True,
+        get_line_color=[120, 20, 20, 220],
+        line_width_min_pixels=1,
+        pickable=True,
+        auto_highlight=True
+    )
+
+
+def create_initial_view_state(center_lat: float, center_lon: float, zoom: int, pitch: int = 0) -> pdk.ViewState:
     """ViewStateを作成"""
     return pdk.ViewState(
         latitude=center_lat,
         longitude=center_lon,
         zoom=zoom,
-        pitch=0,
+        pitch=pitch,
         bearing=0
     )
 
 
-def render_map(actual_df: pd.DataFrame, predicted_df: pd.DataFrame, center_lat: float, center_lon: float, zoom: int, mode: str) -> pdk.Deck:
-    """Pydeckマップを作成"""
+def build_layers(
+    actual_df: pd.DataFrame,
+    predicted_df: pd.DataFrame,
+    mode: str,
+    tile_url: str | None = None,
+    tile_range: tuple | None = None,
+    cache_key: tuple | None = None
+) -> list[pdk.Layer]:
+    """表示モードに応じたレイヤー一覧を作成"""
     layers = []
 
+    if mode == "tiles" and tile_url:
+        layers.append(create_tile_layer(tile_url))
+
+    if mode in MUNICIPALITY_MODES and not actual_df.empty:
+        # actual_dfには市区町村集計済みのデータが渡される
+        layers.append(create_column_layer(actual_df))
+
+    if mode == "hotspots" and not actual_df.empty:
+        # actual_dfには要望の地点クラスタ（link_accidentsの戻り値）が渡される
+        layers.append(create_hotspot_layer(actual_df))
+
+    if mode == "animation" and not actual_df.empty:
+        # actual_dfには事前集計済みのフレーム（セル中心と件数）が渡される
+        layers.append(create_heatmap_layer(actual_df, 'count', RED_RANGE, opacity=0.8))
+
+    if mode == "risk" and not actual_df.empty:
+        # actual_dfにはシナリオのリスク面（get_risk_surface_frameの戻り値）が渡される
+        layers.append(create_risk_surface_layer(actual_df))
+
+    if mode == "bitmap" and tile_range is not None:
+        if not actual_df.empty:
+            actual_key = cache_key + ('actual',) if cache_key is not None else None
+            layers.append(create_bitmap_layer(actual_df, None, RED_RANGE, actual_key, tile_range, opacity=0.8))
+        if predicted_df is not None and not predicted_df.empty:
+            predicted_key = cache_key + ('predicted',) if cache_key is not None else None
+            layers.append(create_bitmap_layer(predicted_df, 'PREDICTED_IMPACT', BLUE_RANGE, predicted_key, tile_range, opacity=0.6))
+
     if mode in ("all", "actual") and not actual_df.empty:
         layers.append(create_heatmap_layer(actual_df, None, RED_RANGE, opacity=0.8))
         layers.append(create_scatterplot_layer(actual_df, [223, 59, 48, 140], "実績", show_impact=False))
@@ -118,19 +295,75 @@ def render_map(actual_df: pd.DataFrame, predicted_df: pd.DataFrame, center_lat:
         layers.append(create_heatmap_layer(predicted_df, 'PREDICTED_IMPACT', BLUE_RANGE, opacity=0.6))
         layers.append(create_scatterplot_layer(predicted_df, [66, 133, 244, 170], "予測", impact_column='PREDICTED_IMPACT', show_impact=True))
 
-    view_state = create_initial_view_state(center_lat, center_lon, zoom)
+    return layers
 
+
+def _create_deck(layers: list[pdk.Layer], view_state: pdk.ViewState) -> pdk.Deck:
     return pdk.Deck(
         layers=layers,
         initial_view_state=view_state,
-        map_style='https://basemaps.cartocdn.com/gl/voyager-gl-style/style.json',
-        tooltip={
-            'html': '{tooltip_html}',
-            'style': {
-                'backgroundColor': 'rgba(33, 33, 33, 0.85)',
-                'color': 'white',
-                'padding': '10px',
-                'borderRadius': '6px'
-            }
-        }
+        map_style=MAP_STYLE,
+        tooltip=DECK_TOOLTIP
     )
+
+
+class CachedDeck:
+    """シリアライズ済みのDeck JSONにViewStateだけを差し込む軽量Deck
+
+    st.pydeck_chartが参照する to_json() / _tooltip を持ち、pdk.Deckの代わりに渡せます。
+    レイヤー部分のJSONはキャッシュ済みのため、再実行時のシリアライズは発生しません。
+    """
+
+    def __init__(self, spec_body: str, view_state: pdk.ViewState, tooltip: dict = DECK_TOOLTIP):
+        self._spec_body = spec_body
+        self._tooltip = tooltip
+        self.initial_view_state = view_state
+
+    def to_json(self) -> str:
+        view_json = json.dumps(json.loads(self.initial_view_state.to_json()), sort_keys=True)
+        return '{"initialViewState": ' + view_json + ', ' + self._spec_body[1:]
+
+
+@st.cache_resource(max_entries=DECK_CACHE_MAX_ENTRIES, show_spinner=False)
+def _build_deck_body(
+    dataset_version: str,
+    filter_key: tuple,
+    mode: str,
+    tile_url: str | None,
+    tile_range: tuple | None,
+    _actual_df: pd.DataFrame,
+    _predicted_df: pd.DataFrame
+) -> str:
+    """レイヤーを構築してViewStateを除いたDeck JSONを返す（キー単位でキャッシュ）"""
+    layers = build_layers(_actual_df, _predicted_df, mode, tile_url, tile_range, (dataset_version, filter_key))
+    spec = json.loads(_create_deck(layers, create_initial_view_state(0, 0, 0)).to_json())
+    spec.pop('initialViewState', None)
+    return json.dumps(spec, sort_keys=True)
+
+
+def render_map(
+    actual_df: pd.DataFrame,
+    predicted_df: pd.DataFrame,
+    center_lat: float,
+    center_lon: float,
+    zoom: int,
+    mode: str,
+    tile_url: str | None = None,
+    dataset_version: str | None = None,
+    filter_key: tuple | None = None
+) -> pdk.Deck | CachedDeck:
+    """Pydeckマップを作成
+
+    dataset_version と filter_key を指定すると、レイヤーとシリアライズ済みJSONを
+    (データバージョン, フィルタキー, モード) 単位でキャッシュし、ViewStateのみ毎回適用します。
+    サーバー描画モード（bitmap）では表示範囲のタイル範囲もキーに含めます。
+    """
+    pitch = 45 if mode in MUNICIPALITY_MODES else 0
+    view_state = create_initial_view_state(center_lat, center_lon, zoom, pitch=pitch)
+    tile_range = viewport_tile_range(center_lat, center_lon, zoom) if mode == "bitmap" else None
+
+    if dataset_version is not None and filter_key is not None:
+        spec_body = _build_deck_body(dataset_version, filter_key, mode, tile_url, tile_range, actual_df, predicted_df)
+        return CachedDeck(spec_body, view_state)
+
+    return _create_deck(build_layers(actual_df, predicted_df, mode, tile_url, tile_range), view_state)
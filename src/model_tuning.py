@@ -0,0 +1,238 @@
+"""事故地点予測モデルのハイパーパラメータ探索
+
+位置（緯度・経度）と IMPACT のモデルそれぞれについて、RandomForestRegressor の設定の候補を
+交差検証で評価し、評価データでのMAEが最小の設定を選びます。
+
+- エンコード済みの特徴量行列・予測対象・分割番号は学習データの内容ハッシュ単位で .npz に保存し、
+  すべての候補・ワーカープロセスで共有します（各プロセスは最初の1回だけ読み込む）。
+- 候補はプロセスプールで並列に評価します（各候補の学習は1スレッド）。
+- 分割ごとに評価し、途中までの平均MAEがその時点の最良値の early_stop_ratio 倍を超えた候補は
+  残りの分割を評価せずに打ち切ります。
+"""
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import product
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import LabelEncoder
+
+from config import (
+    TUNING_DIR,
+    TUNING_EARLY_STOP_RATIO,
+    TUNING_FOLDS,
+    TUNING_MAX_CANDIDATES,
+    TUNING_PARAM_GRID,
+    TUNING_WORKERS
+)
+from src.prediction import (
+    CATEGORY_COLUMNS,
+    MODEL_PARAMS,
+    TARGET_COLUMNS,
+    LocationModel,
+    model_version,
+    prepare_training_data
+)
+
+# 探索するモデル -> 予測対象（位置のモデルは緯度・経度で同じ設定を使い、MAEは両者の平均で比べる）
+SEARCH_GROUPS = {
+    'location': ['LATITUDE', 'LONGITUDE'],
+    'impact': ['IMPACT'],
+}
+
+# ワーカープロセスごとに読み込んだ特徴量キャッシュ（パス -> (X, y, folds)）
+_loaded: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+
+def prepare_search_data(
+    df: pd.DataFrame,
+    cache_dir: Path = TUNING_DIR,
+    n_folds: int = TUNING_FOLDS,
+    random_state: int = 42
+) -> Path:
+    """エンコード済みの特徴量行列と分割番号を作成して保存（同じ内容ならキャッシュを再利用）
+
+    Returns:
+        Path: キャッシュファイル（X / y / folds を持つ .npz）
+    """
+    df = prepare_training_data(df)
+    version = model_version(df, {'folds': n_folds}, random_state)
+    path = cache_dir / f"features_{version}.npz"
+    if path.exists():
+        return path
+
+    encoders = {column: LabelEncoder().fit(df[column].astype(str)) for column in CATEGORY_COLUMNS}
+    X = LocationModel(encoders, {}, version).encode(df)
+    y = df[list(TARGET_COLUMNS)].to_numpy(dtype=float)
+    folds = np.empty(len(df), dtype=np.int8)
+    splitter = KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fold, (_, test_index) in enumerate(splitter.split(X)):
+        folds[test_index] = fold
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.stem + '.tmp.npz')
+    np.savez(tmp_path, X=X, y=y, folds=folds)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_search_data(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if path not in _loaded:
+        with np.load(path) as data:
+            _loaded[path] = (data['X'], data['y'], data['folds'])
+    return _loaded[path]
+
+
+def make_candidates(
+    grid: dict = TUNING_PARAM_GRID,
+    max_candidates: int = TUNING_MAX_CANDIDATES,
+    baseline: Optional[dict] = None,
+    random_state: int = 42
+) -> list[dict]:
+    """探索する設定の候補を作成（組み合わせが多い場合は無作為に選ぶ。baselineは必ず含める）"""
+    combinations = [dict(zip(grid, values)) for values in product(*grid.values())]
+    rng = np.random.default_rng(random_state)
+    rng.shuffle(combinations)
+    candidates = [dict(baseline)] if baseline else []
+    for params in combinations:
+        if len(candidates) >= max_candidates:
+            break
+        if params not in candidates:
+            candidates.append(params)
+    return candidates
+
+
+def evaluate_candidate(
+    path: str,
+    group: str,
+    params: dict,
+    threshold: Optional[float] = None,
+    random_state: int = 42
+) -> dict:
+    """1つの候補を交差検証で評価（ワーカープロセスで実行される）
+
+    Args:
+        path: prepare_search_data のキャッシュファイル
+        group: SEARCH_GROUPS のキー
+        params: RandomForestRegressor の設定
+        threshold: 途中までの平均MAEがこれを超えたら打ち切る（Noneなら打ち切らない）
+        random_state: 学習の乱数シード
+
+    Returns:
+        dict: group/params/mae（評価した分割の平均）/mae_std/folds/status/seconds
+    """
+    X, y, folds = _load_search_data(path)
+    targets = [list(TARGET_COLUMNS).index(target) for target in SEARCH_GROUPS[group]]
+    n_folds = int(folds.max()) + 1
+    start = time.perf_counter()
+    scores = []
+    status = 'completed'
+    for fold in range(n_folds):
+        train, test = folds != fold, folds == fold
+        errors = []
+        for target in targets:
+            regressor = RandomForestRegressor(**params, random_state=random_state, n_jobs=1)
+            regressor.fit(X[train], y[train, target])
+            errors.append(mean_absolute_error(y[test, target], regressor.predict(X[test])))
+        scores.append(float(np.mean(errors)))
+        if threshold is not None and fold + 1 < n_folds and np.mean(scores) > threshold:
+            status = 'stopped'
+            break
+    return {
+        'group': group,
+        'params': params,
+        'mae': float(np.mean(scores)),
+        'mae_std': float(np.std(scores)),
+        'folds': len(scores),
+        'status': status,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_search(
+    path: Path,
+    candidates: dict[str, list[dict]],
+    workers: int = TUNING_WORKERS,
+    early_stop_ratio: Optional[float] = TUNING_EARLY_STOP_RATIO,
+    random_state: int = 42,
+    progress: Optional[Callable[[dict], None]] = None
+) -> pd.DataFrame:
+    """候補を並列に評価してリーダーボードを作成
+
+    打ち切りの基準（最良値）は、候補を投入する時点で評価を終えている候補の最良MAEです。
+    同時に評価する候補は workers 件までに抑え、結果が届くたびに基準を更新して次の候補を投入します。
+
+    Args:
+        path: prepare_search_data のキャッシュファイル
+        candidates: SEARCH_GROUPS のキー -> 候補の設定のリスト
+        workers: プロセス数（1ならこのプロセスで逐次評価。0ならCPUコア数）
+        early_stop_ratio: 打ち切りの倍率（Noneなら打ち切らない）
+        random_state: 学習の乱数シード
+        progress: 候補の評価が終わるたびに結果の辞書で呼ばれる関数
+
+    Returns:
+        pd.DataFrame: group/rank/mae/mae_std/folds/status/seconds/params（groupごとにMAEの小さい順）
+    """
+    workers = workers or os.cpu_count() or 1
+    queue = [(group, params) for group, group_candidates in candidates.items() for params in group_candidates]
+    best: dict[str, float] = {}
+    results = []
+
+    def threshold(group: str) -> Optional[float]:
+        if early_stop_ratio is None or group not in best:
+            return None
+        return best[group] * early_stop_ratio
+
+    def record(result: dict) -> None:
+        results.append(result)
+        if result['status'] == 'completed':
+            best[result['group']] = min(best.get(result['group'], np.inf), result['mae'])
+        if progress:
+            progress(result)
+
+    if workers <= 1:
+        for group, params in queue:
+            record(evaluate_candidate(str(path), group, params, threshold(group), random_state))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = set()
+            while queue or running:
+                while queue and len(running) < workers:
+                    group, params = queue.pop(0)
+                    running.add(executor.submit(
+                        evaluate_candidate, str(path), group, params, threshold(group), random_state
+                    ))
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future.result())
+
+    leaderboard = pd.DataFrame(results)
+    # 打ち切った候補は完了した候補より下に並べる
+    leaderboard['_stopped'] = leaderboard['status'] != 'completed'
+    leaderboard = leaderboard.sort_values(['group', '_stopped', 'mae']).drop(columns='_stopped')
+    leaderboard['rank'] = leaderboard.groupby('group').cumcount() + 1
+    leaderboard['params'] = leaderboard['params'].map(lambda params: json.dumps(params, sort_keys=True))
+    columns = ['group', 'rank', 'mae', 'mae_std', 'folds', 'status', 'seconds', 'params']
+    return leaderboard[columns].reset_index(drop=True)
+
+
+def best_params(leaderboard: pd.DataFrame) -> dict:
+    """リーダーボードの各groupの1位の設定を、train_location_model の params の形式に変換"""
+    params = {}
+    for group, targets in SEARCH_GROUPS.items():
+        rows = leaderboard[(leaderboard['group'] == group) & (leaderboard['status'] == 'completed')]
+        if rows.empty:
+            # 探索しなかったモデルは現在の設定のまま
+            group_params = {target: MODEL_PARAMS[target] for target in targets}
+        else:
+            best = json.loads(rows.iloc[0]['params'])
+            group_params = {target: best for target in targets}
+        params.update(group_params)
+    return params
@@ -0,0 +1,150 @@
+"""大きなCSVの並列変換
+
+CSVをバイト範囲のチャンクに分け（境界は改行に合わせる）、各チャンクをプロセスプールで
+DataFrameとして読み込んでベクトル化した変換関数を適用し、結果を元の順序で1つのCSVに書き出します。
+
+- 値はすべて文字列として読み込みます（'01100' のような先頭ゼロや表記をそのまま書き戻すため）。
+- 入力のBOMは読み飛ばし、出力は指定したエンコーディング（既定はExcel向けのBOM付きUTF-8）で書きます。
+- 同時に処理中のチャンクは workers の2倍までに抑えるため、メモリ使用量はファイルサイズに依存しません。
+- レコード内に改行を含むCSV（引用符内の改行）には対応しません。
+"""
+import codecs
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from config import CSV_TRANSFORM_CHUNK_BYTES, CSV_TRANSFORM_WORKERS
+
+Transform = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+def split_byte_ranges(path: Path, chunk_bytes: int = CSV_TRANSFORM_CHUNK_BYTES) -> tuple[bytes, list[tuple[int, int]]]:
+    """ヘッダー行と、データ部分を改行境界で区切ったバイト範囲を取得
+
+    Returns:
+        tuple[bytes, list[tuple[int, int]]]: (ヘッダー行（BOMを除く）, [(開始, 終了), ...])
+    """
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        if header.startswith(codecs.BOM_UTF8):
+            header = header[len(codecs.BOM_UTF8):]
+
+        ranges = []
+        start = data_start
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                # 範囲の終わりを次の改行の直後まで延ばす
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _read_chunk(header: bytes, data: bytes = b'') -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(header + data), dtype=str, keep_default_na=False, encoding='utf-8')
+
+
+def _transform_range(path: str, header: bytes, start: int, end: int, transform: Transform) -> tuple[str, int]:
+    """ワーカー: 1チャンクを読み込んで変換し、ヘッダー付きのCSV文字列と行数を返す"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    result = transform(_read_chunk(header, data))
+    return result.to_csv(index=False), len(result)
+
+
+def _run_ranges(
+    path: Path,
+    header: bytes,
+    ranges: list[tuple[int, int]],
+    transform: Transform,
+    workers: int
+) -> Iterator[tuple[int, str, int]]:
+    """チャンクを並列に変換し、元の順序で (範囲の番号, CSV文字列, 行数) を返す"""
+    if workers <= 1:
+        for i, (start, end) in enumerate(ranges):
+            yield (i, *_transform_range(str(path), header, start, end, transform))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        next_submit = 0
+        for i in range(len(ranges)):
+            # 処理中のチャンクを workers * 2 までに抑えて先読みする
+            while next_submit < len(ranges) and next_submit < i + workers * 2:
+                start, end = ranges[next_submit]
+                pending[next_submit] = executor.submit(_transform_range, str(path), header, start, end, transform)
+                next_submit += 1
+            yield (i, *pending.pop(i).result())
+
+
+def transform_csv(
+    input_path: Path,
+    output_path: Path,
+    transform: Transform,
+    workers: int = CSV_TRANSFORM_WORKERS,
+    chunk_bytes: int = CSV_TRANSFORM_CHUNK_BYTES,
+    encoding: str = 'utf-8-sig',
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """CSVをチャンクごとに並列変換して書き出し（一時ファイルに書いてから置き換える）
+
+    Args:
+        input_path: 入力CSV（UTF-8。BOMの有無は問わない）
+        output_path: 出力CSV
+        transform: チャンクのDataFrame（全列が文字列）を受け取り変換後のDataFrameを返す関数
+            （プロセス間で受け渡すため、モジュールの最上位で定義した関数であること）
+        workers: プロセス数（1ならこのプロセスで逐次処理）
+        chunk_bytes: 1チャンクのおおよそのバイト数
+        encoding: 出力のエンコーディング（'utf-8-sig' ならBOMを付ける）
+        progress: チャンクを書き出すたびに、その時点の指標（metricsと同じ形式）で呼ばれる関数
+
+    Returns:
+        dict: rows/bytes/chunks/seconds/rows_per_sec/mb_per_sec/workers
+    """
+    workers = workers or os.cpu_count() or 1
+    header, ranges = split_byte_ranges(input_path, chunk_bytes)
+    total_bytes = sum(end - start for start, end in ranges)
+    started = time.perf_counter()
+    metrics = {'rows': 0, 'bytes': 0, 'chunks': 0, 'total_bytes': total_bytes, 'workers': workers}
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    try:
+        # utf-8-sig のBOMは最初の書き込みで1回だけ付く
+        with open(tmp_path, 'w', encoding=encoding, newline='') as out:
+            for i, text, rows in _run_ranges(input_path, header, ranges, transform, workers):
+                # 変換後の列名は最初のチャンクのものを使い、以降のチャンクのヘッダー行は読み飛ばす
+                out.write(text if i == 0 else text[text.index('\n') + 1:])
+
+                start, end = ranges[i]
+                metrics['rows'] += rows
+                metrics['bytes'] += end - start
+                metrics['chunks'] += 1
+                _update_rates(metrics, time.perf_counter() - started)
+                if progress:
+                    progress(dict(metrics))
+            if not ranges:
+                out.write(transform(_read_chunk(header)).to_csv(index=False))
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    _update_rates(metrics, time.perf_counter() - started)
+    return metrics
+
+
+def _update_rates(metrics: dict, seconds: float) -> None:
+    metrics['seconds'] = round(seconds, 3)
+    metrics['rows_per_sec'] = metrics['rows'] / seconds if seconds > 0 else 0.0
+    metrics['mb_per_sec'] = metrics['bytes'] / 1e6 / seconds if seconds > 0 else 0.0
@@ -0,0 +1,258 @@
+"""事故データと人口データの結合
+
+人口データの市町村を正規化したキーで辞書化し、事故データの Area を一意な値ごとに照合して、
+事故の全行へ人口（POPULATION）や地域名をコード経由で一括で付与します。
+照合の手間は事故件数ではなく Area の種類数に比例し、全体は行数に対して線形です。
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config import POPULATION_COLUMN, REVERSE_GEOCODER_MAX_DISTANCE_M
+from src.reverse_geocoder import MunicipalityLocator
+from src.spatial import lonlat_to_xyz
+from src.text_normalize import municipality_keys, normalize_text, split_prefecture
+
+
+def prepare_population(population_df: pd.DataFrame) -> pd.DataFrame:
+    """人口データを地域（都道府県付きの市町村名）ごとに1行（最新の調査年）にし、人口を数値に変換
+
+    伊達市・府中市のように別の都道府県に同じ名前の市町村があるため、市町村ではなく地域で1行にします。
+
+    Args:
+        population_df: output_population.csv（地域/市町村/調査年 コード/人口/lat/lonの列を含む）
+
+    Returns:
+        pd.DataFrame: 地域/市町村/lat/lon/POPULATIONを持つデータ（地域は一意）
+    """
+    df = population_df.dropna(subset=['市町村'])
+    df = df.sort_values('調査年 コード', ascending=False).drop_duplicates(subset=['地域'], keep='first')
+    df = df.rename(columns={POPULATION_COLUMN: 'POPULATION'})
+    # 人口は「452,836」のような桁区切り付き文字列
+    df['POPULATION'] = pd.to_numeric(df['POPULATION'].astype(str).str.replace(',', ''), errors='coerce')
+    return df[['地域', '市町村', 'lat', 'lon', 'POPULATION']].reset_index(drop=True)
+
+
+class PopulationIndex:
+    """正規化した市町村キー -> 候補の地域 の索引
+
+    市町村名は「市町村名」「都道府県名+市町村名」の両方で引けるようにし、政令市の区は区名だけでも引けるようにします。
+    府中市・港区のように候補が複数あるキーは、行の緯度経度から最も近い候補の代表点に決めます。
+    名前で決まらない行は、代表点の最寄り検索（MunicipalityLocator）で座標から決めることもできます。
+    """
+
+    def __init__(self, population_df: pd.DataFrame):
+        """
+        Args:
+            population_df: prepare_populationの戻り値（地域は一意）
+        """
+        self.table = population_df.reset_index(drop=True)
+        self.regions = self.table['地域'].to_numpy(dtype=object)
+        self.populations = self.table['POPULATION'].to_numpy(dtype=float)
+        lat = self.table['lat'].to_numpy(dtype=float)
+        lon = self.table['lon'].to_numpy(dtype=float)
+        self._xyz = lonlat_to_xyz(lat, lon)
+        # 最寄り検索は代表点の座標がある地域だけで行う（locatorの番号 -> 地域の行番号）
+        self._located = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.locator = MunicipalityLocator(lat[self._located], lon[self._located]) if len(self._located) else None
+
+        # キー -> 該当する地域の行番号
+        candidates: dict[str, list[int]] = {}
+        for position, (region, municipality) in enumerate(self.table[['地域', '市町村']].itertuples(index=False)):
+            prefecture, _ = split_prefecture(normalize_text(region))
+            parts = str(municipality).split()
+            names = {normalize_text(municipality)}
+            if len(parts) > 1:
+                names.add(normalize_text(parts[-1]))
+            for name in names:
+                for key in (name, prefecture + name):
+                    positions = candidates.setdefault(key, [])
+                    if position not in positions:
+                        positions.append(position)
+        self.candidates = {key: np.array(positions) for key, positions in candidates.items()}
+
+    def match(self, area: str, prefecture: Optional[str] = None) -> tuple[str, np.ndarray]:
+        """地名に該当する地域の候補を取得
+
+        Args:
+            area: 市町村を含む地名
+            prefecture: 都道府県名（areaに都道府県名が含まれない場合に補う）
+
+        Returns:
+            tuple[str, np.ndarray]: (照合に使った規則 'exact'/'prefecture'/'bracket'/'district'、
+            末尾の市町村を補って一致したら 'suffix'、見つからなければ 'unmatched', 候補の行番号)
+        """
+        if prefecture and not split_prefecture(normalize_text(area))[0]:
+            area = prefecture + area
+        keys = municipality_keys(area)
+        for rule, key in keys:
+            if key in self.candidates:
+                return rule, self.candidates[key]
+        # 「四日市」「羽村」のように末尾の市町村が欠けた地名
+        for _, key in keys:
+            found = [self.candidates[key + suffix] for suffix in _MUNICIPALITY_SUFFIXES if key + suffix in self.candidates]
+            if found:
+                return 'suffix', np.unique(np.concatenate(found))
+        return 'unmatched', _NO_CANDIDATES
+
+    def resolve(
+        self,
+        areas: pd.Series,
+        prefectures: Optional[pd.Series] = None,
+        lat: Optional[np.ndarray] = None,
+        lon: Optional[np.ndarray] = None,
+        max_distance_m: Optional[float] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """各行の地名を地域の行番号に照合
+
+        照合は一意な (地名, 都道府県) ごとに1回だけ行い、候補が複数ある組だけ行ごとに
+        最も近い候補の代表点を選びます。
+
+        Args:
+            areas: 地名のSeries
+            prefectures: 都道府県名のSeries（areasと同じ長さ。Noneなら地名だけで照合）
+            lat: 緯度の配列（Noneなら候補が複数の行は照合しない）
+            lon: 経度の配列
+            max_distance_m: 名前で決まらない行を、この距離以内の最寄りの代表点に割り当てる（Noneなら割り当てない）
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (地域の行番号（照合できない行は-1）, 行ごとの規則。
+            候補から座標で決めた行は 'nearest'、最寄りの代表点に割り当てた行は 'coordinates'、
+            座標がなく決められない行は 'ambiguous'、地名が欠損の行は 'missing')
+        """
+        if prefectures is None:
+            codes, uniques = pd.factorize(areas.astype('string'))
+            pairs = [(area, None) for area in uniques]
+        else:
+            codes, uniques = pd.MultiIndex.from_arrays([areas.astype('string'), prefectures.astype('string')]).factorize()
+            pairs = list(uniques)
+
+        matches = [
+            self.match(area, None if pd.isna(prefecture) else prefecture)
+            if not pd.isna(area) else ('missing', _NO_CANDIDATES)
+            for area, prefecture in pairs
+        ]
+        # 末尾は欠損値のコード(-1)用
+        positions = np.full(len(matches) + 1, -1, dtype=np.int64)
+        rules = np.array([rule for rule, _ in matches] + ['missing'], dtype=object)
+        ambiguous = []
+        for code, (_, candidates) in enumerate(matches):
+            if len(candidates) == 1:
+                positions[code] = candidates[0]
+            elif len(candidates) > 1:
+                rules[code] = 'ambiguous'
+                ambiguous.append(code)
+
+        row_positions = positions[codes]
+        row_rules = rules[codes]
+        if lat is None or lon is None:
+            return row_positions, row_rules
+
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        # 候補が複数の組の行は、コードごとにまとめて候補の代表点との距離を比べる
+        rows = np.flatnonzero(np.isin(codes, ambiguous) & valid)
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+        bounds = np.searchsorted(codes[rows], ambiguous + [len(matches)])
+        for code, start, end in zip(ambiguous, bounds[:-1], bounds[1:]):
+            group = rows[start:end]
+            if len(group):
+                row_positions[group] = self._nearest_candidate(matches[code][1], lat[group], lon[group])
+                row_rules[group] = 'nearest'
+
+        if max_distance_m is not None and self.locator is not None:
+            rest = np.flatnonzero((row_positions < 0) & valid)
+            indices, distances = self.locator.query(lat[rest], lon[rest])
+            found = (indices >= 0) & (distances <= max_distance_m)
+            row_positions[rest[found]] = self._located[indices[found]]
+            row_rules[rest[found]] = 'coordinates'
+        return row_positions, row_rules
+
+    def _nearest_candidate(self, candidates: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """各点に最も近い候補の地域の行番号（代表点の座標がない候補は選ばない）"""
+        distances = np.linalg.norm(lonlat_to_xyz(lat, lon)[:, None, :] - self._xyz[candidates][None, :, :], axis=2)
+        return candidates[np.where(np.isnan(distances), np.inf, distances).argmin(axis=1)]
+
+
+_NO_CANDIDATES = np.array([], dtype=np.int64)
+_MUNICIPALITY_SUFFIXES = ('市', '町', '村')
+
+
+def join_population(
+    df: pd.DataFrame,
+    population_df: pd.DataFrame,
+    area_col: str = 'Area',
+    max_distance_m: Optional[float] = REVERSE_GEOCODER_MAX_DISTANCE_M
+) -> tuple[pd.DataFrame, dict]:
+    """事故データの全行に人口を付与
+
+    同じ名前の市町村が複数ある Area は、行の LATITUDE/LONGITUDE に最も近い候補の人口にします。
+    誤記などで名前が一致しない行は、max_distance_m 以内の最寄りの市区町村代表点の人口にします。
+
+    Args:
+        df: 事故データ（area_colを含む。LATITUDE/LONGITUDEがあれば同名の市町村の判別と座標での割り当てに使う）
+        population_df: prepare_populationの戻り値
+        area_col: 市町村名のカラム
+        max_distance_m: 座標で割り当てる最寄り代表点までの最大距離（Noneなら名前で照合できた行だけ）
+
+    Returns:
+        tuple[pd.DataFrame, dict]: (POPULATIONを追加したデータ, 照合結果の集計)
+    """
+    index = PopulationIndex(population_df)
+    has_coordinates = {'LATITUDE', 'LONGITUDE'} <= set(df.columns)
+    positions, rules = index.resolve(
+        df[area_col],
+        lat=df['LATITUDE'].to_numpy(dtype=float) if has_coordinates else None,
+        lon=df['LONGITUDE'].to_numpy(dtype=float) if has_coordinates else None,
+        max_distance_m=max_distance_m
+    )
+
+    # 末尾は照合できなかった行(-1)用
+    populations = np.append(index.populations, np.nan)
+    result = df.copy()
+    result['POPULATION'] = pd.array(populations[positions]).astype('Int64')
+
+    areas = df[area_col]
+    matched = positions >= 0
+    report = {
+        'rows': len(df),
+        'matched_rows': int(result['POPULATION'].notna().sum()),
+        'distinct': int(areas.nunique()),
+        'matched_distinct': int(areas[matched].nunique()),
+        'rows_by_rule': pd.Series(rules).value_counts().to_dict(),
+        'unmatched_top': areas[~matched & areas.notna().to_numpy()].value_counts().head(10).to_dict(),
+    }
+    return result, report
+
+
+def rebuild_area(
+    df: pd.DataFrame,
+    index: PopulationIndex,
+    max_distance_m: float = REVERSE_GEOCODER_MAX_DISTANCE_M
+) -> pd.Series:
+    """事故地点のAreaを人口データの地域名（都道府県付きの市町村名）に揃える
+
+    Area（PREFECTUREがあれば都道府県も）で地域を照合し、同名の市町村は座標に最も近い候補にします。
+    高速道路のキロポストなど市町村名でない行は、座標の最寄りの市区町村代表点
+    （max_distance_m以内）の地域にします。どちらでも決まらない行は元の値のままです。
+
+    Args:
+        df: 事故データ（LATITUDE/LONGITUDE/Areaを含む）
+        index: 人口データの PopulationIndex
+        max_distance_m: 置き換える最寄り代表点までの最大距離
+
+    Returns:
+        pd.Series: 作り直したArea（dfと同じインデックス）
+    """
+    area = df['Area'] if 'Area' in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+    positions, _ = index.resolve(
+        area,
+        df['PREFECTURE'] if 'PREFECTURE' in df.columns else None,
+        df['LATITUDE'].to_numpy(dtype=float),
+        df['LONGITUDE'].to_numpy(dtype=float),
+        max_distance_m
+    )
+    rebuilt = np.where(positions >= 0, index.regions[positions], area.to_numpy(dtype=object))
+    return pd.Series(rebuilt, index=df.index, name='Area')
@@ -0,0 +1,487 @@
+"""事故地点予測モデルの保存・読み込みとシナリオ単位の一括予測
+
+事故種別・天候・車両・人口の組み合わせ（シナリオ）から、事故の起こりやすい緯度経度と
+経済的影響（IMPACT）を予測する RandomForest を学習し、ラベルエンコーダーと一緒に1ファイルへ保存します。
+アプリは保存済みモデルを読み込んで任意のシナリオをまとめて予測するため、再学習は不要です。
+予測結果はシナリオごとにメモし、同じシナリオは2回目以降モデルを通しません。
+
+学習モードは2種類あります。
+- separate: 予測対象ごとに別々のモデルを学習（従来の方式）
+- multi_output: 3つの予測対象を1つのモデル（同じ木）でまとめて学習。予測対象は標準化し、
+  PREDICTION_MULTI_OUTPUT_WEIGHTS の重みを掛けてから学習します（単位の違いで分割が偏らないように）
+
+元データに行が追加された場合は、全件で学習し直す代わりに、学習済みのどの行とも一致しない行
+（新しいパーティション）だけで木を追加できます（update_location_model）。モデルは学習・検証に使った行の
+ハッシュを持ち、新しい行の一部を検証データに加えて、追加前後のMAEを同じ検証データで比べます。
+追加学習はパイプラインの prediction ステージ（predict_accident_locations.py --incremental）で行い、
+アプリはモデルを読み込むだけです。
+"""
+import copy
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from config import (
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    PREDICTION_INCREMENTAL_MAX_DEGRADATION,
+    PREDICTION_INCREMENTAL_MAX_REMOVED_RATIO,
+    PREDICTION_INCREMENTAL_MAX_TREES_RATIO,
+    PREDICTION_INCREMENTAL_MIN_TREES,
+    PREDICTION_INCREMENTAL_REPLAY_FRACTION,
+    PREDICTION_MEMO_SIZE,
+    PREDICTION_MODEL_FILE,
+    PREDICTION_MULTI_OUTPUT_WEIGHTS,
+    PREDICTION_N_JOBS,
+    PREDICTION_TRAINING_MODE
+)
+
+CATEGORY_COLUMNS = ['ACCIDENT_TYPE_(CATEGORY)', 'WEATHER', 'VEHICLE_1:_BODY_TYPE']
+FEATURE_COLUMNS = CATEGORY_COLUMNS + ['POPULATION']
+# 予測対象の列 -> 予測結果の列（predicted_locations_score.csv と同じ列名）
+TARGET_COLUMNS = {
+    'LATITUDE': 'PREDICTED_LATITUDE',
+    'LONGITUDE': 'PREDICTED_LONGITUDE',
+    'IMPACT': 'PREDICTED_IMPACT',
+}
+# 予測対象ごとの RandomForestRegressor の設定
+MODEL_PARAMS = {
+    'LATITUDE': {'n_estimators': 100, 'max_depth': 20},
+    'LONGITUDE': {'n_estimators': 100, 'max_depth': 20},
+    'IMPACT': {'n_estimators': 200, 'max_depth': 20},
+}
+# multi_output モードの RandomForestRegressor の設定
+MULTI_OUTPUT_PARAMS = {'n_estimators': 100, 'max_depth': 20}
+TRAINING_MODES = ('separate', 'multi_output')
+
+
+class LocationModel:
+    """学習済みの予測モデル一式（ラベルエンコーダー・予測対象ごとのモデル・メタデータ）"""
+
+    def __init__(
+        self,
+        encoders: dict[str, LabelEncoder],
+        models: dict[str, RandomForestRegressor],
+        version: str,
+        metadata: Optional[dict] = None,
+        mode: str = 'separate'
+    ):
+        """
+        Args:
+            encoders: カテゴリ列 -> LabelEncoder
+            models: separate モードでは予測対象 -> モデル、multi_output モードでは {'ALL': モデル}
+            version: モデルのバージョン文字列
+            metadata: 学習日時・評価結果など
+            mode: 学習モード（TRAINING_MODES のいずれか）
+        """
+        self.encoders = encoders
+        self.models = models
+        self.version = version
+        self.metadata = metadata or {}
+        self.mode = mode
+        # multi_output モードで標準化・重み付けした予測対象を元の単位に戻すための平均と倍率
+        self.target_mean = np.zeros(len(TARGET_COLUMNS))
+        self.target_scale = np.ones(len(TARGET_COLUMNS))
+        # 学習・検証に使った行のハッシュ（ソート済み。追加学習で新しい行を見分けるのに使う）
+        self.train_rows = np.empty(0, dtype=np.uint64)
+        self.holdout_rows = np.empty(0, dtype=np.uint64)
+        self._init_memo()
+
+    def _init_memo(self) -> None:
+        # シナリオ（特徴量の値のタプル） -> 予測値のタプル
+        self._memo: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def __getstate__(self):
+        # メモとロックは保存しない
+        state = self.__dict__.copy()
+        for key in ('_memo', '_lock', 'memo_hits', 'memo_misses'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        # 学習モードを持たない以前の形式のファイルは separate として読み込む
+        state.setdefault('mode', 'separate')
+        state.setdefault('target_mean', np.zeros(len(TARGET_COLUMNS)))
+        state.setdefault('target_scale', np.ones(len(TARGET_COLUMNS)))
+        # 行のハッシュを持たない以前の形式のファイルは追加学習できない（全件で再学習する）
+        state.setdefault('train_rows', np.empty(0, dtype=np.uint64))
+        state.setdefault('holdout_rows', np.empty(0, dtype=np.uint64))
+        self.__dict__.update(state)
+        self._init_memo()
+
+    @property
+    def categories(self) -> dict[str, list[str]]:
+        """カテゴリ列ごとの学習済みの値"""
+        return {column: self.encoders[column].classes_.tolist() for column in CATEGORY_COLUMNS}
+
+    def encode(self, scenarios: pd.DataFrame) -> np.ndarray:
+        """シナリオを特徴量の行列に変換
+
+        Raises:
+            ValueError: 学習時に存在しないカテゴリの値を含む場合
+        """
+        features = np.empty((len(scenarios), len(FEATURE_COLUMNS)), dtype=float)
+        for i, column in enumerate(CATEGORY_COLUMNS):
+            classes = self.encoders[column].classes_
+            values = scenarios[column].astype(str).to_numpy()
+            # LabelEncoder.classes_ はソート済み
+            codes = np.searchsorted(classes, values)
+            unknown = (codes >= len(classes)) | (classes[np.minimum(codes, len(classes) - 1)] != values)
+            if unknown.any():
+                raise ValueError(f"{column} に学習データにない値があります: {sorted(set(values[unknown]))[:5]}")
+            features[:, i] = codes
+        features[:, -1] = pd.to_numeric(scenarios['POPULATION'], errors='raise').to_numpy(dtype=float)
+        return features
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """特徴量の行列から予測（メモを使わない）
+
+        Returns:
+            np.ndarray: (行数, 予測対象数) の配列。列の順序は TARGET_COLUMNS と同じ
+        """
+        if self.mode == 'multi_output':
+            return self.models['ALL'].predict(features) * self.target_scale + self.target_mean
+        return np.column_stack([self.models[target].predict(features) for target in TARGET_COLUMNS])
+
+    def predict(self, scenarios: pd.DataFrame) -> pd.DataFrame:
+        """シナリオをまとめて予測（メモにないシナリオだけを1回のバッチでモデルに通す）
+
+        Args:
+            scenarios: FEATURE_COLUMNS を含むデータフレーム
+
+        Returns:
+            pd.DataFrame: FEATURE_COLUMNS と PREDICTED_LATITUDE/LONGITUDE/IMPACT
+        """
+        result = scenarios[FEATURE_COLUMNS].reset_index(drop=True)
+        keys = list(zip(*(result[column].tolist() for column in FEATURE_COLUMNS)))
+
+        with self._lock:
+            values = [self._memo.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, value in zip(keys, values) if value is None))
+        if missing:
+            missing_df = pd.DataFrame(missing, columns=FEATURE_COLUMNS)
+            predicted = self.predict_features(self.encode(missing_df))
+            computed = dict(zip(missing, map(tuple, predicted)))
+            with self._lock:
+                for key, value in computed.items():
+                    self._memo[key] = value
+                while len(self._memo) > PREDICTION_MEMO_SIZE:
+                    self._memo.popitem(last=False)
+            values = [value if value is not None else computed[key] for key, value in zip(keys, values)]
+        with self._lock:
+            self.memo_hits += len(keys) - len(missing)
+            self.memo_misses += len(missing)
+
+        predictions = np.array(values, dtype=float).reshape(len(keys), len(TARGET_COLUMNS))
+        for i, column in enumerate(TARGET_COLUMNS.values()):
+            result[column] = predictions[:, i]
+        return result
+
+
+def prepare_training_data(df: pd.DataFrame) -> pd.DataFrame:
+    """学習に使う行（緯度経度・特徴量・IMPACTがそろった行）を抽出"""
+    df = df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    return df.dropna(subset=FEATURE_COLUMNS + ['IMPACT'])
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """学習データの行ごとのハッシュ（特徴量と予測対象の値から計算）
+
+    CSVの読み込み方で型が変わってもハッシュが変わらないよう、カテゴリ列は文字列、数値列は float にそろえます。
+    内容がまったく同じ行は同じハッシュになり、追加学習では既存の行として扱われます。
+    """
+    normalized = pd.DataFrame({
+        column: df[column].astype(str) if column in CATEGORY_COLUMNS else df[column].astype(float)
+        for column in FEATURE_COLUMNS + list(TARGET_COLUMNS)
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def model_version(df: pd.DataFrame, params: dict, random_state: int, mode: str = 'separate') -> str:
+    """学習データの内容と設定から、モデルのバージョン文字列（ハッシュ先頭12桁）を作成"""
+    digest = hashlib.sha256()
+    columns = FEATURE_COLUMNS + list(TARGET_COLUMNS)
+    digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    settings = {'params': params, 'random_state': random_state, 'mode': mode}
+    if mode == 'multi_output':
+        settings['weights'] = PREDICTION_MULTI_OUTPUT_WEIGHTS
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()[:12]
+
+
+def _evaluate(model: LocationModel, X: np.ndarray, y: np.ndarray) -> dict:
+    """予測対象ごとのMAE"""
+    y_pred = model.predict_features(X)
+    return {target: mean_absolute_error(y[:, i], y_pred[:, i]) for i, target in enumerate(TARGET_COLUMNS)}
+
+
+def _location_mae(metrics: dict) -> float:
+    return (metrics['LATITUDE'] + metrics['LONGITUDE']) / 2
+
+
+def train_location_model(
+    df: pd.DataFrame,
+    params: Optional[dict] = None,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    mode: str = PREDICTION_TRAINING_MODE,
+    n_jobs: int = PREDICTION_N_JOBS,
+    source_version: str = ''
+) -> tuple[LocationModel, dict]:
+    """予測モデルを学習
+
+    Args:
+        df: 経済的影響・人口を結合した事故データ（economic_impact_population.csv）
+        params: RandomForestRegressor の設定（separate では予測対象ごとの辞書。省略時は
+            MODEL_PARAMS / MULTI_OUTPUT_PARAMS）
+        test_size: 評価に使う行の割合
+        random_state: 分割・学習の乱数シード
+        mode: 学習モード（'separate' または 'multi_output'）
+        n_jobs: 学習・予測に使うスレッド数
+        source_version: 元データのファイルのバージョン（追加学習が必要かの判定に使う）
+
+    Returns:
+        tuple[LocationModel, dict]: (モデル, 予測対象ごとの評価データでのMAE)
+    """
+    if mode not in TRAINING_MODES:
+        raise ValueError(f"不明な学習モードです: {mode}")
+    if params is None:
+        params = MULTI_OUTPUT_PARAMS if mode == 'multi_output' else MODEL_PARAMS
+
+    df = prepare_training_data(df)
+    encoders = {column: LabelEncoder().fit(df[column].astype(str)) for column in CATEGORY_COLUMNS}
+    model = LocationModel(encoders, {}, model_version(df, params, random_state, mode), mode=mode)
+
+    X = model.encode(df)
+    y = df[list(TARGET_COLUMNS)].to_numpy(dtype=float)
+    train_index, test_index = train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state)
+    X_train, X_test, y_train, y_test = X[train_index], X[test_index], y[train_index], y[test_index]
+    hashes = row_hashes(df)
+    model.train_rows = np.unique(hashes[train_index])
+    model.holdout_rows = np.unique(hashes[test_index])
+
+    if mode == 'multi_output':
+        model.target_mean = y_train.mean(axis=0)
+        # 値が一定の予測対象は標準化しない
+        std = np.where(y_train.std(axis=0) > 0, y_train.std(axis=0), 1.0)
+        model.target_scale = std / np.array([PREDICTION_MULTI_OUTPUT_WEIGHTS[target] for target in TARGET_COLUMNS])
+        regressor = RandomForestRegressor(**params, random_state=random_state, n_jobs=n_jobs)
+        model.models['ALL'] = regressor.fit(X_train, (y_train - model.target_mean) / model.target_scale)
+    else:
+        for i, target in enumerate(TARGET_COLUMNS):
+            regressor = RandomForestRegressor(**params[target], random_state=random_state, n_jobs=n_jobs)
+            model.models[target] = regressor.fit(X_train, y_train[:, i])
+
+    metrics = _evaluate(model, X_test, y_test)
+
+    population = df['POPULATION'].astype(float)
+    trained_at = datetime.now().isoformat(timespec='seconds')
+    model.metadata = {
+        'trained_at': trained_at,
+        'mode': mode,
+        'rows': len(df),
+        'mae': metrics,
+        'population_quantiles': {str(q): float(population.quantile(q)) for q in (0.1, 0.25, 0.5, 0.75, 0.9)},
+        'source_version': source_version,
+        'base_trees': {name: regressor.n_estimators for name, regressor in model.models.items()},
+        'history': [{
+            'version': model.version, 'kind': 'full', 'trained_at': trained_at, 'source_version': source_version,
+            'rows_added': len(train_index), 'holdout_rows': len(test_index), 'mae': metrics,
+        }],
+    }
+    return model, metrics
+
+
+def update_location_model(
+    model: LocationModel,
+    df: pd.DataFrame,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    source_version: str = ''
+) -> tuple[LocationModel, dict]:
+    """学習済みモデルに、元データに新しく加わった行だけで学習した木を追加（元のモデルは変更しない）
+
+    新しい行は学習用と検証用に分け、学習用の行（と学習済みの行の一部）で木を追加します（warm_start）。
+    追加する木の数は、既存の木の数 × 新しい学習行数 / 学習済みの行数（最低 PREDICTION_INCREMENTAL_MIN_TREES）で、
+    追加学習の費用が新しい行数に比例するようにします。
+
+    Args:
+        model: 学習済みモデル
+        df: 学習済みの行と新しい行を含む元データの全体
+        test_size: 新しい行のうち検証に回す割合
+        random_state: 分割・学習の乱数シード
+        source_version: 元データのファイルのバージョン
+
+    Returns:
+        tuple[LocationModel, dict]: (追加学習したモデル, rows_added/holdout_added/rows_skipped/rows_replayed/
+            trees_added/mae_before/mae_after)
+
+    Raises:
+        ValueError: 追加学習では対応できない場合（全件で再学習が必要）。学習データにないカテゴリの値がある、
+            学習済みの行が消えた、木が増えすぎた、検証データでのMAEが悪化した など
+    """
+    if model.train_rows.size == 0:
+        raise ValueError("モデルに学習済みの行の情報がありません")
+
+    df = prepare_training_data(df).reset_index(drop=True)
+    hashes = row_hashes(df)
+    known = np.isin(hashes, model.train_rows) | np.isin(hashes, model.holdout_rows)
+    removed = model.train_rows.size - np.isin(model.train_rows, hashes).sum()
+    if removed > model.train_rows.size * PREDICTION_INCREMENTAL_MAX_REMOVED_RATIO:
+        raise ValueError(f"学習済みの行のうち {removed:,}件が元データから消えています")
+    new_index = np.flatnonzero(~known)
+
+    # ラベルエンコーダーは変えられない（既存の木のコードがずれる）ため、学習データにないカテゴリの値を
+    # 含む行は使わない（次に全件で再学習するときに学習される）
+    encodable = np.ones(len(new_index), dtype=bool)
+    for column in CATEGORY_COLUMNS:
+        encodable &= np.isin(df[column].iloc[new_index].astype(str).to_numpy(), model.encoders[column].classes_)
+    rows_skipped = int((~encodable).sum())
+    new_index = new_index[encodable]
+    if len(new_index) == 0:
+        # 行の並び替えなどで学習に使える行が増えていない場合は、元データのバージョンだけを更新する
+        updated = copy.deepcopy(model)
+        updated.metadata['source_version'] = source_version
+        return updated, {
+            'rows_added': 0, 'holdout_added': 0, 'rows_skipped': rows_skipped, 'rows_replayed': 0,
+            'trees_added': {}, 'mae_before': {}, 'mae_after': {},
+        }
+    X_new = model.encode(df.iloc[new_index])
+    y_new = df.iloc[new_index][list(TARGET_COLUMNS)].to_numpy(dtype=float)
+    if len(new_index) >= 2:
+        train_part, holdout_part = train_test_split(
+            np.arange(len(new_index)), test_size=test_size, random_state=random_state
+        )
+    else:
+        train_part, holdout_part = np.arange(len(new_index)), np.empty(0, dtype=int)
+
+    holdout_rows = np.union1d(model.holdout_rows, hashes[new_index[holdout_part]])
+    holdout_mask = np.isin(hashes, holdout_rows)
+    X_holdout = model.encode(df[holdout_mask])
+    y_holdout = df[holdout_mask][list(TARGET_COLUMNS)].to_numpy(dtype=float)
+    mae_before = _evaluate(model, X_holdout, y_holdout)
+
+    # 新しい行だけで学習した木は行数が少なく既存の木より精度が低いため、学習済みの行も混ぜて学習する
+    # （費用は追加する木の本数に比例し、全件での再学習よりずっと小さい）
+    rng = np.random.default_rng(random_state)
+    replay_index = np.flatnonzero(np.isin(hashes, model.train_rows))
+    n_replay = round(len(replay_index) * PREDICTION_INCREMENTAL_REPLAY_FRACTION)
+    replay_index = rng.choice(replay_index, size=n_replay, replace=False)
+    X_train = np.vstack([X_new[train_part], model.encode(df.iloc[replay_index])])
+    y_train = np.vstack([y_new[train_part], df.iloc[replay_index][list(TARGET_COLUMNS)].to_numpy(dtype=float)])
+
+    updated = copy.deepcopy(model)
+    if updated.mode == 'multi_output':
+        y_train = (y_train - updated.target_mean) / updated.target_scale
+        targets = {'ALL': y_train}
+    else:
+        targets = {target: y_train[:, i] for i, target in enumerate(TARGET_COLUMNS)}
+
+    base_trees = updated.metadata.get('base_trees', {})
+    trees_added = {}
+    for name, target_y in targets.items():
+        regressor = updated.models[name]
+        n_trees = len(regressor.estimators_)
+        n_added = max(PREDICTION_INCREMENTAL_MIN_TREES, math.ceil(n_trees * len(train_part) / updated.train_rows.size))
+        limit = base_trees.get(name, regressor.n_estimators) * PREDICTION_INCREMENTAL_MAX_TREES_RATIO
+        if n_trees + n_added > limit:
+            raise ValueError(f"{name} の木の数が上限（{limit:.0f}本）を超えます")
+        regressor.set_params(warm_start=True, n_estimators=n_trees + n_added)
+        regressor.fit(X_train, target_y)
+        regressor.set_params(warm_start=False)
+        trees_added[name] = n_added
+
+    mae_after = _evaluate(updated, X_holdout, y_holdout)
+    if _location_mae(mae_after) > _location_mae(mae_before) * PREDICTION_INCREMENTAL_MAX_DEGRADATION:
+        raise ValueError(
+            f"検証データでの位置のMAEが悪化します（{_location_mae(mae_before):.4f} → {_location_mae(mae_after):.4f}）"
+        )
+
+    updated.train_rows = np.union1d(updated.train_rows, hashes[new_index[train_part]])
+    updated.holdout_rows = holdout_rows
+    digest = hashlib.sha256(updated.version.encode())
+    digest.update(np.sort(hashes[new_index]).tobytes())
+    parent_version = updated.version
+    updated.version = digest.hexdigest()[:12]
+
+    trained_at = datetime.now().isoformat(timespec='seconds')
+    population = df['POPULATION'].astype(float)
+    updated.metadata.update({
+        'trained_at': trained_at,
+        'rows': len(df),
+        'mae': mae_after,
+        'population_quantiles': {str(q): float(population.quantile(q)) for q in (0.1, 0.25, 0.5, 0.75, 0.9)},
+        'source_version': source_version,
+        'history': updated.metadata.get('history', []) + [{
+            'version': updated.version, 'parent': parent_version, 'kind': 'incremental', 'trained_at': trained_at,
+            'source_version': source_version, 'rows_added': len(train_part), 'holdout_rows': int(holdout_mask.sum()),
+            'trees_added': trees_added, 'mae_before': mae_before, 'mae': mae_after,
+        }],
+    })
+    summary = {
+        'rows_added': len(train_part),
+        'holdout_added': len(holdout_part),
+        'rows_skipped': rows_skipped,
+        'rows_replayed': n_replay,
+        'trees_added': trees_added,
+        'mae_before': mae_before,
+        'mae_after': mae_after,
+    }
+    return updated, summary
+
+
+def save_model(model: LocationModel, path: Path = PREDICTION_MODEL_FILE) -> None:
+    """モデルを保存（一時ファイルに書いてから置き換える）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    joblib.dump(model, tmp_path, compress=3)
+    os.replace(tmp_path, path)
+
+
+def load_model(path: Path = PREDICTION_MODEL_FILE) -> LocationModel:
+    """保存済みモデルを読み込み"""
+    return joblib.load(path)
+
+
+@st.cache_resource(max_entries=2, show_spinner="予測モデルを準備中...")
+def get_location_model(file_version: str, source_version: Optional[str] = None) -> Optional[LocationModel]:
+    """モデルファイルと元データのバージョン単位でキャッシュした予測モデルを取得（ファイルがなければNone）
+
+    アプリでは読み込むだけで、学習・保存はしません。元データのバージョンがモデルの学習時と異なる場合は
+    metadata['pending_update'] に記録します（追加学習はパイプラインの prediction ステージで行う）。
+    予測結果のメモはモデルに付いているため、モデルが作り直されると自動的に破棄されます。
+    """
+    if not PREDICTION_MODEL_FILE.exists():
+        return None
+    model = load_model(PREDICTION_MODEL_FILE)
+    if source_version not in (None, 'missing', model.metadata.get('source_version')):
+        model.metadata['pending_update'] = f"{ECONOMIC_IMPACT_POPULATION_FILE.name} がモデルの学習後に更新されています"
+    return model
+
+
+def make_scenarios(
+    accident_types: list[str],
+    weathers: list[str],
+    vehicles: list[str],
+    populations: list[float]
+) -> pd.DataFrame:
+    """事故種別 × 天候 × 車両 × 人口 のすべての組み合わせのシナリオを作成"""
+    return pd.DataFrame(list(product(accident_types, weathers, vehicles, populations)), columns=FEATURE_COLUMNS)
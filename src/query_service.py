@@ -0,0 +1,222 @@
+"""プロセス内で共有する事故データのクエリサービス
+
+Streamlitのセッションごとに事故データを読み込み・フィルタ・集計する代わりに、データセットと
+インデックス・結果キャッシュを1つのサービスが持ち、各セッションはフィルタ条件（make_filter_key の値）を
+送って結果を受け取ります。
+
+- データセットはバージョンごとに1回だけ読み込み、年・月・時・カテゴリ列を整数のコードに変換した
+  インデックスを作ります。フィルタはインデックスの比較だけで行を選びます。
+- フィルタ・ダッシュボード用の集計は上限付きのスレッドプールで実行し、結果をフィルタ条件ごとに
+  LRUでキャッシュします。同じ条件のクエリが同時に届いた場合は1回だけ実行して結果を共有します。
+- 結果のDataFrameはセッション間で共有されるため、呼び出し側で変更しないでください。
+- データセットが更新されると新しいバージョンのサービスを作り、前のバージョンのスレッドプールは停止します。
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import QUERY_CACHE_SIZE, QUERY_TIMEOUT_SEC, QUERY_WORKER_THREADS
+from src.data_loader import load_accident_data
+from src.filters import extract_filter_options, make_filter_key
+
+# インデックスを作るカテゴリ列（make_filter_key の要素の位置 -> 列名）
+_CATEGORY_KEYS = {
+    3: 'ACCIDENT_TYPE_(CATEGORY)',
+    4: 'WEATHER',
+    5: 'Area',
+}
+
+
+class QueryResult:
+    """フィルタ条件ごとのクエリ結果"""
+
+    def __init__(self, key: tuple, data: pd.DataFrame, summary: dict, seconds: float):
+        """
+        Args:
+            key: フィルタキー（make_filter_key の値）
+            data: フィルタ後の事故データ
+            summary: ダッシュボード用の集計（summarize の戻り値）
+            seconds: 実行にかかった時間
+        """
+        self.key = key
+        self.data = data
+        self.summary = summary
+        self.seconds = seconds
+
+
+def summarize(df: pd.DataFrame) -> dict:
+    """ダッシュボード用の集計を計算
+
+    Returns:
+        dict: count / top_area / top_type / area_counts（上位10件） / type_counts / hour_counts。
+            列がない場合やデータが空の場合、該当する値はNone
+    """
+    summary = {'count': len(df), 'top_area': None, 'top_type': None,
+               'area_counts': None, 'type_counts': None, 'hour_counts': None}
+    if 'Area' in df.columns:
+        area_counts = df['Area'].value_counts().head(10).reset_index()
+        area_counts.columns = ['市区町村', '件数']
+        summary['area_counts'] = area_counts
+        if not df.empty:
+            summary['top_area'] = df['Area'].mode().iloc[0]
+    if 'ACCIDENT_TYPE_(CATEGORY)' in df.columns:
+        type_counts = df['ACCIDENT_TYPE_(CATEGORY)'].value_counts().reset_index()
+        type_counts.columns = ['事故類型', '件数']
+        summary['type_counts'] = type_counts
+        if not df.empty:
+            summary['top_type'] = df['ACCIDENT_TYPE_(CATEGORY)'].mode().iloc[0]
+    if 'OCCURRENCE_DATE_AND_TIME' in df.columns:
+        hour_counts = df['OCCURRENCE_DATE_AND_TIME'].dt.hour.value_counts().sort_index().reset_index()
+        hour_counts.columns = ['時間', '件数']
+        summary['hour_counts'] = hour_counts
+    return summary
+
+
+class QueryService:
+    """データセット・インデックス・結果キャッシュを持ち、フィルタクエリをスレッドプールで実行するサービス"""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        version: str,
+        max_workers: int = QUERY_WORKER_THREADS,
+        cache_size: int = QUERY_CACHE_SIZE
+    ):
+        """
+        Args:
+            df: 事故データ（load_accident_data の戻り値。サービスが所有し、変更しない）
+            version: データセットのバージョン
+            max_workers: クエリを実行するスレッド数
+            cache_size: 結果を保持するフィルタ条件の数
+        """
+        self.data = df
+        self.version = version
+        self.cache_size = cache_size
+        self.filter_options = extract_filter_options(df)
+
+        times = df['OCCURRENCE_DATE_AND_TIME'].dt
+        self._years = times.year.to_numpy()
+        self._months = times.month.to_numpy()
+        self._hours = times.hour.to_numpy()
+        # カテゴリ列 -> (行ごとのコード, 値 -> コード)。欠損値のコードは -1
+        self._categories = {}
+        for column in _CATEGORY_KEYS.values():
+            codes, uniques = pd.factorize(df[column])
+            self._categories[column] = (codes, {value: code for code, value in enumerate(uniques)})
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='query-service')
+        self._lock = threading.Lock()
+        self._cache: OrderedDict = OrderedDict()
+        self._inflight: dict[tuple, Future] = {}
+        self._stats = {'queries': 0, 'cache_hits': 0, 'coalesced': 0, 'executed': 0, 'failed': 0}
+
+    def mask(self, key: tuple) -> np.ndarray:
+        """フィルタキーに当てはまる行の真偽値配列（apply_filters と同じ条件）"""
+        year, month, hour_range = key[:3]
+        mask = np.ones(len(self.data), dtype=bool)
+        if year is not None:
+            mask &= self._years == year
+        if month is not None:
+            mask &= self._months == month
+        if hour_range is not None:
+            start_hour, end_hour = hour_range
+            mask &= (self._hours >= start_hour) & (self._hours < end_hour)
+        for position, column in _CATEGORY_KEYS.items():
+            values = key[position]
+            if values:
+                codes, lookup = self._categories[column]
+                selected = [lookup[value] for value in values if value in lookup]
+                mask &= np.isin(codes, selected)
+        return mask
+
+    def _execute(self, key: tuple) -> QueryResult:
+        start = time.perf_counter()
+        mask = self.mask(key)
+        data = self.data if mask.all() else self.data[mask]
+        return QueryResult(key, data, summarize(data), time.perf_counter() - start)
+
+    def _run(self, key: tuple) -> QueryResult:
+        try:
+            result = self._execute(key)
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+                self._inflight.pop(key, None)
+            raise
+        with self._lock:
+            self._stats['executed'] += 1
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._inflight.pop(key, None)
+        return result
+
+    def submit(self, key: tuple) -> Future:
+        """クエリを投入（キャッシュ済みなら完了済みのFuture、実行中の同じ条件があればそのFutureを返す）
+
+        Args:
+            key: フィルタキー（make_filter_key の値）
+
+        Returns:
+            Future: QueryResult を返すFuture
+        """
+        with self._lock:
+            self._stats['queries'] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats['cache_hits'] += 1
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+            if key in self._inflight:
+                self._stats['coalesced'] += 1
+                return self._inflight[key]
+            future = self._executor.submit(self._run, key)
+            self._inflight[key] = future
+            return future
+
+    def query(self, timeout: Optional[float] = QUERY_TIMEOUT_SEC, **filter_params) -> QueryResult:
+        """フィルタを適用した結果を取得（apply_filters と同じ引数）
+
+        Raises:
+            concurrent.futures.TimeoutError: timeout 秒以内に結果が得られない場合
+        """
+        return self.submit(make_filter_key(**filter_params)).result(timeout=timeout)
+
+    def metrics(self) -> dict:
+        """クエリ件数・キャッシュの利用状況を取得"""
+        with self._lock:
+            return {'cached_results': len(self._cache), 'inflight': len(self._inflight), **self._stats}
+
+    def close(self) -> None:
+        """スレッドプールを停止し、結果キャッシュを破棄（実行中のクエリは最後まで実行する）"""
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            self._cache.clear()
+
+
+# バージョン -> get_query_service が作ったサービス（キャッシュから外れたバージョンのサービスを停止する）
+_services: dict[str, QueryService] = {}
+_services_lock = threading.Lock()
+
+
+@st.cache_resource(max_entries=1, show_spinner="データを読み込み中...")
+def get_query_service(dataset_version: str) -> QueryService:
+    """プロセス内の全セッションで共有するクエリサービスを取得（データセットのバージョン単位）
+
+    キャッシュは最新のバージョンの1件だけを持ち、新しいバージョンのサービスを作ったときに
+    キャッシュから外れた前のバージョンのサービスを停止します。
+    """
+    service = QueryService(load_accident_data(dataset_version), dataset_version)
+    with _services_lock:
+        stale = [_services.pop(version) for version in list(_services) if version != dataset_version]
+        _services[dataset_version] = service
+    for previous in stale:
+        previous.close()
+    return service
@@ -0,0 +1,289 @@
+"""サーバー側ヒートマップのラスタ描画
+
+表示範囲をWebメルカトルのタイル単位に分割し、タイルごとにNumPyの2次元ヒストグラムと
+分離可能ガウシアン（FFT畳み込み）で密度を計算します。タイルの密度はキャッシュし、
+表示時に1枚の画像へ合成・着色してPNGのdata URLとしてBitmapLayerに渡します。
+クライアントへ送るデータ量は事故件数に依存しません。
+
+点はズームごとに1回だけタイル番号順に並べ（TileIndex）、各タイルの集計では
+そのタイルと周囲8タイルの点だけを取り出すため、タイル数 × 全点数の走査はしません。
+"""
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from PIL import Image
+
+from config import (
+    HEATMAP_THRESHOLD,
+    BITMAP_TILE_SIZE,
+    BITMAP_SIGMA_PIXELS,
+    BITMAP_VIEWPORT_WIDTH,
+    BITMAP_VIEWPORT_HEIGHT,
+    BITMAP_MAX_TILES,
+    BITMAP_TILE_CACHE_MAX_ENTRIES,
+    BITMAP_TILE_INDEX_CACHE_MAX_ENTRIES
+)
+from src.utils import lonlat_to_world, world_to_lonlat
+
+# deck.glのズームは512ピクセルタイル基準のため、256ピクセルのラスタタイルは1段細かいズームで作る
+DECK_TILE_SIZE = 512
+MAX_RASTER_ZOOM = 18
+
+
+def gaussian_kernel(sigma: float) -> np.ndarray:
+    """1次元ガウシアンカーネルを作成（±3σ、合計1に正規化）"""
+    radius = max(int(np.ceil(3 * sigma)), 1)
+    offsets = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _fft_convolve_axis(values: np.ndarray, kernel: np.ndarray, axis: int) -> np.ndarray:
+    """指定軸方向にFFTで畳み込み（出力サイズは入力と同じ）"""
+    n = values.shape[axis]
+    m = len(kernel)
+    size = n + m - 1
+    shape = [1] * values.ndim
+    shape[axis] = -1
+    spectrum = np.fft.rfft(values, n=size, axis=axis) * np.fft.rfft(kernel, n=size).reshape(shape)
+    full = np.fft.irfft(spectrum, n=size, axis=axis)
+    start = (m - 1) // 2
+    return np.take(full, np.arange(start, start + n), axis=axis)
+
+
+def gaussian_blur(grid: np.ndarray, sigma: float) -> np.ndarray:
+    """2次元グリッドに分離可能ガウシアンぼかしを適用
+
+    Args:
+        grid: 2次元配列
+        sigma: 標準偏差（セル単位）
+
+    Returns:
+        np.ndarray: ぼかし後の配列（負値は0に丸める）
+    """
+    if sigma <= 0:
+        return grid.astype(np.float64)
+    kernel = gaussian_kernel(sigma)
+    blurred = _fft_convolve_axis(grid.astype(np.float64), kernel, axis=0)
+    blurred = _fft_convolve_axis(blurred, kernel, axis=1)
+    return np.maximum(blurred, 0.0)
+
+
+def colorize(density: np.ndarray, color_range: list, threshold: float = HEATMAP_THRESHOLD) -> np.ndarray:
+    """密度をカラーレンジで着色したRGBA画像に変換
+
+    Args:
+        density: 2次元の密度配列
+        color_range: RGBAの色リスト（低密度→高密度）
+        threshold: 最大値に対する比率がこれ未満のセルは透明にする
+
+    Returns:
+        np.ndarray: (H, W, 4) のuint8配列
+    """
+    max_value = density.max() if density.size else 0.0
+    if max_value <= 0:
+        return np.zeros(density.shape + (4,), dtype=np.uint8)
+
+    normalized = density / max_value
+    stops = np.linspace(0.0, 1.0, len(color_range))
+    colors = np.asarray(color_range, dtype=np.float64)
+    rgba = np.stack([np.interp(normalized, stops, colors[:, c]) for c in range(4)], axis=-1)
+    rgba[normalized < threshold] = 0
+    return rgba.astype(np.uint8)
+
+
+def encode_png_data_url(rgba: np.ndarray) -> str:
+    """RGBA配列をPNGのdata URLにエンコード"""
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, mode='RGBA').save(buffer, format='PNG', optimize=True)
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def viewport_tile_range(center_lat: float, center_lon: float, zoom: float) -> tuple[int, int, int, int, int]:
+    """表示範囲を覆うラスタタイルの範囲を計算
+
+    Args:
+        center_lat: 地図中心の緯度
+        center_lon: 地図中心の経度
+        zoom: deck.glのズームレベル
+
+    Returns:
+        tuple[int, int, int, int, int]: (z, x_min, x_max, y_min, y_max)（上下左右に1タイルの余白を含む）
+    """
+    center_x, center_y = lonlat_to_world(np.array([center_lon]), np.array([center_lat]))
+    world_pixels = DECK_TILE_SIZE * 2.0 ** zoom
+    half_w = BITMAP_VIEWPORT_WIDTH / 2 / world_pixels
+    half_h = BITMAP_VIEWPORT_HEIGHT / 2 / world_pixels
+
+    z = min(int(np.floor(zoom)) + 1, MAX_RASTER_ZOOM)
+    while True:
+        n = 2 ** z
+        x_min = max(int(np.floor((center_x[0] - half_w) * n)) - 1, 0)
+        x_max = min(int(np.floor((center_x[0] + half_w) * n)) + 1, n - 1)
+        y_min = max(int(np.floor((center_y[0] - half_h) * n)) - 1, 0)
+        y_max = min(int(np.floor((center_y[0] + half_h) * n)) + 1, n - 1)
+        if z == 0 or (x_max - x_min + 1) * (y_max - y_min + 1) <= BITMAP_MAX_TILES:
+            return z, x_min, x_max, y_min, y_max
+        z -= 1
+
+
+def tile_range_bounds(tile_range: tuple[int, int, int, int, int]) -> list[float]:
+    """タイル範囲の緯度経度の範囲（BitmapLayer の bounds: [west, south, east, north]）"""
+    z, x_min, x_max, y_min, y_max = tile_range
+    n = 2 ** z
+    west, north = world_to_lonlat(x_min / n, y_min / n)
+    east, south = world_to_lonlat((x_max + 1) / n, (y_max + 1) / n)
+    return [float(west), float(south), float(east), float(north)]
+
+
+class TileIndex:
+    """1つのズームで点をタイル番号（y * 2^z + x）順に並べた索引"""
+
+    def __init__(self, world_x: np.ndarray, world_y: np.ndarray, weights: np.ndarray, z: int):
+        """
+        Args:
+            world_x: 正規化x座標
+            world_y: 正規化y座標
+            weights: 重み
+            z: タイルのズーム
+        """
+        self.z = z
+        self.n = 2 ** z
+        tile_x = np.clip(np.floor(world_x * self.n), 0, self.n - 1).astype(np.int64)
+        tile_y = np.clip(np.floor(world_y * self.n), 0, self.n - 1).astype(np.int64)
+        keys = tile_y * self.n + tile_x
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.world_x = world_x[order]
+        self.world_y = world_y[order]
+        self.weights = weights[order]
+
+    def neighborhood(self, x: int, y: int) -> np.ndarray:
+        """タイル (x, y) と周囲8タイルの点の位置（ぼかしの余白はタイルより小さいため、これで足りる）"""
+        rows = [
+            (ny * self.n + max(x - 1, 0), ny * self.n + min(x + 1, self.n - 1))
+            for ny in range(max(y - 1, 0), min(y + 1, self.n - 1) + 1)
+        ]
+        starts = np.searchsorted(self.keys, [first for first, _ in rows], side='left')
+        ends = np.searchsorted(self.keys, [last for _, last in rows], side='right')
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+
+
+@st.cache_resource(max_entries=BITMAP_TILE_INDEX_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_tile_index(
+    cache_key: tuple,
+    z: int,
+    _world_x: np.ndarray,
+    _world_y: np.ndarray,
+    _weights: np.ndarray
+) -> TileIndex:
+    """(データ・フィルタ, ズーム) 単位でキャッシュしたタイル索引を取得"""
+    return TileIndex(_world_x, _world_y, _weights, z)
+
+
+def compute_density_tile(
+    world_x: np.ndarray,
+    world_y: np.ndarray,
+    weights: np.ndarray,
+    z: int,
+    x: int,
+    y: int,
+    sigma_px: float = BITMAP_SIGMA_PIXELS
+) -> np.ndarray:
+    """1タイル分の密度ラスタを計算
+
+    ぼかしがタイル境界で途切れないよう、3σ分の余白を含めて集計してから切り出します。
+
+    Args:
+        world_x: 正規化x座標
+        world_y: 正規化y座標
+        weights: 重み
+        z: タイルのズーム
+        x: タイルx
+        y: タイルy
+        sigma_px: ぼかしの標準偏差（ピクセル）
+
+    Returns:
+        np.ndarray: (BITMAP_TILE_SIZE, BITMAP_TILE_SIZE) のfloat32配列
+    """
+    size = BITMAP_TILE_SIZE
+    pad = int(np.ceil(3 * sigma_px))
+    scale = (2 ** z) * size
+    px = world_x * scale - x * size
+    py = world_y * scale - y * size
+    inside = (px >= -pad) & (px < size + pad) & (py >= -pad) & (py < size + pad)
+
+    hist, _, _ = np.histogram2d(
+        py[inside],
+        px[inside],
+        bins=(size + 2 * pad, size + 2 * pad),
+        range=((-pad, size + pad), (-pad, size + pad)),
+        weights=weights[inside]
+    )
+    blurred = gaussian_blur(hist, sigma_px)
+    return blurred[pad:pad + size, pad:pad + size].astype(np.float32)
+
+
+def compute_indexed_tile(index: TileIndex, x: int, y: int) -> np.ndarray:
+    """タイル索引から周囲の点だけを取り出して1タイル分の密度ラスタを計算"""
+    rows = index.neighborhood(x, y)
+    return compute_density_tile(index.world_x[rows], index.world_y[rows], index.weights[rows], index.z, x, y)
+
+
+@st.cache_data(max_entries=BITMAP_TILE_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_density_tile(cache_key: tuple, z: int, x: int, y: int, _index: TileIndex) -> np.ndarray:
+    """タイル密度をキャッシュ付きで取得（cache_keyはデータ・フィルタを識別するキー）"""
+    return compute_indexed_tile(_index, x, y)
+
+
+def render_density_bitmap(
+    df: pd.DataFrame,
+    weight_col: str | None,
+    color_range: list,
+    cache_key: tuple | None,
+    tile_range: tuple[int, int, int, int, int]
+) -> tuple[str, list[float]]:
+    """タイル範囲の密度画像を合成してPNG化
+
+    Args:
+        df: 事故データ（LATITUDE/LONGITUDEを含む）
+        weight_col: 重みカラム（Noneの場合は件数）
+        color_range: 着色に使うカラーレンジ
+        cache_key: タイルキャッシュのキー（Noneの場合はキャッシュしない）
+        tile_range: viewport_tile_rangeの戻り値
+
+    Returns:
+        tuple[str, list[float]]: (PNGのdata URL, [west, south, east, north])
+    """
+    z, x_min, x_max, y_min, y_max = tile_range
+    world_x, world_y = lonlat_to_world(
+        df['LONGITUDE'].to_numpy(dtype=float),
+        df['LATITUDE'].to_numpy(dtype=float)
+    )
+    if weight_col and weight_col in df.columns:
+        weights = df[weight_col].fillna(0).to_numpy(dtype=float)
+    else:
+        weights = np.ones(len(df))
+
+    if cache_key is None:
+        index = TileIndex(world_x, world_y, weights, z)
+    else:
+        index = get_tile_index(cache_key, z, world_x, world_y, weights)
+
+    size = BITMAP_TILE_SIZE
+    mosaic = np.zeros(((y_max - y_min + 1) * size, (x_max - x_min + 1) * size), dtype=np.float32)
+    for ty in range(y_min, y_max + 1):
+        for tx in range(x_min, x_max + 1):
+            if cache_key is None:
+                tile = compute_indexed_tile(index, tx, ty)
+            else:
+                tile = get_density_tile(cache_key, z, tx, ty, index)
+            row = (ty - y_min) * size
+            col = (tx - x_min) * size
+            mosaic[row:row + size, col:col + size] = tile
+
+    image = encode_png_data_url(colorize(mosaic, color_range))
+    return image, tile_range_bounds(tile_range)
@@ -0,0 +1,181 @@
+"""市民からの要望の地点集約
+
+要望をグリッドインデックスに追加し、半径 REPORT_CLUSTER_RADIUS_M 以内にある要望同士を
+Union-Findでつないで同じ地点（クラスタ）にまとめます。新しい要望は近傍を1回検索して
+既存のクラスタに合流させるだけなので、全件を再クラスタリングせずに更新できます。
+各クラスタは周辺の事故件数と結び付け、要望件数と事故件数から「要望の多い地点」を順位付けします。
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import REPORT_CLUSTER_RADIUS_M, REPORT_ACCIDENT_LINK_RADIUS_M
+from src.spatial import GridIndex
+
+CLUSTER_COLUMNS = [
+    'cluster_id', 'lat', 'lon', 'report_count', 'latest_timestamp', 'latest_description', 'latest_image_path',
+    'request_ids'
+]
+HOTSPOT_COLUMNS = [
+    'cluster_id', 'lat', 'lon', 'report_count', 'accident_count', 'nearest_accident_m',
+    'score', 'latest_timestamp', 'latest_description', 'latest_image_path', 'request_ids'
+]
+
+
+class ReportClusterer:
+    """要望の地点クラスタを追記的に管理"""
+
+    def __init__(self, radius_m: float = REPORT_CLUSTER_RADIUS_M):
+        self.radius_m = radius_m
+        self._index = GridIndex(radius_m)
+        self._parent: list[int] = []
+        self._seen: set[str] = set()
+        self._rows: list[tuple] = []
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """取り込み済みの要望件数（キャッシュキーに使う）"""
+        return len(self._rows)
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _union(self, a: int, b: int) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            # 番号の小さい方を根にして、クラスタIDを取り込み順に依存させない
+            self._parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def update(self, requests_df: pd.DataFrame) -> int:
+        """未取り込みの要望を追加
+
+        Args:
+            requests_df: 要望データ（request_id/latitude/longitude/timestamp/description/image_pathを含む）
+
+        Returns:
+            int: 新たに取り込んだ件数
+        """
+        with self._lock:
+            new = requests_df[~requests_df['request_id'].isin(self._seen)]
+            new = new.dropna(subset=['latitude', 'longitude'])
+            for row in new.itertuples(index=False):
+                if row.request_id in self._seen:
+                    continue
+                neighbors, _ = self._index.query_radius(row.latitude, row.longitude, self.radius_m)
+                (i,) = self._index.insert(row.latitude, row.longitude)
+                self._parent.append(i)
+                for j in neighbors:
+                    self._union(i, int(j))
+                self._seen.add(row.request_id)
+                self._rows.append((
+                    row.request_id, row.latitude, row.longitude, row.timestamp, row.description, row.image_path or None
+                ))
+            return len(new)
+
+    def clusters(self) -> pd.DataFrame:
+        """クラスタごとの要望件数・代表点を取得
+
+        Returns:
+            pd.DataFrame: cluster_id/lat/lon/report_count/latest_timestamp/latest_description/
+                latest_image_path（画像付きの要望のうち最新のもの。なければNone）/request_ids
+        """
+        with self._lock:
+            if not self._rows:
+                return pd.DataFrame(columns=CLUSTER_COLUMNS)
+            rows = pd.DataFrame(self._rows, columns=['request_id', 'lat', 'lon', 'timestamp', 'description', 'image_path'])
+            rows['cluster_id'] = [self._find(i) for i in range(len(self._parent))]
+
+        rows = rows.sort_values('timestamp', kind='stable')
+        grouped = rows.groupby('cluster_id', sort=True)
+        return pd.DataFrame({
+            'lat': grouped['lat'].mean(),
+            'lon': grouped['lon'].mean(),
+            'report_count': grouped.size(),
+            'latest_timestamp': grouped['timestamp'].last(),
+            'latest_description': grouped['description'].last(),
+            # lastは欠損を飛ばすため、画像のない要望があっても最新の画像が選ばれる
+            'latest_image_path': grouped['image_path'].last(),
+            'request_ids': grouped['request_id'].agg(list)
+        }).reset_index()[CLUSTER_COLUMNS]
+
+
+def link_accidents(
+    clusters: pd.DataFrame,
+    accident_index: GridIndex,
+    link_radius_m: float = REPORT_ACCIDENT_LINK_RADIUS_M
+) -> pd.DataFrame:
+    """クラスタごとに周辺の事故件数と最寄り事故までの距離を付与し、スコア順に並べる
+
+    スコアは要望件数と周辺事故件数をそれぞれ最大値で正規化して足し合わせたものです。
+
+    Args:
+        clusters: ReportClusterer.clustersの戻り値
+        accident_index: 事故地点のGridIndex
+        link_radius_m: 周辺事故として数える半径
+
+    Returns:
+        pd.DataFrame: HOTSPOT_COLUMNSを持つデータ（scoreの降順）
+    """
+    if len(clusters) == 0:
+        return pd.DataFrame(columns=HOTSPOT_COLUMNS)
+
+    clusters = clusters.copy()
+    accident_counts = []
+    nearest = []
+    for lat, lon in zip(clusters['lat'], clusters['lon']):
+        _, distances = accident_index.query_radius(lat, lon, link_radius_m)
+        accident_counts.append(len(distances))
+        nearest.append(round(float(distances[0]), 1) if len(distances) else np.nan)
+    clusters['accident_count'] = accident_counts
+    clusters['nearest_accident_m'] = nearest
+
+    max_reports = clusters['report_count'].max()
+    max_accidents = clusters['accident_count'].max()
+    clusters['score'] = (
+        clusters['report_count'] / max_reports
+        + (clusters['accident_count'] / max_accidents if max_accidents > 0 else 0)
+    ).round(3)
+
+    return clusters.sort_values(['score', 'report_count'], ascending=False).reset_index(drop=True)[HOTSPOT_COLUMNS]
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_accident_index(dataset_version: str, _accident_df: pd.DataFrame) -> GridIndex:
+    """データバージョン単位でキャッシュした事故地点のGridIndexを取得"""
+    valid = _accident_df.dropna(subset=['LATITUDE', 'LONGITUDE'])
+    index = GridIndex(REPORT_ACCIDENT_LINK_RADIUS_M)
+    index.insert(valid['LATITUDE'].to_numpy(), valid['LONGITUDE'].to_numpy())
+    return index
+
+
+@st.cache_resource
+def get_report_clusterer() -> ReportClusterer:
+    """プロセス内で共有する要望クラスタを取得（updateで差分のみ取り込む）"""
+    return ReportClusterer()
+
+
+def get_request_hotspots(
+    dataset_version: str,
+    requests_df: pd.DataFrame,
+    accident_df: pd.DataFrame
+) -> tuple[pd.DataFrame, int]:
+    """要望の多い地点を周辺事故と結び付けて取得
+
+    Args:
+        dataset_version: 事故データのバージョン
+        requests_df: 要望データ
+        accident_df: 事故データ
+
+    Returns:
+        tuple[pd.DataFrame, int]: (link_accidentsの戻り値, 取り込み済みの要望件数)
+    """
+    clusterer = get_report_clusterer()
+    clusterer.update(requests_df)
+    hotspots = link_accidents(clusterer.clusters(), get_accident_index(dataset_version, accident_df))
+    return hotspots, clusterer.version
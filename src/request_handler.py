@@ -1,5 +1,6 @@
 """要望投稿処理"""
 import uuid
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple
@@ -8,12 +9,13 @@ from PIL import Image
 import streamlit as st
 
 from config import (
-    REQUESTS_CSV_FILE,
-    REQUESTS_IMAGES_DIR,
     MAX_IMAGE_SIZE_MB,
-    ALLOWED_IMAGE_TYPES,
-    REQUESTS_DATA_DIR
+    ALLOWED_IMAGE_TYPES
 )
+from src.image_pipeline import get_image_pipeline, image_paths, is_stored, process_image, stage_upload, to_relative_path
+from src.request_store import get_request_store
+from src.submission_queue import SubmissionQueue, get_submission_limiter, get_submission_queue
+from src.utils import TokenBucket
 
 
 def generate_request_id() -> str:
@@ -51,48 +53,63 @@ def validate_image(uploaded_file) -> Tuple[bool, str]:
     return True, ""
 
 
-def save_image(uploaded_file, request_id: str) -> Optional[str]:
-    """画像を保存
+def save_image(uploaded_file, request_id: str) -> Tuple[Optional[str], Optional[Future]]:
+    """画像を内容ハッシュで保存（縮小・EXIF除去・サムネイル生成はバックグラウンドで実行）
+
+    保存先は画像のハッシュから決まるため、処理の完了を待たずにパスを返します。
+    同じ画像が保存済みの場合は処理せずに既存の画像を参照します。
+    処理待ちが上限に達している場合は、このリクエスト内で同期的に処理します。
 
     Args:
         uploaded_file: Streamlitのアップロードファイル
         request_id: 要望ID
 
     Returns:
-        Optional[str]: 保存したファイルパス（相対パス）、失敗時はNone
+        Tuple[Optional[str], Optional[Future]]: (保存先のファイルパス（相対パス）、失敗時はNone,
+            バックグラウンド処理のFuture（バックグラウンドで処理しない場合はNone）)
     """
     if uploaded_file is None:
-        return None
+        return None, None
 
+    staged_path = None
     try:
-        # 拡張子を取得
-        ext = 'jpg' if uploaded_file.type == 'image/jpeg' else 'png'
-        filename = f"{request_id}.{ext}"
-        filepath = REQUESTS_IMAGES_DIR / filename
-
-        # ディレクトリ作成
-        REQUESTS_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-
-        # 画像を保存
-        image = Image.open(uploaded_file)
-        image.save(filepath)
-
-        # 相対パスを返す
-        return f"data/requests/images/{filename}"
+        digest, staged_path = stage_upload(uploaded_file)
+        image_path, _ = image_paths(digest)
+
+        if is_stored(digest):
+            # 重複画像は参照を増やすだけ（GCの猶予期間を延ばすため更新日時を進める）
+            image_path.touch()
+            staged_path.unlink(missing_ok=True)
+            return to_relative_path(image_path), None
+
+        # ヘッダーのみ読み込んで画像として開けるかを確認（画素のデコードはワーカーで行う）
+        with Image.open(staged_path):
+            pass
+
+        future = get_image_pipeline().submit(staged_path, digest)
+        if future is None:
+            try:
+                process_image(staged_path, digest)
+            finally:
+                staged_path.unlink(missing_ok=True)
+
+        return to_relative_path(image_path), future
     except Exception as e:
+        if staged_path is not None:
+            staged_path.unlink(missing_ok=True)
         st.error(f"画像の保存に失敗しました: {str(e)}")
-        return None
+        return None, None
 
 
-def save_request_metadata(
+def build_request_record(
     request_id: str,
     latitude: float,
     longitude: float,
     description: str,
     address: Optional[str],
     image_path: Optional[str]
-) -> bool:
-    """要望メタデータをCSVファイルに追記保存
+) -> dict:
+    """要望ストアに保存する要望データを作成
 
     Args:
         request_id: 要望ID
@@ -103,36 +120,30 @@ def save_request_metadata(
         image_path: 画像パス（任意）
 
     Returns:
-        bool: 成功時True、失敗時False
+        dict: REQUEST_COLUMNSをキーに持つ要望データ
     """
-    try:
-        # ディレクトリ作成
-        REQUESTS_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-        # 新規要望データ
-        new_request = {
-            'request_id': request_id,
-            'timestamp': datetime.now().isoformat(),
-            'latitude': latitude,
-            'longitude': longitude,
-            'description': description,
-            'address': address if address else '',
-            'image_path': image_path if image_path else ''
-        }
-
-        # ファイルが存在する場合は追記、存在しない場合は新規作成
-        if REQUESTS_CSV_FILE.exists():
-            df = pd.read_csv(REQUESTS_CSV_FILE)
-            df = pd.concat([df, pd.DataFrame([new_request])], ignore_index=True)
-        else:
-            df = pd.DataFrame([new_request])
-
-        df.to_csv(REQUESTS_CSV_FILE, index=False, encoding='utf-8')
-        return True
+    return {
+        'request_id': request_id,
+        'timestamp': datetime.now().isoformat(),
+        'latitude': latitude,
+        'longitude': longitude,
+        'description': description,
+        'address': address if address else '',
+        'image_path': image_path if image_path else ''
+    }
 
-    except Exception as e:
-        st.error(f"要望の保存に失敗しました: {str(e)}")
-        return False
+
+def _clear_image_on_failure(future: Future, queue: SubmissionQueue, record: dict) -> None:
+    """画像処理が失敗した要望を、image_pathを空にした要望で置き換える（画像処理のスレッドで呼ばれる）
+
+    訂正は元の要望の後に投稿キューへ書き込むため、反映の順序も元の要望の後になります。
+    """
+    if future.cancelled() or future.exception() is not None:
+        try:
+            queue.enqueue({**record, 'image_path': ''}, check_capacity=False)
+        except OSError:
+            # 訂正を書き込めなくても投稿は受付済み（画像の参照が残るだけ）
+            pass
 
 
 def submit_request(
@@ -140,16 +151,20 @@ def submit_request(
     longitude: float,
     description: str,
     address: Optional[str],
-    image_file
+    image_file,
+    rate_limiter: Optional[TokenBucket] = None
 ) -> Tuple[bool, str]:
     """要望を投稿
 
+    要望は投稿キューに書き込むだけで、要望ストアへの反映はバックグラウンドでまとめて行います。
+
     Args:
         latitude: 緯度
         longitude: 経度
         description: 要望内容
         address: 住所（任意）
         image_file: 画像ファイル（任意）
+        rate_limiter: セッションごとのレート制限（任意。プロセス全体のレート制限は常に掛ける）
 
     Returns:
         Tuple[bool, str]: (success, message)
@@ -163,14 +178,32 @@ def submit_request(
     if not is_valid:
         return False, error_msg
 
+    # レート制限（セッションごと、プロセス全体の順）とアドミッション制御（画像を保存する前に混雑を判定する）。
+    # 1セッションの連投でプロセス全体のトークンを使い切らないようセッションのトークンを先に取り、
+    # その後の判定で断った場合は取得済みのトークンを返す（断られた投稿で利用者の枠を減らさない）
+    acquired = []
+    for limiter in (rate_limiter, get_submission_limiter()):
+        if limiter is not None and not limiter.try_acquire():
+            for previous in acquired:
+                previous.release()
+            return False, f"短時間に多くの投稿がありました。{int(limiter.retry_after()) + 1}秒ほどおいて再度お試しください。"
+        if limiter is not None:
+            acquired.append(limiter)
+
+    queue = get_submission_queue()
+    if queue.is_full():
+        for limiter in acquired:
+            limiter.release()
+        return False, "ただいま投稿が集中しています。時間をおいて再度お試しください。"
+
     # 要望ID生成
     request_id = generate_request_id()
 
     # 画像保存
-    image_path = save_image(image_file, request_id)
+    image_path, image_future = save_image(image_file, request_id)
 
-    # メタデータ保存
-    success = save_request_metadata(
+    # 投稿キューへ書き込み
+    record = build_request_record(
         request_id,
         latitude,
         longitude,
@@ -178,8 +211,27 @@ def submit_request(
         address,
         image_path
     )
+    try:
+        accepted = queue.enqueue(record)
+    except OSError as e:
+        st.error(f"要望の保存に失敗しました: {str(e)}")
+        accepted = False
 
-    if success:
+    if accepted and image_future is not None:
+        # バックグラウンドの画像処理が再試行しても失敗した場合は、画像のない要望に訂正する
+        image_future.add_done_callback(lambda future: _clear_image_on_failure(future, queue, record))
+
+    if accepted:
         return True, "要望を受け付けました。ご協力ありがとうございます。"
     else:
         return False, "送信に失敗しました。時間をおいて再度お試しください。"
+
+
+def load_requests() -> pd.DataFrame:
+    """投稿済みの要望を全件読み込み
+
+    Returns:
+        pd.DataFrame: 要望データ（request_id/timestamp/latitude/longitude/description/address/image_path）
+    """
+    return get_request_store().load()
+
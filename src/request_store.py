@@ -0,0 +1,334 @@
+"""要望データの永続化ストア
+
+バックエンドは設定（REQUEST_STORE_BACKEND）で選択します。
+
+- jsonl: 投稿はJSONL形式の追記専用ログに、ファイルロック下で1行ずつ追記します（O(1)）。
+  ログが一定サイズを超えると、既存スナップショットと統合してParquet形式の
+  列指向スナップショットへコンパクションし、ログを空にします。
+  読み込みはスナップショットとログ末尾を結合し、request_idで重複を除去します。
+- sqlite: ローカルのSQLite（WALモード）に保存し、緯度経度にR*Treeインデックスを張ります。
+  表示範囲・周辺の要望検索がインデックス検索になります。
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from config import (
+    REQUESTS_CSV_FILE,
+    REQUESTS_LOG_FILE,
+    REQUESTS_SNAPSHOT_FILE,
+    REQUESTS_DB_FILE,
+    REQUESTS_COMPACT_BYTES,
+    REQUEST_STORE_BACKEND
+)
+from src.utils import haversine_m, radius_to_bbox
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+REQUEST_COLUMNS = ['request_id', 'timestamp', 'latitude', 'longitude', 'description', 'address', 'image_path']
+
+
+@contextmanager
+def file_lock(lock_path: Path, shared: bool = False) -> Iterator[None]:
+    """プロセス間で有効なファイルロックを取得
+
+    Args:
+        lock_path: ロックファイルのパス
+        shared: 共有ロック（読み込み用）にするか。Windowsでは常に排他ロック
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """列を揃え、request_idで重複を除去（後勝ち）"""
+    df = df.reindex(columns=REQUEST_COLUMNS)
+    df['address'] = df['address'].fillna('')
+    df['image_path'] = df['image_path'].fillna('')
+    df = df.drop_duplicates(subset=['request_id'], keep='last')
+    return df.reset_index(drop=True)
+
+
+def _filter_bbox(df: pd.DataFrame, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.DataFrame:
+    mask = (
+        df['latitude'].between(min_lat, max_lat)
+        & df['longitude'].between(min_lon, max_lon)
+    )
+    return df[mask].reset_index(drop=True)
+
+
+def _filter_nearby(df: pd.DataFrame, latitude: float, longitude: float, radius_m: float) -> pd.DataFrame:
+    """矩形で絞り込んだ候補から半径内の要望を距離順に返す"""
+    df = df.copy()
+    df['distance_m'] = haversine_m(latitude, longitude, df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float))
+    return df[df['distance_m'] <= radius_m].sort_values('distance_m').reset_index(drop=True)
+
+
+class JsonlRequestStore:
+    """追記専用JSONLログ + Parquetスナップショットによる要望ストア"""
+
+    def __init__(
+        self,
+        log_file: Path = REQUESTS_LOG_FILE,
+        snapshot_file: Path = REQUESTS_SNAPSHOT_FILE,
+        legacy_csv_file: Path = REQUESTS_CSV_FILE,
+        compact_bytes: int = REQUESTS_COMPACT_BYTES,
+        fsync: bool = True
+    ):
+        self.log_file = log_file
+        self.snapshot_file = snapshot_file
+        self.legacy_csv_file = legacy_csv_file
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self.lock_file = log_file.with_suffix(log_file.suffix + '.lock')
+
+    def append(self, record: dict) -> None:
+        """要望を1件追記"""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[dict]) -> None:
+        """要望をまとめて追記（1回のロック・1回の書き込み）
+
+        Args:
+            records: REQUEST_COLUMNSをキーに持つ辞書の列
+        """
+        payload = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+        if not payload:
+            return
+
+        with file_lock(self.lock_file):
+            with open(self.log_file, 'a+b') as f:
+                # 書き込み途中で中断した末尾行があれば改行で閉じ、新しい行と連結されないようにする
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        payload = b'\n' + payload
+                f.write(payload)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                log_size = f.tell()
+
+            if log_size >= self.compact_bytes:
+                self._compact_locked()
+
+    def compact(self) -> int:
+        """ログをスナップショットへ統合
+
+        Returns:
+            int: コンパクション後の要望件数
+        """
+        with file_lock(self.lock_file):
+            return self._compact_locked()
+
+    def _compact_locked(self) -> int:
+        df = self._read_locked()
+        tmp_file = self.snapshot_file.with_suffix('.parquet.tmp')
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, self.snapshot_file)
+        # スナップショットの置き換え後にログを空にする（途中で落ちても重複は読み込み時に除去される）
+        with open(self.log_file, 'wb') as f:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return len(df)
+
+    def _read_log(self) -> pd.DataFrame:
+        if not self.log_file.exists():
+            return pd.DataFrame(columns=REQUEST_COLUMNS)
+        records = []
+        with open(self.log_file, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # 書き込み途中で中断した末尾行は無視する
+                    continue
+        return pd.DataFrame(records, columns=REQUEST_COLUMNS)
+
+    def _read_locked(self) -> pd.DataFrame:
+        if self.snapshot_file.exists():
+            base = pd.read_parquet(self.snapshot_file)
+        elif self.legacy_csv_file.exists():
+            base = pd.read_csv(self.legacy_csv_file, encoding='utf-8')
+        else:
+            base = pd.DataFrame(columns=REQUEST_COLUMNS)
+
+        log = self._read_log()
+        frames = [df for df in (base, log) if len(df)]
+        if not frames:
+            return _normalize_frame(pd.DataFrame(columns=REQUEST_COLUMNS))
+        return _normalize_frame(pd.concat(frames, ignore_index=True))
+
+    def load(self) -> pd.DataFrame:
+        """全要望を読み込み
+
+        Returns:
+            pd.DataFrame: REQUEST_COLUMNSを持つ要望データ
+        """
+        with file_lock(self.lock_file, shared=True):
+            return self._read_locked()
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.DataFrame:
+        """表示範囲内の要望を取得（全件走査）"""
+        return _filter_bbox(self.load(), min_lat, min_lon, max_lat, max_lon)
+
+    def query_nearby(self, latitude: float, longitude: float, radius_m: float) -> pd.DataFrame:
+        """指定地点から半径radius_m以内の要望を距離順に取得（全件走査）"""
+        return _filter_nearby(self.query_bbox(*radius_to_bbox(latitude, longitude, radius_m)), latitude, longitude, radius_m)
+
+
+class SqliteRequestStore:
+    """SQLite（WALモード）+ R*Tree空間インデックスによる要望ストア"""
+
+    def __init__(self, db_file: Path = REQUESTS_DB_FILE):
+        self.db_file = db_file
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # 接続はスレッド間で共有できないため操作ごとに開く
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        if not self._initialized:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS requests (
+                    id INTEGER PRIMARY KEY,
+                    request_id TEXT NOT NULL UNIQUE,
+                    timestamp TEXT,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    description TEXT,
+                    address TEXT,
+                    image_path TEXT
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS requests_rtree USING rtree(
+                    id, min_lat, max_lat, min_lon, max_lon
+                );
+            """)
+            self._initialized = True
+        conn.execute('PRAGMA synchronous = NORMAL')
+        return conn
+
+    def append(self, record: dict) -> None:
+        """要望を1件追記"""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[dict]) -> int:
+        """要望をまとめて追記（1トランザクション）
+
+        既存のrequest_idの要望は内容を置き換えます（JSONLストアの後勝ちと同じ）。
+        同じ要望を繰り返し追記しても結果は変わりません。
+
+        Returns:
+            int: 新たに追加した件数（置き換えた要望は含めない）
+        """
+        inserted = 0
+        conn = self._connect()
+        try:
+            with conn:
+                for r in records:
+                    lat, lon = float(r['latitude']), float(r['longitude'])
+                    values = (r.get('timestamp'), lat, lon, r.get('description'), r.get('address') or '', r.get('image_path') or '')
+                    existing = conn.execute("SELECT id FROM requests WHERE request_id = ?", (r['request_id'],)).fetchone()
+                    if existing is None:
+                        cursor = conn.execute(
+                            "INSERT INTO requests "
+                            "(timestamp, latitude, longitude, description, address, image_path, request_id) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            values + (r['request_id'],)
+                        )
+                        conn.execute(
+                            "INSERT INTO requests_rtree VALUES (?, ?, ?, ?, ?)",
+                            (cursor.lastrowid, lat, lat, lon, lon)
+                        )
+                        inserted += 1
+                    else:
+                        conn.execute(
+                            "UPDATE requests SET timestamp = ?, latitude = ?, longitude = ?, "
+                            "description = ?, address = ?, image_path = ? WHERE id = ?",
+                            values + existing
+                        )
+                        conn.execute(
+                            "UPDATE requests_rtree SET min_lat = ?, max_lat = ?, min_lon = ?, max_lon = ? WHERE id = ?",
+                            (lat, lat, lon, lon) + existing
+                        )
+        finally:
+            conn.close()
+        return inserted
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        return df.reindex(columns=REQUEST_COLUMNS)
+
+    def load(self) -> pd.DataFrame:
+        """全要望を読み込み"""
+        return self._query(f"SELECT {', '.join(REQUEST_COLUMNS)} FROM requests ORDER BY id")
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.DataFrame:
+        """表示範囲内の要望をR*Treeインデックスで取得
+
+        R*Treeは座標を32bit浮動小数点に丸めて保持するため、インデックスは範囲と重なる矩形で
+        候補を絞り込むだけにし、範囲内かどうかは元の座標で判定します。
+        """
+        columns = ', '.join(f'r.{c}' for c in REQUEST_COLUMNS)
+        return self._query(
+            f"SELECT {columns} FROM requests_rtree t JOIN requests r ON r.id = t.id "
+            "WHERE t.max_lat >= ? AND t.min_lat <= ? AND t.max_lon >= ? AND t.min_lon <= ? "
+            "AND r.latitude BETWEEN ? AND ? AND r.longitude BETWEEN ? AND ? "
+            "ORDER BY r.id",
+            (min_lat, max_lat, min_lon, max_lon, min_lat, max_lat, min_lon, max_lon)
+        )
+
+    def query_nearby(self, latitude: float, longitude: float, radius_m: float) -> pd.DataFrame:
+        """指定地点から半径radius_m以内の要望を距離順に取得（R*Treeで矩形検索後に距離で判定）"""
+        return _filter_nearby(self.query_bbox(*radius_to_bbox(latitude, longitude, radius_m)), latitude, longitude, radius_m)
+
+
+def migrate_to_sqlite(source: JsonlRequestStore, target: SqliteRequestStore) -> int:
+    """既存の要望（旧requests.csv・JSONLログ・スナップショット）をSQLiteへ移行
+
+    request_idが既に存在する要望は同じ内容で置き換えるため、繰り返し実行しても安全です。
+
+    Returns:
+        int: 新たに移行した件数
+    """
+    df = source.load()
+    df = df.astype(object).where(df.notna(), None)
+    return target.append_many(df.to_dict(orient='records'))
+
+
+def get_request_store() -> JsonlRequestStore | SqliteRequestStore:
+    """設定（REQUEST_STORE_BACKEND）に応じた要望ストアを取得"""
+    if REQUEST_STORE_BACKEND == 'sqlite':
+        return SqliteRequestStore()
+    if REQUEST_STORE_BACKEND == 'jsonl':
+        return JsonlRequestStore()
+    raise ValueError(f"未対応の要望ストアです: {REQUEST_STORE_BACKEND}")
@@ -0,0 +1,168 @@
+"""オフラインの逆ジオコーディング（緯度経度 -> 最寄りの市区町村代表点）
+
+市区町村の代表点（output_population.csv の lat/lon）を一辺 cell_deg 度のグリッドに対応付け、
+セルごとに「セル内のどの点から見ても最寄りになりうる代表点」を前計算しておきます。
+セル中心から最寄りの代表点までの距離を d、セル中心から角までの距離を h とすると、
+セル内の点の最寄り代表点はセル中心から d + 2h 以内にあるため（三角不等式）、
+その候補だけと距離を比べれば厳密な最寄りが求まります。
+
+問い合わせはセル番号で候補表を引き、(点数, 候補数) の距離行列の argmin をとるだけなので、
+ネットワークや木構造の探索なしにまとめて処理できます。候補が多すぎるセル（海上など）と
+グリッド外の点は全代表点との総当たりで求めます。
+"""
+import threading
+from typing import Tuple
+
+import numpy as np
+
+from config import REVERSE_GEOCODER_CELL_DEGREES, REVERSE_GEOCODER_MAX_CANDIDATES
+from src.spatial import chord_to_arc, lonlat_to_xyz
+
+# 距離行列を作るときに1度に処理する件数（メモリ使用量の上限）
+_CHUNK_ROWS = 65536
+
+
+class MunicipalityLocator:
+    """市区町村代表点の最寄り検索"""
+
+    def __init__(
+        self,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        cell_deg: float = REVERSE_GEOCODER_CELL_DEGREES,
+        max_candidates: int = REVERSE_GEOCODER_MAX_CANDIDATES
+    ):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.cell_deg = cell_deg
+        self._xyz = lonlat_to_xyz(lat, lon)
+
+        self.min_lat = np.floor(lat.min() / cell_deg) * cell_deg - cell_deg
+        self.min_lon = np.floor(lon.min() / cell_deg) * cell_deg - cell_deg
+        self.n_lat = int(np.ceil((lat.max() - self.min_lat) / cell_deg)) + 2
+        self.n_lon = int(np.ceil((lon.max() - self.min_lon) / cell_deg)) + 2
+
+        cell_lat = self.min_lat + (np.arange(self.n_lat) + 0.5) * cell_deg
+        cell_lon = self.min_lon + (np.arange(self.n_lon) + 0.5) * cell_deg
+        center_lat, center_lon = (a.ravel() for a in np.meshgrid(cell_lat, cell_lon, indexing='ij'))
+        centers = lonlat_to_xyz(center_lat, center_lon)
+        # セル中心から4隅までの距離の最大値
+        half = cell_deg / 2
+        reach = np.max([
+            np.linalg.norm(lonlat_to_xyz(center_lat + dlat, center_lon + dlon) - centers, axis=1)
+            for dlat in (-half, half) for dlon in (-half, half)
+        ], axis=0)
+
+        # 候補表はセルごとに、初めて問い合わせがあったときに作る（事故のないセルの分は計算しない）
+        n_cells = len(centers)
+        self._width = min(max_candidates, len(self._xyz))
+        self._centers = centers
+        self._reach = reach
+        self._squared_norms = (self._xyz ** 2).sum(axis=1)
+        self._candidates = np.zeros((n_cells, self._width), dtype=np.int32)
+        self._counts = np.zeros(n_cells, dtype=np.int32)
+        # 候補の座標はセル中心からの相対位置（数十km以内）として float32 で持つ。
+        # x/y/z を別々の配列にして、問い合わせ時の距離計算を要素ごとの演算だけにする
+        self._offsets = [np.zeros((n_cells, self._width), dtype=np.float32) for _ in range(3)]
+        self._built = np.zeros(n_cells, dtype=bool)
+        self._lock = threading.Lock()
+
+    def _build_cells(self, cells: np.ndarray) -> None:
+        """指定セルの候補表を作成"""
+        width = self._width
+        step = max(1, _CHUNK_ROWS * 16 // len(self._xyz))
+        for start in range(0, len(cells), step):
+            block_cells = cells[start:start + step]
+            block = self._centers[block_cells]
+            # |a - b|^2 = |a|^2 + |b|^2 - 2a・b で距離行列を行列積から求める
+            squared = (block ** 2).sum(axis=1)[:, None] + self._squared_norms[None, :] - 2 * block @ self._xyz.T
+            distances = np.sqrt(np.maximum(squared, 0))
+            # 行列積の丸め誤差を見込んで1m広げる
+            bound = distances.min(axis=1) + 2 * self._reach[block_cells] + 1.0
+            inside = distances <= bound[:, None]
+            counts = inside.sum(axis=1)
+            keyed = np.where(inside, distances, np.inf)
+            if width < len(self._xyz):
+                order = np.argpartition(keyed, width - 1, axis=1)[:, :width]
+            else:
+                order = np.broadcast_to(np.arange(width), keyed.shape)
+            order = np.take_along_axis(order, np.argsort(np.take_along_axis(keyed, order, axis=1), axis=1), axis=1)
+            # 候補が width 件に満たないセルは最も近い候補で埋める（argminの結果は変わらない）
+            valid = np.arange(width)[None, :] < counts[:, None]
+            candidates = np.where(valid, order, order[:, :1])
+
+            self._candidates[block_cells] = candidates
+            self._counts[block_cells] = counts
+            offsets = self._xyz[candidates] - block[:, None, :]
+            for axis in range(3):
+                self._offsets[axis][block_cells] = offsets[:, :, axis]
+            self._built[block_cells] = True
+
+    def __len__(self) -> int:
+        return len(self._xyz)
+
+    def _nearest_bruteforce(self, xyz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """全代表点との総当たりで最寄りを検索（戻り値の距離は直線距離）"""
+        indices = np.empty(len(xyz), dtype=np.int64)
+        chord = np.empty(len(xyz))
+        step = max(1, _CHUNK_ROWS * 16 // len(self._xyz))
+        for start in range(0, len(xyz), step):
+            block = xyz[start:start + step]
+            nearest = (((self._xyz ** 2).sum(axis=1)[None, :] - 2 * block @ self._xyz.T)).argmin(axis=1)
+            indices[start:start + step] = nearest
+            chord[start:start + step] = np.linalg.norm(self._xyz[nearest] - block, axis=1)
+        return indices, chord
+
+    def query(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """各点の最寄り代表点を検索
+
+        Args:
+            lat: 緯度の配列
+            lon: 経度の配列
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (代表点の番号（緯度経度が欠損の点は-1）, 大円距離（メートル）)
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        indices = np.full(len(lat), -1, dtype=np.int64)
+        distances = np.full(len(lat), np.nan)
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        row = np.floor((lat - self.min_lat) / self.cell_deg)
+        col = np.floor((lon - self.min_lon) / self.cell_deg)
+        in_grid = valid & (row >= 0) & (row < self.n_lat) & (col >= 0) & (col < self.n_lon)
+        cells = np.where(in_grid, row * self.n_lon + col, 0).astype(np.int64)
+        touched = np.unique(cells[in_grid])
+        if not self._built[touched].all():
+            with self._lock:
+                self._build_cells(touched[~self._built[touched]])
+        counts = self._counts[cells]
+        width = self._width
+        # 候補が多すぎるセルの点は総当たりに回す
+        in_grid &= counts <= width
+
+        # 候補の少ないセルの点は候補表の先頭の列だけで比べる（大半のセルは数件）
+        lower = 0
+        for tier in sorted({min(w, width) for w in (4, 8, 16, 32)} | {width}):
+            points = np.flatnonzero(in_grid & (counts > lower) & (counts <= tier))
+            lower = tier
+            for start in range(0, len(points), _CHUNK_ROWS):
+                chunk = points[start:start + _CHUNK_ROWS]
+                chunk_cells = cells[chunk]
+                offset = (lonlat_to_xyz(lat[chunk], lon[chunk]) - self._centers[chunk_cells]).astype(np.float32)
+                squared = np.zeros((len(chunk), tier), dtype=np.float32)
+                for axis in range(3):
+                    delta = self._offsets[axis][chunk_cells, :tier] - offset[:, axis, None]
+                    squared += delta * delta
+                best = squared.argmin(axis=1)
+                rows = np.arange(len(chunk))
+                indices[chunk] = self._candidates[chunk_cells, best]
+                distances[chunk] = np.sqrt(squared[rows, best])
+
+        rest = np.flatnonzero(valid & ~in_grid)
+        if len(rest):
+            indices[rest], distances[rest] = self._nearest_bruteforce(lonlat_to_xyz(lat[rest], lon[rest]))
+
+        distances[valid] = chord_to_arc(distances[valid])
+        return indices, distances
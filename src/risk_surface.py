@@ -0,0 +1,265 @@
+"""事故リスク面（条件ごとのカーネル密度推定）
+
+RandomForestで1シナリオ1地点を予測すると全国の重心付近に寄ってしまうため、条件
+（事故種別 × 天候など）の組み合わせごとに、事故地点の IMPACT 重み付きカーネル密度を
+日本全域の固定グリッド（Webメルカトル座標）上で推定します。
+
+- 密度は条件の組み合わせごとに2次元ヒストグラムを作り、分離可能ガウシアンをFFTで畳み込んで求めます。
+- カーネル密度は重みについて線形なので、複数の条件を選んだシナリオの密度は組み合わせごとの
+  ラスタの和になります。ラスタを事前計算しておけば、任意のシナリオを足し算だけで重ねられます。
+- ラスタはラスタごとの最大値で uint16 に量子化し、学習データのバージョンごとに圧縮した .npz に保存します。
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import (
+    ECONOMIC_IMPACT_POPULATION_FILE,
+    RISK_SURFACE_BOUNDS,
+    RISK_SURFACE_CONDITIONS,
+    RISK_SURFACE_DIR,
+    RISK_SURFACE_SIGMA_KM,
+    RISK_SURFACE_WIDTH
+)
+from src.raster import colorize, encode_png_data_url, gaussian_blur
+from src.utils import lonlat_to_world, world_to_lonlat
+
+# 赤道でのWebメルカトル正規化座標1あたりの距離（メートル）
+_WORLD_METERS = 40075016.686
+_REFERENCE_LAT = 35.0
+_QUANT_LEVELS = np.iinfo(np.uint16).max
+
+
+class RiskSurface:
+    """条件の組み合わせごとの密度ラスタ"""
+
+    def __init__(
+        self,
+        keys: pd.DataFrame,
+        rasters: np.ndarray,
+        scales: np.ndarray,
+        world_bounds: tuple[float, float, float, float],
+        version: str = ''
+    ):
+        """
+        Args:
+            keys: 組み合わせごとの条件の値（列は条件名）と件数（count）・IMPACT合計（impact）
+            rasters: (組み合わせ数, 高さ, 幅) の uint16 配列（ラスタごとの最大値で量子化）
+            scales: 組み合わせごとの量子化の倍率（元の密度 = ラスタ × 倍率）
+            world_bounds: グリッドの範囲（Webメルカトル正規化座標の x_min, y_min, x_max, y_max）
+            version: 元データのバージョン
+        """
+        self.keys = keys.reset_index(drop=True)
+        self.rasters = rasters
+        self.scales = scales.astype(np.float32)
+        self.world_bounds = world_bounds
+        self.version = version
+        self.conditions = [column for column in self.keys.columns if column not in ('count', 'impact')]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rasters.shape[1:]
+
+    def options(self) -> dict[str, list[str]]:
+        """条件ごとの選択肢（件数の多い順）"""
+        return {
+            column: self.keys.groupby(column)['count'].sum().sort_values(ascending=False).index.tolist()
+            for column in self.conditions
+        }
+
+    def select(self, selection: Optional[dict[str, list[str]]] = None) -> np.ndarray:
+        """選択した条件に当てはまる組み合わせの番号（条件を指定しない列はすべての値）"""
+        mask = np.ones(len(self.keys), dtype=bool)
+        for column, values in (selection or {}).items():
+            if values:
+                mask &= self.keys[column].isin(values).to_numpy()
+        return np.flatnonzero(mask)
+
+    def density(self, selection: Optional[dict[str, list[str]]] = None) -> np.ndarray:
+        """シナリオの密度ラスタ（選択した組み合わせのラスタの和）
+
+        Returns:
+            np.ndarray: (高さ, 幅) の float32 配列（IMPACT重み付きの事故密度）
+        """
+        indices = self.select(selection)
+        total = np.zeros(self.shape, dtype=np.float32)
+        for index in indices:
+            total += self.rasters[index] * self.scales[index]
+        return total
+
+    def lonlat_bounds(self) -> list[float]:
+        """グリッドの範囲（BitmapLayer の bounds: [west, south, east, north]）"""
+        x_min, y_min, x_max, y_max = self.world_bounds
+        west, north = world_to_lonlat(x_min, y_min)
+        east, south = world_to_lonlat(x_max, y_max)
+        return [float(west), float(south), float(east), float(north)]
+
+    def render(self, selection: Optional[dict[str, list[str]]], color_range: list) -> tuple[str, dict]:
+        """シナリオの密度を着色したPNGのdata URLと要約を返す
+
+        Returns:
+            tuple[str, dict]: (PNGのdata URL, 件数・IMPACT合計・組み合わせ数)
+        """
+        indices = self.select(selection)
+        image = encode_png_data_url(colorize(self.density(selection), color_range))
+        summary = {
+            'combinations': len(indices),
+            'count': int(self.keys['count'].to_numpy()[indices].sum()),
+            'impact': float(self.keys['impact'].to_numpy()[indices].sum()),
+        }
+        return image, summary
+
+
+def grid_geometry(
+    bounds: tuple[float, float, float, float] = RISK_SURFACE_BOUNDS,
+    width: int = RISK_SURFACE_WIDTH
+) -> tuple[tuple[float, float, float, float], int, int, float]:
+    """グリッドのWebメルカトル範囲・高さ・幅・セルの大きさを計算
+
+    Returns:
+        tuple: ((x_min, y_min, x_max, y_max), 高さ, 幅, セルの大きさ（正規化座標）)
+    """
+    west, south, east, north = bounds
+    x_min, y_min = lonlat_to_world(np.array([west]), np.array([north]))
+    x_max, y_max = lonlat_to_world(np.array([east]), np.array([south]))
+    cell = float(x_max[0] - x_min[0]) / width
+    height = int(np.ceil(float(y_max[0] - y_min[0]) / cell))
+    world_bounds = (float(x_min[0]), float(y_min[0]), float(x_min[0]) + width * cell, float(y_min[0]) + height * cell)
+    return world_bounds, height, width, cell
+
+
+def build_risk_surface(
+    df: pd.DataFrame,
+    conditions: list[str] = RISK_SURFACE_CONDITIONS,
+    bounds: tuple[float, float, float, float] = RISK_SURFACE_BOUNDS,
+    width: int = RISK_SURFACE_WIDTH,
+    sigma_km: float = RISK_SURFACE_SIGMA_KM,
+    version: str = ''
+) -> RiskSurface:
+    """条件の組み合わせごとに IMPACT 重み付きのカーネル密度ラスタを計算
+
+    Args:
+        df: 事故データ（LATITUDE/LONGITUDE/IMPACT と条件の列を含む）
+        conditions: ラスタを分ける条件の列
+        bounds: グリッドの範囲（西・南・東・北）
+        width: 東西方向のセル数
+        sigma_km: カーネルの標準偏差（km）
+        version: 元データのバージョン
+
+    Returns:
+        RiskSurface: 組み合わせごとのラスタ
+    """
+    df = df.dropna(subset=['LATITUDE', 'LONGITUDE', 'IMPACT'] + conditions)
+    world_bounds, height, width, cell = grid_geometry(bounds, width)
+    x_min, y_min, x_max, y_max = world_bounds
+    sigma_cells = sigma_km * 1000 / (cell * _WORLD_METERS * np.cos(np.radians(_REFERENCE_LAT)))
+
+    world_x, world_y = lonlat_to_world(df['LONGITUDE'].to_numpy(dtype=float), df['LATITUDE'].to_numpy(dtype=float))
+    impact = df['IMPACT'].to_numpy(dtype=float)
+    codes, uniques = pd.MultiIndex.from_frame(df[conditions].astype(str)).factorize()
+
+    n = len(uniques)
+    rasters = np.zeros((n, height, width), dtype=np.uint16)
+    scales = np.zeros(n, dtype=np.float32)
+    counts = np.bincount(codes, minlength=n)
+    impacts = np.bincount(codes, weights=impact, minlength=n)
+    # 組み合わせごとに行をまとめてから処理する
+    order = np.argsort(codes, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    for i in range(n):
+        rows = order[starts[i]:starts[i + 1]]
+        hist, _, _ = np.histogram2d(
+            world_y[rows], world_x[rows],
+            bins=(height, width),
+            range=((y_min, y_max), (x_min, x_max)),
+            weights=impact[rows]
+        )
+        density = gaussian_blur(hist, sigma_cells)
+        peak = density.max()
+        if peak > 0:
+            scales[i] = peak / _QUANT_LEVELS
+            rasters[i] = np.rint(density / scales[i]).astype(np.uint16)
+
+    keys = pd.DataFrame(list(uniques), columns=conditions)
+    keys['count'] = counts
+    keys['impact'] = impacts
+    return RiskSurface(keys, rasters, scales, world_bounds, version)
+
+
+def risk_surface_path(version: str) -> Path:
+    return RISK_SURFACE_DIR / f"{version}.npz"
+
+
+def save_risk_surface(surface: RiskSurface, path: Path) -> None:
+    """ラスタを圧縮して保存（一時ファイルに書いてから置き換える）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.stem + '.tmp.npz')
+    np.savez_compressed(
+        tmp_path,
+        rasters=surface.rasters,
+        scales=surface.scales,
+        world_bounds=np.array(surface.world_bounds),
+        conditions=np.array(surface.conditions),
+        keys=surface.keys[surface.conditions].to_numpy(dtype=str),
+        counts=surface.keys['count'].to_numpy(),
+        impacts=surface.keys['impact'].to_numpy(),
+        version=np.array(surface.version)
+    )
+    os.replace(tmp_path, path)
+
+
+def load_risk_surface(path: Path) -> RiskSurface:
+    """保存済みのラスタを読み込み"""
+    with np.load(path) as data:
+        keys = pd.DataFrame(data['keys'], columns=data['conditions'].tolist())
+        keys['count'] = data['counts']
+        keys['impact'] = data['impacts']
+        return RiskSurface(keys, data['rasters'], data['scales'], tuple(data['world_bounds'].tolist()), str(data['version']))
+
+
+def is_risk_surface_ready(version: str) -> bool:
+    return risk_surface_path(version).exists()
+
+
+def ensure_risk_surface(version: str, df: Optional[pd.DataFrame] = None) -> RiskSurface:
+    """保存済みのリスク面を読み込み、なければ計算して保存
+
+    Args:
+        version: 元データ（economic_impact_population.csv）のバージョン
+        df: 元データ（Noneなら必要なときだけ読み込む）
+    """
+    path = risk_surface_path(version)
+    if path.exists():
+        return load_risk_surface(path)
+    if df is None:
+        df = pd.read_csv(ECONOMIC_IMPACT_POPULATION_FILE)
+    surface = build_risk_surface(df, version=version)
+    save_risk_surface(surface, path)
+    return surface
+
+
+@st.cache_resource(max_entries=2, show_spinner="リスク面を準備中...")
+def get_risk_surface(version: str) -> RiskSurface:
+    """データのバージョン単位でキャッシュしたリスク面を取得"""
+    return ensure_risk_surface(version)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_risk_surface_frame(version: str, selection_key: tuple, color_range: list) -> tuple[pd.DataFrame, dict]:
+    """シナリオのリスク面を地図表示用の1行のDataFrameとして取得（シナリオ単位でキャッシュ）
+
+    Args:
+        version: 元データのバージョン
+        selection_key: ((条件名, (値, ...)), ...) の形の選択条件
+        color_range: 着色に使う色の段階
+
+    Returns:
+        tuple[pd.DataFrame, dict]: (image / bounds 列を持つ1行のDataFrame, 件数などの要約)
+    """
+    surface = get_risk_surface(version)
+    image, summary = surface.render({column: list(values) for column, values in selection_key}, color_range)
+    return pd.DataFrame({'image': [image], 'bounds': [surface.lonlat_bounds()]}), summary
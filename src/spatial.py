@@ -0,0 +1,105 @@
+"""空間インデックス
+
+緯度経度を地球中心の直交座標（メートル）に変換し、一辺 cell_m の立方体グリッドに
+振り分けて近傍検索します。点の追加は対象セルへの追記だけなので、
+要望の投稿のように少しずつ増えるデータにも再構築なしで対応できます。
+"""
+from typing import Tuple
+
+import numpy as np
+
+from src.utils import EARTH_RADIUS_M
+
+
+def lonlat_to_xyz(lat, lon) -> np.ndarray:
+    """緯度経度を地球中心の直交座標（メートル）に変換
+
+    Returns:
+        np.ndarray: (N, 3) の配列
+    """
+    lat = np.radians(np.atleast_1d(np.asarray(lat, dtype=float)))
+    lon = np.radians(np.atleast_1d(np.asarray(lon, dtype=float)))
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_M * np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def arc_to_chord(distance_m: float) -> float:
+    """大円距離を直交座標での直線距離に変換"""
+    return 2 * EARTH_RADIUS_M * np.sin(min(distance_m / (2 * EARTH_RADIUS_M), np.pi / 2))
+
+
+def chord_to_arc(chord_m: np.ndarray) -> np.ndarray:
+    """直交座標での直線距離を大円距離に変換"""
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord_m / (2 * EARTH_RADIUS_M), 0.0, 1.0))
+
+
+class GridIndex:
+    """一様グリッドによる追記可能な空間インデックス"""
+
+    def __init__(self, cell_m: float):
+        self.cell_m = cell_m
+        self._cells: dict[Tuple[int, int, int], list[int]] = {}
+        # 1件ずつの追加でも償却O(1)になるよう、容量を倍々で確保する
+        self._buffer = np.empty((16, 3))
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def _xyz(self) -> np.ndarray:
+        return self._buffer[:self._size]
+
+    def insert(self, lat, lon) -> np.ndarray:
+        """点を追加
+
+        Returns:
+            np.ndarray: 追加した点に割り当てた通し番号
+        """
+        xyz = lonlat_to_xyz(lat, lon)
+        start = self._size
+        ids = np.arange(start, start + len(xyz))
+        if start + len(xyz) > len(self._buffer):
+            capacity = max(2 * len(self._buffer), start + len(xyz))
+            self._buffer = np.concatenate([self._buffer[:start], np.empty((capacity - start, 3))])
+        self._buffer[start:start + len(xyz)] = xyz
+        self._size = start + len(xyz)
+
+        keys = np.floor(xyz / self.cell_m).astype(np.int64)
+        if len(xyz) == 1:
+            self._cells.setdefault(tuple(keys[0].tolist()), []).append(start)
+            return ids
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(unique_keys) + 1))
+        for k, key in enumerate(map(tuple, unique_keys.tolist())):
+            self._cells.setdefault(key, []).extend(ids[order[bounds[k]:bounds[k + 1]]].tolist())
+        return ids
+
+    def query_radius(self, lat: float, lon: float, radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        """指定地点から半径radius_m以内の点を検索
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (通し番号, 大円距離（メートル）)（距離の昇順）
+        """
+        center = lonlat_to_xyz(lat, lon)[0]
+        chord = arc_to_chord(radius_m)
+        reach = int(np.ceil(chord / self.cell_m))
+        cx, cy, cz = np.floor(center / self.cell_m).astype(np.int64)
+
+        candidates = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for dz in range(-reach, reach + 1):
+                    cell = self._cells.get((cx + dx, cy + dy, cz + dz))
+                    if cell:
+                        candidates.extend(cell)
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        ids = np.asarray(candidates, dtype=np.int64)
+        distances = np.linalg.norm(self._xyz[ids] - center, axis=1)
+        inside = distances <= chord
+        ids, distances = ids[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return ids[order], chord_to_arc(distances[order])
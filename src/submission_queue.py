@@ -0,0 +1,268 @@
+"""要望投稿キュー
+
+投稿フォームは要望をスプールディレクトリに1件1ファイルで書き込むだけにし（O(1)）、
+単一のコンシューマがまとめて要望ストアへ反映します。ファイルは tmp/ に書き込んでから
+new/ へアトミックに移動するため、書きかけの投稿が読まれることはありません。
+反映待ちが上限に達した場合は新規投稿を受け付けず（アドミッション制御）、
+投稿から反映までの待ち時間を計測します。
+
+要望ストアは request_id で重複を除去するため、反映後・ファイル削除前に
+プロセスが落ちて同じ投稿が再度反映されても結果は変わりません。
+要望ストアが拒否する要望（ポイズンレコード）はバッチを二分して特定し、failed/ へ退避するため、
+1件の不正な投稿でキュー全体が止まることはありません。
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import streamlit as st
+
+from config import (
+    REQUESTS_SPOOL_DIR,
+    SUBMISSION_QUEUE_MAX,
+    SUBMISSION_BATCH_SIZE,
+    SUBMISSION_FLUSH_INTERVAL_SEC,
+    SUBMISSION_PROCESS_RATE_PER_MINUTE,
+    SUBMISSION_PROCESS_BURST
+)
+from src.request_store import file_lock, get_request_store
+from src.utils import TokenBucket
+
+# 待ち時間の統計に使う直近の件数
+LATENCY_WINDOW = 1000
+# アドミッション制御で反映待ち件数を数え直す間隔（間は投稿・反映の件数で推定する）
+PENDING_RECOUNT_SEC = 1.0
+# 要望ストアの一時的な失敗（ディスク・ロック待ちなど）。投稿はキューに残して次の周期で再試行する
+TRANSIENT_ERRORS = (OSError, sqlite3.OperationalError)
+
+
+class SubmissionQueue:
+    """スプールディレクトリによる永続的な投稿キュー"""
+
+    def __init__(
+        self,
+        spool_dir: Path = REQUESTS_SPOOL_DIR,
+        store=None,
+        max_pending: int = SUBMISSION_QUEUE_MAX,
+        batch_size: int = SUBMISSION_BATCH_SIZE,
+        flush_interval: float = SUBMISSION_FLUSH_INTERVAL_SEC,
+        fsync: bool = True
+    ):
+        self.new_dir = spool_dir / "new"
+        self.tmp_dir = spool_dir / "tmp"
+        self.failed_dir = spool_dir / "failed"
+        self.lock_file = spool_dir / ".consumer.lock"
+        self.store = store if store is not None else get_request_store()
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        for directory in (self.new_dir, self.tmp_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {'enqueued': 0, 'applied': 0, 'rejected': 0, 'batches': 0, 'errors': 0}
+        self._consumer: Optional[threading.Thread] = None
+        self._pending_estimate = 0
+        self._pending_counted_at = float('-inf')
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def pending(self) -> int:
+        """反映待ちの件数（他プロセスからの投稿も含む）"""
+        with os.scandir(self.new_dir) as entries:
+            return sum(1 for entry in entries if entry.name.endswith('.json'))
+
+    def is_full(self) -> bool:
+        """反映待ちが上限に達しているか
+
+        投稿のたびにディレクトリを数えるとバースト時にO(件数)になるため、
+        PENDING_RECOUNT_SEC ごとに数え直し、その間はこのプロセスでの投稿・反映件数で推定します。
+        """
+        now = time.monotonic()
+        if now - self._pending_counted_at >= PENDING_RECOUNT_SEC:
+            count = self.pending()
+            with self._lock:
+                self._pending_estimate = count
+                self._pending_counted_at = now
+        return self._pending_estimate >= self.max_pending
+
+    def enqueue(self, record: dict, check_capacity: bool = True) -> bool:
+        """要望をキューに書き込み
+
+        同じrequest_idの要望を後から書き込むと、反映時に先の要望を置き換えます。
+
+        Args:
+            record: 要望ストアに保存する要望（request_idを含む）
+            check_capacity: 反映待ちの上限を確認する（受付済みの要望の訂正ではFalse）
+
+        Returns:
+            bool: 受け付けた場合True、キューが上限に達している場合False
+        """
+        if check_capacity and self.is_full():
+            self._count('rejected')
+            return False
+
+        payload = json.dumps({'enqueued_at': time.time(), 'record': record}, ensure_ascii=False).encode('utf-8')
+        # ファイル名の先頭を時刻にして、コンシューマが投稿順に反映できるようにする
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.json"
+        tmp_path = self.tmp_dir / name
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.new_dir / name)
+
+        with self._lock:
+            self._stats['enqueued'] += 1
+            self._pending_estimate += 1
+        self._wakeup.set()
+        return True
+
+    def spooled_records(self) -> Iterator[dict]:
+        """反映待ち（new/）と退避済み（failed/）の投稿の要望を取得（読めないファイルは飛ばす）
+
+        要望ストアにまだ入っていない要望が参照する画像を、画像のGCで残すために使います。
+        """
+        for directory in (self.new_dir, self.failed_dir):
+            for path in directory.glob('*.json'):
+                try:
+                    record = json.loads(path.read_bytes())['record']
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+    def drain_once(self) -> int:
+        """反映待ちの要望を最大batch_size件まとめて要望ストアへ反映
+
+        Returns:
+            int: 反映した件数
+        """
+        # 複数プロセスで動いていても、反映は常に1つのコンシューマだけが行う
+        with file_lock(self.lock_file):
+            names = sorted(name for name in os.listdir(self.new_dir) if name.endswith('.json'))[:self.batch_size]
+            if not names:
+                return 0
+
+            entries = []
+            for name in names:
+                path = self.new_dir / name
+                try:
+                    entry = json.loads(path.read_bytes())
+                    entries.append((path, entry['record'], entry['enqueued_at']))
+                except (ValueError, KeyError):
+                    # 読めない投稿は反映せずに退避する
+                    self._quarantine(path)
+
+            applied = self._append_isolating(entries) if entries else []
+            for path, _, _ in applied:
+                path.unlink(missing_ok=True)
+
+        now = time.time()
+        with self._lock:
+            self._latencies.extend(now - enqueued_at for _, _, enqueued_at in applied)
+            self._stats['applied'] += len(applied)
+            self._stats['batches'] += 1
+            self._pending_estimate = max(self._pending_estimate - len(names), 0)
+        return len(applied)
+
+    def _quarantine(self, path: Path) -> None:
+        """反映できない投稿を failed/ へ退避"""
+        os.replace(path, self.failed_dir / path.name)
+        self._count('errors')
+
+    def _append_isolating(self, entries: list[tuple[Path, dict, float]]) -> list[tuple[Path, dict, float]]:
+        """要望をまとめて要望ストアへ反映し、失敗したバッチは二分して反映できない要望を特定
+
+        一時的な失敗（TRANSIENT_ERRORS）はそのまま送出し、投稿はキューに残します。
+        それ以外の例外で1件でも反映できない要望は failed/ へ退避します。
+        要望ストアは request_id で重複を除去するため、二分して反映し直しても同じ要望が重複しません。
+
+        Args:
+            entries: (スプールファイル, 要望, 投稿時刻) のリスト
+
+        Returns:
+            list: 反映できた要素
+        """
+        try:
+            self.store.append_many([record for _, record, _ in entries])
+            return entries
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception:
+            if len(entries) == 1:
+                self._quarantine(entries[0][0])
+                return []
+        middle = len(entries) // 2
+        return self._append_isolating(entries[:middle]) + self._append_isolating(entries[middle:])
+
+    def drain(self) -> int:
+        """反映待ちがなくなるまで反映
+
+        Returns:
+            int: 反映した件数
+        """
+        total = 0
+        # 退避した投稿だけのバッチ（反映0件）でも、反映待ちが残っていれば続ける
+        while (applied := self.drain_once()) or self.pending():
+            total += applied
+        return total
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                # 要望ストアへの書き込み失敗時は投稿をキューに残したまま次の周期で再試行する
+                self._count('errors')
+                time.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        """バックグラウンドのコンシューマを起動"""
+        if self._consumer is None:
+            self._consumer = threading.Thread(target=self._run, name='submission-consumer', daemon=True)
+            self._consumer.start()
+
+    def metrics(self) -> dict:
+        """キューの深さ・件数・投稿から反映までの待ち時間（秒）を取得"""
+        with self._lock:
+            latencies = np.array(self._latencies)
+            stats = dict(self._stats)
+        stats['queue_depth'] = self.pending()
+        stats['latency_p50'] = float(np.percentile(latencies, 50)) if len(latencies) else None
+        stats['latency_p95'] = float(np.percentile(latencies, 95)) if len(latencies) else None
+        return stats
+
+
+@st.cache_resource
+def get_submission_queue() -> SubmissionQueue:
+    """プロセス内で共有する投稿キューを取得（コンシューマを起動済み）"""
+    queue = SubmissionQueue()
+    queue.start()
+    return queue
+
+
+@st.cache_resource
+def get_submission_limiter() -> TokenBucket:
+    """プロセス内の全投稿で共有するレート制限を取得
+
+    セッションごとのレート制限（app.py の submission_limiter）はページを再読み込みすると
+    新しいセッションになってリセットされるため、再読み込みでは回避できない全体の上限をここで掛けます。
+    """
+    return TokenBucket(SUBMISSION_PROCESS_RATE_PER_MINUTE / 60, SUBMISSION_PROCESS_BURST)
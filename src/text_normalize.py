@@ -0,0 +1,215 @@
+"""地名文字列の正規化
+
+事故データの Area / LOCATION や人口データの地域は、全角・半角や空白の有無、
+都道府県・郡名の有無が混在しています。ここではそれらを揃えた照合用のキーを作ります。
+正規化は一意な値ごとに1回だけ行い、pd.factorize のコードで全行に展開します。
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+PREFECTURES = (
+    '北海道', '青森県', '岩手県', '宮城県', '秋田県', '山形県', '福島県',
+    '茨城県', '栃木県', '群馬県', '埼玉県', '千葉県', '東京都', '神奈川県',
+    '新潟県', '富山県', '石川県', '福井県', '山梨県', '長野県', '岐阜県',
+    '静岡県', '愛知県', '三重県', '滋賀県', '京都府', '大阪府', '兵庫県',
+    '奈良県', '和歌山県', '鳥取県', '島根県', '岡山県', '広島県', '山口県',
+    '徳島県', '香川県', '愛媛県', '高知県', '福岡県', '佐賀県', '長崎県',
+    '熊本県', '大分県', '宮崎県', '鹿児島県', '沖縄県'
+)
+
+_PREFECTURE_PATTERN = re.compile('^(' + '|'.join(PREFECTURES) + ')')
+# 「愛甲郡愛川町」の郡名部分（郡山市・上郡町のように郡を含む市町村名は対象外）
+_DISTRICT_PATTERN = re.compile(r'^.+?郡(.+[町村])$')
+# 「東北上り369.6(路肩)【宮城県大崎市」のように【】内に市町村が入る表記
+_BRACKET_PATTERN = re.compile(r'【([^】]*)】?$')
+# 「京都縦貫自動車道下り線京丹波PA(船井郡京丹波町」のように末尾の()内に市町村が入る表記
+_TRAILING_PAREN_PATTERN = re.compile(r'\(([^()]*[市区町村])\)?$')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# 「東北上り369.6(路肩)」「京都縦貫自動車道下り線」のように路線名で始まる表記（市区町村名で始まるものは対象外）
+_ROUTE_PATTERN = re.compile(r'^(?P<route>[^\d市区町村郡()【】]+?)\(?(?P<direction>上り|下り)線?\)?')
+_ROUTE_SUFFIXES = ('道', '線', '道路', '号', 'バイパス', '高速')
+# キロポスト（「上り369.6」「260.9KP」「87,4kp」「313.8キロポスト」「9.8kmポスト」）
+_KILOPOST_PATTERN = re.compile(
+    r'(?:(?<=上り)|(?<=下り)|(?<=上り線)|(?<=下り線))(\d+(?:[.,]\d+)?)'
+    r'|(\d+(?:[.,]\d+)?)(?:kp|kmポスト|キロポスト?|k(?![a-z]))',
+    re.IGNORECASE
+)
+# Area / LOCATION を正規化した結果の列（normalize_places の戻り値）
+PLACE_COLUMNS = ['Area', 'LOCATION', 'PREFECTURE', 'ROUTE', 'DIRECTION', 'KILOPOST']
+_PLACE_MEMO_SIZE = 1 << 16
+
+
+def normalize_text(text: str) -> str:
+    """NFKCで全角英数・記号を揃え、空白と省略記号を除去"""
+    text = unicodedata.normalize('NFKC', text)
+    text = _WHITESPACE_PATTERN.sub('', text)
+    return text.rstrip('.…')
+
+
+def split_prefecture(text: str) -> tuple[str, str]:
+    """先頭の都道府県名を分離
+
+    Returns:
+        tuple[str, str]: (都道府県名（なければ空文字）, 残りの部分)
+    """
+    match = _PREFECTURE_PATTERN.match(text)
+    if match is None:
+        return '', text
+    return match.group(1), text[match.end():]
+
+
+def municipality_keys(text: str) -> list[tuple[str, str]]:
+    """市町村を照合するためのキーを優先順に列挙
+
+    Args:
+        text: 市町村を含む地名（normalize_text前の値でよい）
+
+    Returns:
+        list[tuple[str, str]]: (規則名, キー) のリスト。都道府県が分かる場合は「都道府県名+市町村名」のキーを先に返す
+    """
+    text = normalize_text(text)
+    bracket = _BRACKET_PATTERN.search(text)
+    if bracket:
+        text, rule = bracket.group(1), 'bracket'
+    else:
+        rule = 'exact'
+
+    prefecture, municipality = split_prefecture(text)
+    if prefecture:
+        rule = 'prefecture' if rule == 'exact' else rule
+    keys = []
+    for name, candidate_rule in ((municipality, rule), (_strip_district(municipality), 'district')):
+        if candidate_rule == 'district' and name == municipality:
+            continue
+        if prefecture:
+            keys.append((candidate_rule, prefecture + name))
+        keys.append((candidate_rule, name))
+    return keys
+
+
+def _strip_district(name: str) -> str:
+    match = _DISTRICT_PATTERN.match(name)
+    return match.group(1) if match else name
+
+
+def map_unique(values: pd.Series, func: Callable[[str], Optional[object]]) -> np.ndarray:
+    """一意な値ごとにfuncを1回だけ適用し、全行の結果をコード経由で展開
+
+    Args:
+        values: 文字列のSeries（欠損値はNoneになる）
+        func: 一意な値に適用する関数
+
+    Returns:
+        np.ndarray: valuesと同じ長さのobject配列
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(value) for value in uniques]
+    mapped[-1] = None
+    # 欠損値のコード(-1)は末尾のNoneを指す
+    return mapped[codes]
+
+
+@lru_cache(maxsize=_PLACE_MEMO_SIZE)
+def parse_area(text: str) -> tuple[str, str, Optional[str], Optional[str], Optional[float]]:
+    """Area（市区町村名、または高速道路の路線・キロポスト表記）を分解
+
+    例: '東北上り３６９．６（路肩）【宮城県大崎市' -> ('大崎市', '宮城県', '東北', '上り', 369.6)
+        '神奈川県川崎市' -> ('川崎市', '神奈川県', None, None, None)
+
+    Returns:
+        tuple: (市区町村名（【】内があればその中身。都道府県名を除く）, 都道府県名, 路線名, 上り/下り, キロポスト)
+    """
+    text = normalize_text(text)
+    route, direction, kilopost = parse_route(text)
+    bracket = _BRACKET_PATTERN.search(text) or _TRAILING_PAREN_PATTERN.search(text)
+    if bracket and bracket.group(1):
+        text = bracket.group(1)
+    prefecture, municipality = split_prefecture(text)
+    return municipality or text, prefecture, route, direction, kilopost
+
+
+@lru_cache(maxsize=_PLACE_MEMO_SIZE)
+def parse_location(text: str) -> tuple[str, str, Optional[str], Optional[str], Optional[float]]:
+    """LOCATION（発生場所の説明）を表示用に正規化して分解
+
+    Returns:
+        tuple: (NFKCで揃え空白を1つにまとめた文字列, 都道府県名, 路線名, 上り/下り, キロポスト)
+    """
+    display = _WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+    compact = normalize_text(text)
+    route, direction, kilopost = parse_route(compact)
+    prefecture, _ = split_prefecture(compact)
+    return display, prefecture, route, direction, kilopost
+
+
+def parse_route(text: str) -> tuple[Optional[str], Optional[str], Optional[float]]:
+    """路線名・上り/下り・キロポストを抽出（normalize_text済みの文字列）
+
+    Returns:
+        tuple: (路線名, 上り/下り, キロポスト)。見つからない項目はNone
+    """
+    route = direction = kilopost = None
+    match = _ROUTE_PATTERN.match(text)
+    # 「東北上り369.6」のように直後がキロポストでなければ、道路らしい名前のときだけ路線名とみなす
+    if match and (match.group('route').endswith(_ROUTE_SUFFIXES) or text[match.end():match.end() + 1].isdigit()):
+        route, direction = match.group('route'), match.group('direction')
+    else:
+        direction = next((word for word in ('上り', '下り') if word in text), None)
+    kp = _KILOPOST_PATTERN.search(text)
+    if kp:
+        kilopost = float((kp.group(1) or kp.group(2)).replace(',', '.'))
+    return route, direction, kilopost
+
+
+def normalize_places(df: pd.DataFrame) -> pd.DataFrame:
+    """Area / LOCATION を正規化し、都道府県・路線・キロポストの列を作成
+
+    全角・半角や都道府県名の有無の違いで同じ場所が別々に集計されないよう、Areaを市区町村名に揃えます。
+    解析は一意な文字列ごとに1回だけ行い（結果は parse_area / parse_location のメモに残る）、
+    pd.factorize のコードで全行に展開するため、処理時間は行数ではなく異なる値の数に比例します。
+
+    Args:
+        df: Area / LOCATION の一方または両方を含むデータフレーム
+
+    Returns:
+        pd.DataFrame: PLACE_COLUMNS の列（dfと同じインデックス。元の列がないものは含まない）。
+            都道府県・路線・キロポストはAreaから分かればAreaの値、なければLOCATIONの値
+    """
+    result = pd.DataFrame(index=df.index)
+    parsed = {}
+    for column, parser in (('Area', parse_area), ('LOCATION', parse_location)):
+        if column not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df[column].astype('string'))
+        # 末尾の行は欠損値（コード-1）用
+        table = list(zip(*[parser(value) for value in uniques], strict=True)) if len(uniques) else [()] * 5
+        fields = []
+        for values, missing in zip(table, (None, '', None, None, np.nan), strict=True):
+            mapped = np.empty(len(uniques) + 1, dtype=float if missing is np.nan else object)
+            mapped[:-1] = values
+            mapped[-1] = missing
+            fields.append(mapped[codes])
+        result[column] = fields[0]
+        parsed[column] = fields[1:]
+
+    if not parsed:
+        return result
+    # Areaで分からない項目はLOCATIONから補う
+    sources = [parsed[column] for column in ('Area', 'LOCATION') if column in parsed]
+    prefecture, route, direction, kilopost = sources[0]
+    for other in sources[1:]:
+        prefecture = np.where(prefecture == '', other[0], prefecture)
+        route = np.where(pd.isna(route), other[1], route)
+        direction = np.where(pd.isna(direction), other[2], direction)
+        kilopost = np.where(np.isnan(kilopost), other[3], kilopost)
+    result['PREFECTURE'] = np.where(prefecture == '', None, prefecture)
+    result['ROUTE'] = route
+    result['DIRECTION'] = direction
+    result['KILOPOST'] = kilopost
+    return result
@@ -0,0 +1,442 @@
+"""事故データのベクタータイルキャッシュ
+
+事故ポイントをズームレベルごとに z/x/y のベクタータイル（Mapbox Vector Tile形式）
+へ事前レンダリングし、データセットのバージョンごとにローカルへキャッシュします。
+低ズームではタイル内グリッドで集約した密度ポイント、高ズームでは個別ポイントを出力します。
+タイルはローカルのHTTPサーバーから配信し、ネットワーク接続なしで動作します。
+"""
+import json
+import shutil
+import threading
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config import (
+    TILE_CACHE_DIR,
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+    TILE_POINT_ZOOM,
+    TILE_EXTENT,
+    TILE_GRID_SIZE,
+    TILE_SERVER_HOST,
+    TILE_SERVER_PORT,
+    TILE_SERVER_URL
+)
+from src.map_components import RED_RANGE
+from src.utils import lonlat_to_world
+
+TILE_LAYER_NAME = 'accidents'
+TILE_PROPERTY_KEYS = ['count', 'radius', 'r', 'g', 'b', 'a']
+MANIFEST_FILENAME = 'manifest.json'
+
+
+# ---------------------------------------------------------------------------
+# MVTエンコード（protobufの最小実装）
+# ---------------------------------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _varint_lengths(values: np.ndarray) -> np.ndarray:
+    """非負整数ごとのvarintのバイト数"""
+    lengths = np.ones(values.shape, dtype=np.int64)
+    for shift in range(7, 63, 7):
+        lengths += values >= (1 << shift)
+    return lengths
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    """非負整数の配列をvarintにエンコードし、配列の順（行優先）に連結"""
+    values = values.astype(np.int64).ravel()
+    lengths = _varint_lengths(values)
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    # k バイト目（下位から7bitずつ）をまとめて書き込む。続きがあるバイトは最上位bitを立てる
+    for k in range(int(lengths.max(initial=0))):
+        rows = lengths > k
+        out[offsets[rows] + k] = ((values[rows] >> (7 * k)) & 0x7F) | ((lengths[rows] > k + 1) << 7)
+    return out.tobytes()
+
+
+def _zigzag(value: np.ndarray) -> np.ndarray:
+    return (value << 1) ^ (value >> 63)
+
+
+def encode_point_tiles(
+    starts: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    properties: dict[str, np.ndarray]
+) -> list[bytes]:
+    """タイル順に並んだポイント群を、タイルごとのMVTにまとめてエンコード
+
+    全フィーチャーが同じ形（id・タグ・POINT・MoveTo(1)）なので、フィーチャーごとのフィールドを
+    1行に並べた整数の行列を作り、ズームレベル内の全タイル分のvarintを一度にエンコードしてから
+    タイルごとに切り出します。フィールド番号などの定数はいずれも127以下で、varintにすると同じ
+    1バイトになるため、行列の要素として一緒に扱えます。
+
+    Args:
+        starts: タイルごとの先頭ポイントの位置（昇順、先頭は0）
+        x: タイル内x座標（0〜TILE_EXTENT）
+        y: タイル内y座標（0〜TILE_EXTENT）
+        properties: プロパティ名 -> 非負整数配列
+
+    Returns:
+        list[bytes]: タイルごとのMVTバイナリ
+    """
+    keys = list(properties.keys())
+    n = len(x)
+    starts = np.asarray(starts, dtype=np.int64)
+    sizes = np.diff(np.append(starts, n))
+    tile = np.repeat(np.arange(len(starts)), sizes)
+
+    # 値のテーブルはタイル内の全プロパティで共有し、タイル内の出現順に番号を振る
+    columns = np.column_stack([np.asarray(properties[k], dtype=np.int64) for k in keys]).reshape(n, len(keys))
+    value_tile = np.repeat(tile, len(keys))
+    radix = int(columns.max(initial=0)) + 1
+    uniques, first, inverse = np.unique(value_tile * radix + columns.ravel(), return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    # 出現順に並べると値はタイル順にまとまるので、タイルごとの値テーブルの先頭位置が求まる
+    table_starts = np.searchsorted(uniques[order] // radix, np.arange(len(starts) + 1))
+    values = uniques[order] % radix
+
+    tags = np.empty((n, 2 * len(keys)), dtype=np.int64)
+    tags[:, 0::2] = np.arange(len(keys))
+    tags[:, 1::2] = (rank[inverse.ravel()] - table_starts[value_tile]).reshape(n, len(keys))
+
+    geometry = np.empty((n, 3), dtype=np.int64)
+    geometry[:, 0] = 9  # MoveTo(1)
+    geometry[:, 1] = _zigzag(np.asarray(x, dtype=np.int64))
+    geometry[:, 2] = _zigzag(np.asarray(y, dtype=np.int64))
+    ids = np.arange(n, dtype=np.int64) - np.repeat(starts, sizes) + 1
+
+    tags_length = _varint_lengths(tags).sum(axis=1)
+    geometry_length = _varint_lengths(geometry).sum(axis=1)
+    # フィーチャー本体: id(1) + tags(2) + type(3) + geometry(4)
+    feature_length = (
+        1 + _varint_lengths(ids)
+        + 1 + _varint_lengths(tags_length) + tags_length
+        + 2
+        + 1 + _varint_lengths(geometry_length) + geometry_length
+    )
+    features = _encode_varints(np.column_stack([
+        np.full(n, 0x12), feature_length,  # Layer.features (2, length-delimited)
+        np.full(n, 0x08), ids,  # Feature.id (1, varint)
+        np.full(n, 0x12), tags_length, tags,  # Feature.tags (2, packed)
+        np.full(n, 0x18), np.full(n, 1),  # Feature.type (3) = POINT
+        np.full(n, 0x22), geometry_length, geometry,  # Feature.geometry (4, packed)
+    ]))
+    feature_offsets = np.append(0, np.cumsum(1 + _varint_lengths(feature_length) + feature_length))
+
+    # Layer.values (4, length-delimited) の Value.int_value (5, varint)
+    value_length = 1 + _varint_lengths(values)
+    value_messages = _encode_varints(np.column_stack([
+        np.full(len(values), 0x22), value_length, np.full(len(values), 0x28), values
+    ]))
+    value_offsets = np.append(0, np.cumsum(2 + value_length))
+
+    header = _key(15, 0) + _varint(2) + _length_delimited(1, TILE_LAYER_NAME.encode('utf-8'))
+    key_messages = b''.join(_length_delimited(3, k.encode('utf-8')) for k in keys)
+    extent = _key(5, 0) + _varint(TILE_EXTENT)
+    feature_bounds = feature_offsets[np.append(starts, n)].tolist()
+    value_bounds = value_offsets[table_starts].tolist()
+    tiles = []
+    for t in range(len(starts)):
+        layer = (
+            header
+            + features[feature_bounds[t]:feature_bounds[t + 1]]
+            + key_messages
+            + value_messages[value_bounds[t]:value_bounds[t + 1]]
+            + extent
+        )
+        tiles.append(_length_delimited(3, layer))
+    return tiles
+
+
+def encode_point_tile(x: np.ndarray, y: np.ndarray, properties: dict[str, np.ndarray]) -> bytes:
+    """ポイント群を1枚のMVTタイルにエンコード
+
+    Args:
+        x: タイル内x座標（0〜TILE_EXTENT）
+        y: タイル内y座標（0〜TILE_EXTENT）
+        properties: プロパティ名 -> 非負整数配列
+
+    Returns:
+        bytes: MVTバイナリ
+    """
+    return encode_point_tiles(np.zeros(1, dtype=np.int64), x, y, properties)[0]
+
+
+# ---------------------------------------------------------------------------
+# タイル生成
+# ---------------------------------------------------------------------------
+
+def _color_properties(counts: np.ndarray) -> dict[str, np.ndarray]:
+    """件数から色（RED_RANGE）と半径のプロパティを計算"""
+    max_level = len(RED_RANGE) - 1
+    max_count = counts.max() if len(counts) else 1
+    scale = np.log1p(counts) / np.log1p(max(max_count, 1))
+    levels = np.clip(np.floor(scale * max_level + 0.5), 0, max_level).astype(int)
+    palette = np.array(RED_RANGE, dtype=np.int64)[levels]
+    radius = np.clip(3 + 2 * np.sqrt(counts), 3, 30).astype(np.int64)
+    return {
+        'count': counts.astype(np.int64),
+        'radius': radius,
+        'r': palette[:, 0],
+        'g': palette[:, 1],
+        'b': palette[:, 2],
+        'a': palette[:, 3]
+    }
+
+
+def build_zoom_tiles(world_x: np.ndarray, world_y: np.ndarray, zoom: int, output_dir: Path) -> int:
+    """1ズームレベル分のタイルを生成
+
+    Args:
+        world_x: 正規化x座標
+        world_y: 正規化y座標
+        zoom: ズームレベル
+        output_dir: バージョンごとのキャッシュディレクトリ
+
+    Returns:
+        int: 書き出したタイル数
+    """
+    n = 2 ** zoom
+    scaled_x = world_x * n
+    scaled_y = world_y * n
+    tile_x = np.floor(scaled_x).astype(np.int64)
+    tile_y = np.floor(scaled_y).astype(np.int64)
+    local_x = ((scaled_x - tile_x) * TILE_EXTENT).astype(np.int64)
+    local_y = ((scaled_y - tile_y) * TILE_EXTENT).astype(np.int64)
+
+    if zoom < TILE_POINT_ZOOM:
+        # タイル内グリッドのセル中心に集約
+        cell = TILE_EXTENT // TILE_GRID_SIZE
+        local_x = local_x // cell * cell + cell // 2
+        local_y = local_y // cell * cell + cell // 2
+
+    # (タイル, タイル内座標) を1つの整数キーにまとめて集計
+    tile_key = tile_x * n + tile_y
+    keys = (tile_key * TILE_EXTENT + local_x) * TILE_EXTENT + local_y
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    if len(unique_keys) == 0:
+        return 0
+
+    local_y = unique_keys % TILE_EXTENT
+    local_x = (unique_keys // TILE_EXTENT) % TILE_EXTENT
+    tile_key = unique_keys // (TILE_EXTENT * TILE_EXTENT)
+    props = _color_properties(counts)
+
+    # np.uniqueの結果はソート済みなので、タイル境界で分割できる
+    boundaries = np.flatnonzero(np.diff(tile_key)) + 1
+    starts = np.concatenate(([0], boundaries))
+
+    # ズームレベル内の全タイルをまとめてエンコード
+    encoded = encode_point_tiles(starts, local_x, local_y, {k: props[k] for k in TILE_PROPERTY_KEYS})
+    for start, data in zip(starts.tolist(), encoded):
+        tx, ty = divmod(int(tile_key[start]), n)
+        tile_path = output_dir / str(zoom) / str(tx) / f"{ty}.pbf"
+        tile_path.parent.mkdir(parents=True, exist_ok=True)
+        tile_path.write_bytes(data)
+
+    return len(starts)
+
+
+def build_tile_cache(
+    df: pd.DataFrame,
+    version: str,
+    cache_dir: Path = TILE_CACHE_DIR,
+    min_zoom: int = TILE_MIN_ZOOM,
+    max_zoom: int = TILE_MAX_ZOOM
+) -> Path:
+    """事故データからタイルキャッシュを生成
+
+    生成は一時ディレクトリで行い、完了後にバージョンディレクトリへ置き換えるため、
+    生成途中のタイルが配信されることはありません。
+
+    Args:
+        df: 事故データ（LATITUDE/LONGITUDEを含む）
+        version: データセットのバージョン
+        cache_dir: キャッシュのルートディレクトリ
+        min_zoom: 最小ズーム
+        max_zoom: 最大ズーム
+
+    Returns:
+        Path: 生成したバージョンディレクトリ
+    """
+    valid = df[['LONGITUDE', 'LATITUDE']].dropna()
+    world_x, world_y = lonlat_to_world(
+        valid['LONGITUDE'].to_numpy(dtype=float),
+        valid['LATITUDE'].to_numpy(dtype=float)
+    )
+
+    version_dir = cache_dir / version
+    work_dir = cache_dir / f".{version}.building"
+    if work_dir.exists():
+        shutil.rmtree(work_dir)
+    work_dir.mkdir(parents=True)
+
+    tile_count = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        tile_count += build_zoom_tiles(world_x, world_y, zoom, work_dir)
+
+    manifest = {
+        'version': version,
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'point_zoom': TILE_POINT_ZOOM,
+        'point_count': int(len(valid)),
+        'tile_count': tile_count,
+        'built_at': datetime.now().isoformat()
+    }
+    (work_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if version_dir.exists():
+        shutil.rmtree(version_dir)
+    work_dir.rename(version_dir)
+    return version_dir
+
+
+def is_tile_cache_ready(version: str, cache_dir: Path = TILE_CACHE_DIR) -> bool:
+    """指定バージョンのタイルキャッシュが生成済みか判定"""
+    return (cache_dir / version / MANIFEST_FILENAME).exists()
+
+
+@st.cache_resource(show_spinner="タイルを生成中...")
+def ensure_tile_cache(_df: pd.DataFrame, version: str) -> Path:
+    """タイルキャッシュを取得（未生成ならその場で生成）
+
+    Args:
+        _df: 事故データ（キャッシュキーには含めない）
+        version: データセットのバージョン
+
+    Returns:
+        Path: バージョンディレクトリ
+    """
+    if is_tile_cache_ready(version):
+        return TILE_CACHE_DIR / version
+    return build_tile_cache(_df, version)
+
+
+def get_tile_url_template(version: str, server_url: str = TILE_SERVER_URL) -> str:
+    """deck.gl向けのタイルURLテンプレートを取得
+
+    Args:
+        version: データセットのバージョン
+        server_url: タイルサーバーのURL（get_tile_server_url の戻り値）
+    """
+    return f"{server_url}/{version}/{{z}}/{{x}}/{{y}}.pbf"
+
+
+# ---------------------------------------------------------------------------
+# ローカルタイルサーバー
+# ---------------------------------------------------------------------------
+
+class TileRequestHandler(SimpleHTTPRequestHandler):
+    """タイル配信用のHTTPハンドラ（CORS許可・空タイル対応）"""
+
+    # 使用中のポートで応答しているのがタイルサーバーかどうかの判定に使う
+    server_version = 'AccVisTileServer/1.0'
+
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        '.pbf': 'application/x-protobuf',
+    }
+
+    def end_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        super().end_headers()
+
+    def send_head(self):
+        # データのないタイルは404ではなく空タイルとして返す
+        path = Path(self.translate_path(self.path))
+        if path.suffix == '.pbf' and not path.exists():
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-protobuf')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_tile_server(
+    cache_dir: Path = TILE_CACHE_DIR,
+    host: str = TILE_SERVER_HOST,
+    port: int = TILE_SERVER_PORT
+) -> ThreadingHTTPServer:
+    """タイルサーバーをバックグラウンドスレッドで起動
+
+    Args:
+        cache_dir: 配信するキャッシュディレクトリ
+        host: バインドするホスト
+        port: ポート番号
+
+    Returns:
+        ThreadingHTTPServer: 起動したサーバー
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    handler = partial(TileRequestHandler, directory=str(cache_dir))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='tile-server', daemon=True)
+    thread.start()
+    return server
+
+
+def is_tile_server(url: str) -> bool:
+    """URLで応答しているのがタイルサーバー（TileRequestHandler）か判定"""
+    try:
+        with urlopen(Request(f"{url}/", method='HEAD'), timeout=1) as response:
+            return response.headers.get('Server', '').startswith(TileRequestHandler.server_version)
+    except OSError:
+        return False
+
+
+@st.cache_resource
+def get_tile_server_url() -> str:
+    """プロセス内で共有するタイルサーバーを起動し、そのURLを取得
+
+    設定のポートが使用中の場合、応答しているのがタイルサーバー（build_tiles.py --serve など別プロセス）
+    ならそれを利用し、別のプログラムなら空いているポートで起動します。
+
+    Returns:
+        str: タイルサーバーのURL（設定のポートを使えなかった場合は TILE_SERVER_URL と異なる）
+    """
+    try:
+        start_tile_server()
+        return TILE_SERVER_URL
+    except OSError:
+        if is_tile_server(TILE_SERVER_URL):
+            return TILE_SERVER_URL
+    server = start_tile_server(port=0)
+    return f"http://localhost:{server.server_address[1]}"
@@ -1,6 +1,12 @@
 """ユーティリティ関数"""
+import threading
+import time
 from typing import Tuple
 from datetime import datetime
+import numpy as np
+
+MAX_MERCATOR_LAT = 85.051129
+EARTH_RADIUS_M = 6371008.8
 
 
 def validate_coordinates(lat: float, lon: float) -> Tuple[bool, str]:
@@ -33,3 +39,114 @@ def format_timestamp(iso_timestamp: str) -> str:
     """
     dt = datetime.fromisoformat(iso_timestamp)
     return dt.strftime("%Y年%m月%d日 %H:%M")
+
+
+def lonlat_to_world(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """経度・緯度をWebメルカトルの正規化座標（0〜1）に変換
+
+    Args:
+        lon: 経度の配列
+        lat: 緯度の配列
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (x, y) 正規化座標（yは北が0）
+    """
+    lat = np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    x = (lon + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+
+def world_to_lonlat(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Webメルカトルの正規化座標を経度・緯度に変換
+
+    Args:
+        x: 正規化x座標
+        y: 正規化y座標
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (lon, lat)
+    """
+    lon = x * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y))))
+    return lon, lat
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """2点間の大円距離（メートル）を計算（配列対応）
+
+    Args:
+        lat1: 緯度1
+        lon1: 経度1
+        lat2: 緯度2
+        lon2: 経度2
+
+    Returns:
+        距離（メートル）
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def radius_to_bbox(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """中心と半径から、その円を包含する緯度経度の矩形を計算
+
+    Returns:
+        Tuple[float, float, float, float]: (min_lat, min_lon, max_lat, max_lon)
+    """
+    dlat = np.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = dlat / max(np.cos(np.radians(lat)), 1e-6)
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+class TokenBucket:
+    """トークンバケットによるレート制限（スレッドセーフ）
+
+    capacity個までのバーストを許し、以降は毎秒rate個のペースで回復します。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """トークンを取得（不足している場合は待たずにFalse）"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """トークンが貯まるまで待って取得"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def release(self, tokens: float = 1.0) -> None:
+        """取得したトークンを返す（取得後に別の理由で処理を断った場合）"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """トークンが取得可能になるまでの秒数"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)